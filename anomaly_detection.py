@@ -1,12 +1,23 @@
 import pandas as pd
 import numpy as np
+import csv
+import math
+import os
+import sys
+import time
+from collections import Counter, deque
+from datetime import datetime
+import data_store
 
 LOG_FILE = "honeypot_logs.csv"
+ATTACKER_LOG = "attacker_log.txt"      # written live by honeypot.py
+HIT_TIME = 3                            # attacker log rows: ip, lat, lon, ISO timestamp, method, path, user agent
+EVENTS_FILE = "anomaly_events.csv"
 
 def detect_anomalies():
     try:
-        df = pd.read_csv(LOG_FILE)
-    except:
+        df = data_store.load(LOG_FILE, columns=["ip"])
+    except (FileNotFoundError, pd.errors.EmptyDataError):
         print("⚠ No honeypot logs found yet.")
         return
 
@@ -31,11 +42,153 @@ def detect_anomalies():
         anomaly_report.append([ip, count, round(z,2), status])
 
     result_df = pd.DataFrame(anomaly_report, columns=["IP", "Hits", "Z-Score", "Threat Level"])
-    result_df.to_csv("anomaly_report.csv", index=False)
+    out = data_store.save(result_df, "anomaly_report.csv", "reports")
 
     print("\n📊 Anomaly Detection Completed")
     print(result_df)
-    print("\nSaved as anomaly_report.csv")
+    print(f"\nSaved as {out}")
+
+# ---------------- Live Sliding-Window Detector ----------------
+def threat_level(z):
+    status = "Normal"
+    if z > 1.5: status = "Suspicious"
+    if z > 2.5: status = "Critical Threat"
+    return status
+
+class SlidingWindowDetector:
+    """Per-IP hit counts over the last `window` seconds, kept in `bucket`-second slices.
+    Mean/variance of those counts across IPs are maintained with Welford updates that
+    also support removal, so each hit or expiry costs O(1)."""
+
+    def __init__(self, window=60, bucket=1.0):
+        self.window = window
+        self.bucket = bucket
+        self.buckets = deque()     # (bucket_start, Counter of hits per IP)
+        self.counts = {}           # ip -> hits inside the window
+        self.status = {}           # ip -> last reported threat level
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def _add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self, x):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = (self.n * self.mean - x) / (self.n - 1)
+        self.m2 -= (x - old_mean) * (x - self.mean)
+        self.n -= 1
+        self.mean = old_mean
+
+    def _set_count(self, ip, new):
+        old = self.counts.pop(ip, 0)
+        if old:
+            self._remove(old)
+        if new > 0:
+            self.counts[ip] = new
+            self._add(new)
+
+    def std(self):
+        # sample std, matching pandas .std() in the batch detector
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1)) if self.n > 1 else 0.0
+
+    def observe(self, ip, ts):
+        start = math.floor(ts / self.bucket) * self.bucket
+        if self.buckets and start < self.buckets[-1][0]:
+            if start + self.bucket <= self.buckets[-1][0] - self.window:
+                return                      # already outside the window
+            start = self.buckets[-1][0]     # a late line lands in the newest bucket, keeping buckets ordered
+        if not self.buckets or self.buckets[-1][0] != start:
+            self.buckets.append((start, Counter()))
+        self.buckets[-1][1][ip] += 1
+        self._set_count(ip, self.counts.get(ip, 0) + 1)
+
+    def expire(self, now):
+        while self.buckets and self.buckets[0][0] + self.bucket <= now - self.window:
+            _, hits = self.buckets.popleft()
+            for ip, c in hits.items():
+                self._set_count(ip, self.counts.get(ip, 0) - c)
+
+    def transitions(self, now):
+        """Re-grade every IP seen in the window and return the ones whose level changed."""
+        self.expire(now)
+        std = self.std()
+        events = []
+        for ip in set(self.counts) | set(self.status):
+            hits = self.counts.get(ip, 0)
+            z = (hits - self.mean) / std if std and hits else 0.0
+            level = threat_level(z)
+            previous = self.status.get(ip, "Normal")
+            if level != previous:
+                events.append({"time": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+                               "ip": ip, "hits": hits, "z": round(z, 2),
+                               "previous": previous, "status": level})
+            if level == "Normal":
+                self.status.pop(ip, None)
+            else:
+                self.status[ip] = level
+        return events
+
+def read_new_lines(path, offset):
+    """Complete lines appended to `path` since byte `offset`, and the new offset."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return [], 0
+    if size < offset:
+        offset = 0          # log was truncated or rotated
+    if size == offset:
+        return [], offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].decode("utf-8", "replace").splitlines()
+    return lines, offset + end
+
+def hit_time(row, default):
+    """Epoch seconds of an attacker log row's own timestamp, `default` when it is missing or unparsable."""
+    try:
+        return datetime.fromisoformat(row[HIT_TIME]).timestamp()
+    except (IndexError, ValueError):
+        return default
+
+def watch_honeypot_log(path=ATTACKER_LOG, window=60, bucket=1.0, poll=0.2, from_start=False):
+    """Tail the honeypot log forever, yielding Suspicious/Critical transitions as they happen.
+    Hits are placed in the window by the time the honeypot logged them, not the time they were read."""
+    detector = SlidingWindowDetector(window, bucket)
+    offset = 0 if from_start or not os.path.exists(path) else os.path.getsize(path)
+    while True:
+        lines, offset = read_new_lines(path, offset)
+        now = time.time()
+        for row in csv.reader(lines):
+            if row:
+                detector.observe(row[0], hit_time(row, now))
+        for event in detector.transitions(now):
+            yield event
+        time.sleep(poll)
+
+def run_live(path=ATTACKER_LOG, window=60):
+    print(f"📡 Watching {path} (sliding window {window}s)...")
+    new_file = not os.path.exists(EVENTS_FILE)
+    with open(EVENTS_FILE, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["time", "ip", "hits", "z", "previous", "status"])
+        if new_file:
+            writer.writeheader()
+        try:
+            for event in watch_honeypot_log(path, window):
+                print(f"{'🚨' if event['status'] != 'Normal' else '✅'} {event['time']} {event['ip']}: "
+                      f"{event['previous']} → {event['status']} ({event['hits']} hits, z={event['z']})")
+                writer.writerow(event)
+                f.flush()
+        except KeyboardInterrupt:
+            print("Stopped")
 
 if __name__ == "__main__":
-    detect_anomalies()
+    if "--watch" in sys.argv:
+        run_live()
+    else:
+        detect_anomalies()
@@ -1,59 +1,104 @@
-import pandas as pd
-import networkx as nx
-from pyvis.network import Network
-import random, time, webbrowser
-
-def simulate_attack(source=None, steps=8, csv="training_data.csv"):
-    df = pd.read_csv(csv)
-
-    G = nx.Graph()
-    for i, row in df.iterrows():
-        G.add_node(row["ip"], risk=row["risk_score"])
-
-    devices = df["ip"].tolist()
-
-    # auto-create network
-    for i in range(len(devices)-1):
-        G.add_edge(devices[i], devices[i+1])
-
-    if source is None:
-        source = random.choice(devices)
-
-    infected = [source]
-    print(f"\n🚨 Attack Started at {source}")
-
-    for step in range(steps):
-
-        net = Network(height="800px", width="100%", bgcolor="#0d1326", font_color="white")
-
-        for node in G.nodes:
-            risk = G.nodes[node]["risk"]
-            color = "red" if node in infected else ("orange" if risk > 40 else "lightgreen")
-
-            net.add_node(node,color=color,size=25,title=f"IP:{node}<br>Risk:{risk}")
-
-        # spread to neighbors
-        if len(infected) > 0:
-            current = infected[-1]
-            neighbors = list(G.neighbors(current))
-            if neighbors:
-                nxt = random.choice(neighbors)
-                if nxt not in infected:
-                    infected.append(nxt)
-
-        # draw edges
-        for u,v in G.edges:
-            net.add_edge(u,v,color="#78aaff")
-
-        file = f"attack_step_{step+1}.html"
-        net.write_html(file)
-        webbrowser.open(file)
-        print(f"🟥 Attack moved → {infected[-1]}")
-
-        time.sleep(1)
-
-    print("\nAttack Path:", " → ".join(infected))
+import argparse
+import time
+import webbrowser
+import numpy as np
+import data_store
+import epidemic_engine
+
+DEVICES_FILE = "training_data.csv"
+EXPORT_FILE = "attack_simulation.html"
+MAX_EXPORT_NODES = 2000       # pyvis slows to a crawl beyond a few thousand nodes
+
+# ------------------ Network ------------------
+def load_network(csv=DEVICES_FILE, edges=None):
+    """Device network: the edge list (e.g. synthetic_edges.parquet) when given, else devices chained in row order."""
+    df = data_store.load(csv, columns=["ip", "risk_score"])
+    if edges is None:
+        return epidemic_engine.chain(df["ip"], df["risk_score"])
+    e = data_store.load(edges)
+    return epidemic_engine.from_edges(e["src"], e["dst"], e["trans_prob"] if "trans_prob" in e else None,
+                                      dict(zip(df["ip"], df["risk_score"])))
+
+# ------------------ Optional Visualization ------------------
+def export_trial(net, outbreak, trial=None, out=EXPORT_FILE, max_nodes=MAX_EXPORT_NODES):
+    """Write one trial as an interactive HTML graph: infected nodes red (labelled with their step),
+    uninfected neighbours orange/green by risk. trial=None picks the median-size trial."""
+    from pyvis.network import Network     # only needed for export
+
+    trial = epidemic_engine.representative_trial(outbreak) if trial is None else trial
+    t = outbreak.infection_time[:, trial]
+    infected = np.flatnonzero(np.isfinite(t))
+    infected = infected[np.argsort(t[infected], kind="stable")][:max_nodes]
+    frontier = np.setdiff1d(net.P[infected].indices, infected)[:max(0, max_nodes - len(infected))]
+    shown = np.concatenate([infected, frontier])
+
+    net_html = Network(height="800px", width="100%", bgcolor="#0d1326", font_color="white")
+    for i in shown:
+        node, risk = str(net.nodes[i]), net.risk[i]
+        if np.isfinite(t[i]):
+            net_html.add_node(node, color="red", size=25, label=f"{node} (t{int(t[i])})",
+                              title=f"IP:{node}<br>Risk:{risk:.0f}<br>Infected at step {int(t[i])}")
+        else:
+            net_html.add_node(node, color="orange" if risk > 40 else "lightgreen", size=20,
+                              title=f"IP:{node}<br>Risk:{risk:.0f}")
+    sub = net.P[shown][:, shown].tocoo()
+    for u, v in zip(sub.row, sub.col):
+        if u < v:
+            net_html.add_edge(str(net.nodes[shown[u]]), str(net.nodes[shown[v]]), color="#78aaff")
+    net_html.write_html(out)
+    return out
+
+# ------------------ Simulation ------------------
+def simulate_attack(source=None, steps=8, csv=DEVICES_FILE, edges=None, trials=1000, recovery=0.0,
+                    quarantine=(), seed=None, workers=None, export=None, open_browser=False):
+    """Headless Monte-Carlo outbreak from `source` (None: a risk-weighted random device per trial).
+    Prints the outbreak size and the most exposed devices; `export` writes the median trial as HTML."""
+    net = load_network(csv, edges)
+    print(f"\n🚨 Simulating {trials} attacks, {steps} steps each, over {len(net.nodes)} nodes "
+          f"({'SIR' if recovery else 'SI'}, from {source or 'random high-risk entry points'})")
+    start = time.time()
+    outbreak = epidemic_engine.simulate(net, source, steps, trials, recovery, quarantine, seed, workers)
+    sizes = epidemic_engine.final_size(outbreak)
+    print(f"🟥 Devices compromised: mean {sizes.mean():.1f}, median {np.median(sizes):.0f}, "
+          f"95th pct {np.percentile(sizes, 95):.0f}  ({time.time() - start:.2f}s)")
+    print("\nMost exposed devices:")
+    print(epidemic_engine.node_summary(outbreak).head(10).to_string(index=False))
+
+    if export:
+        out = export_trial(net, outbreak, out=export)
+        print(f"\n🎨 Median trial written to {out}")
+        if open_browser:
+            webbrowser.open(out)
     print("📌 Simulation Complete")
+    return outbreak
+
+def compare_quarantine(k=5, source=None, steps=8, csv=DEVICES_FILE, edges=None, trials=1000, recovery=0.0,
+                       seed=42, workers=None):
+    net = load_network(csv, edges)
+    table = epidemic_engine.compare_containment(net, epidemic_engine.containment_strategies(net, k), source,
+                                                steps, trials, recovery, seed, workers)
+    print(f"\n🔒 Containment strategies (quarantine {k} nodes), {trials} trials each:")
+    print(table.to_string(index=False))
+    return table
 
 if __name__ == "__main__":
-    simulate_attack()
+    parser = argparse.ArgumentParser(description="Monte-Carlo attack propagation over the device network")
+    parser.add_argument("--source", help="patient-zero IP (default: random, weighted by risk)")
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--recovery", type=float, default=0.0, help="per-step recovery chance (0 = SI, >0 = SIR)")
+    parser.add_argument("--csv", default=DEVICES_FILE)
+    parser.add_argument("--edges", help="edge list (src, dst[, trans_prob]), e.g. synthetic_edges.parquet")
+    parser.add_argument("--compare", type=int, metavar="K", help="compare quarantine strategies of K nodes")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--export", nargs="?", const=EXPORT_FILE, help="write the median trial as HTML")
+    parser.add_argument("--open", action="store_true", help="open the exported HTML in a browser")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_quarantine(args.compare, args.source, args.steps, args.csv, args.edges, args.trials,
+                           args.recovery, 42 if args.seed is None else args.seed, args.workers)
+    else:
+        simulate_attack(args.source, args.steps, args.csv, args.edges, args.trials, args.recovery,
+                        seed=args.seed, workers=args.workers, export=args.export, open_browser=args.open)
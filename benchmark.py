@@ -0,0 +1,336 @@
+# ================== E-RAKSHA BENCHMARK SUITE ==================
+# Times every engine on generated inputs of growing size, records wall time and peak
+# memory to a JSON history and flags regressions against a stored baseline.
+#
+#   python benchmark.py                       # 1e3..1e6 devices
+#   python benchmark.py --sizes 1000 10000    # quicker run
+#   python benchmark.py --save-baseline       # accept this run as the new baseline
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+with contextlib.redirect_stdout(io.StringIO()):   # engines print banners on import
+    import anomaly_detection
+    import centrality
+    import data_store
+    import dataset_cache
+    import dijkstra_engine
+    import game_theory_engine
+    import generate_synthetic
+    import honeypot
+    import risk_engine
+    try:
+        import network_visualizer
+    except ImportError:          # pyvis missing: centrality case is skipped
+        network_visualizer = None
+    try:
+        import scanner
+    except ImportError:          # scapy missing: scanner case is skipped
+        scanner = None
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+HISTORY_FILE = "benchmark_history.json"
+BASELINE_FILE = "benchmark_baseline.json"
+TOLERANCE = 0.25            # flag runs more than 25% slower / bigger than the baseline
+MIN_SECONDS_DELTA = 0.005   # ...unless the difference is below timer and allocator noise
+MIN_MB_DELTA = 1.0
+HONEYPOT_REQUESTS = 2000
+HONEYPOT_CLIENTS = 32
+ATTACK_CATS = ["Normal", "Exploits", "DoS", "Recon", "Fuzzers"]
+ATTACK_WEIGHTS = [0.6, 0.15, 0.1, 0.1, 0.05]
+
+# ---------------- Input Generation ----------------
+def make_inputs(n, seed=42):
+    """Write the files the engines read by default (training_dataset.csv, honeypot_logs.csv)
+    into the current directory and return the device frame."""
+    rng = np.random.default_rng([seed, n])
+    devices = generate_synthetic.device_chunk(rng, 0, n)
+    df = pd.DataFrame({
+        "ip": devices["ip"],
+        "ports_count": devices["ports_count"],
+        "risk_score": devices["risk_score"],
+        "risk_label": devices["status"].str.replace(" Risk", "", regex=False),
+        "vendor": devices["vendor"],
+        "attack_cat": rng.choice(ATTACK_CATS, size=n, p=ATTACK_WEIGHTS),
+        "ports": devices["ports"],
+    })
+    df.drop(columns="ports").to_csv("training_dataset.csv", index=False)
+
+    # Honeypot hits: Zipf-skewed, so a handful of attackers dominate like in a real log
+    attackers = devices["ip"].to_numpy()[:max(n // 10, 1)]
+    hits = attackers[np.minimum(rng.zipf(1.5, n) - 1, len(attackers) - 1)]
+    seconds = np.sort(rng.integers(0, 86_400, n)).astype("timedelta64[s]")
+    pd.DataFrame({"ip": hits, "time": (np.datetime64("2025-01-01T00:00:00") + seconds).astype(str)}) \
+        .to_csv("honeypot_logs.csv", index=False)
+    return df
+
+# ---------------- Cases ----------------
+# Each case: (name, largest n it runs at or None, setup(ctx) -> args, fn(*args), ops per call)
+# setup runs before every timed call and is not timed; ops / seconds is reported as per_s.
+def _graph(ctx):
+    G, _ = dijkstra_engine.load_graph()
+    return G
+
+def _chain_ends(ctx):
+    G = _graph(ctx)
+    G.graph.pop("path_trees", None)
+    return ctx["df"]["ip"].iloc[0], ctx["df"]["ip"].iloc[-1]
+
+def _spread_setup(ctx):
+    _graph(ctx).graph.pop("transition", None)
+    return _chain_ends(ctx)
+
+def _quarantine_setup(ctx):
+    G = _graph(ctx)
+    G.graph.pop("pagerank", None)
+    G.graph.pop("pagerank_version", None)
+    return ()
+
+def _port_lists(ctx):
+    ports = ctx["df"]["ports"].str.findall(r"\d+").map(lambda ps: [int(p) for p in ps])
+    return ports.tolist(), ctx["df"]["vendor"].tolist()
+
+def _calculate_risk_loop(ports, vendors):
+    return [risk_engine.calculate_risk(p, v) for p, v in zip(ports, vendors)]
+
+def _score_device_loop(ports, vendors):
+    return [scanner.score_device("10.0.0.1", "00:00:00:00:00:00", v, p) for p, v in zip(ports, vendors)]
+
+def _honeypot_setup(ctx):
+    handle = honeypot.start_honeypot(ports=(0,), workers=HONEYPOT_CLIENTS,
+                                     log_file="bench_attacker_log.txt", host="127.0.0.1")
+    return handle, handle["servers"][0].server_address[1]
+
+def _honeypot_hammer(handle, port):
+    url = f"http://127.0.0.1:{port}/login"
+
+    def hit(_):
+        with urllib.request.urlopen(url, timeout=5) as response:
+            response.read()
+    try:
+        with ThreadPoolExecutor(HONEYPOT_CLIENTS) as pool:
+            list(pool.map(hit, range(HONEYPOT_REQUESTS)))
+    finally:
+        honeypot.stop_honeypot(handle)   # includes flushing the batched log
+
+def _game(ctx):
+    np.random.seed(42)
+    return ()
+
+def _network_setup(ctx):
+    return (network_visualizer.build_network(ctx["df"]),)
+
+NEW_DEVICE = {"ip": "10.255.255.254", "ports_count": 3, "risk_score": 95, "risk_label": "High",
+              "vendor": "Hikvision", "attack_cat": "Exploits"}
+
+def _incremental_updates(G):
+    """Add a device on the default link (the last device), rescore it, remove it again
+    (correctness is covered by tests/test_dijkstra_engine.py)."""
+    dijkstra_engine.add_device(G, NEW_DEVICE)
+    dijkstra_engine.rescore_device(G, NEW_DEVICE["ip"], risk_score=10, risk_label="Low")
+    dijkstra_engine.remove_device(G, NEW_DEVICE["ip"])
+
+def _csv_roundtrip(ctx):
+    """Write the devices chunk by chunk through a CSV ChunkWriter and read them back
+    (correctness is covered by tests/test_data_store.py)."""
+    frame = ctx["df"].drop(columns="ports")
+    with data_store.ChunkWriter("bench_chunks.csv") as writer:
+        for start in range(0, len(frame), 250_000):
+            writer.write(frame.iloc[start:start + 250_000])
+    data_store.load("bench_chunks.csv")
+
+SCALED_CASES = [
+    ("dijkstra_engine.load_graph", None, lambda ctx: (), lambda: dijkstra_engine.load_graph(use_cache=False), 1),
+    ("dijkstra_engine.find_safest_path", None, _chain_ends, dijkstra_engine.find_safest_path, 1),
+    ("dijkstra_engine.attack_spread_probability", None, _spread_setup, dijkstra_engine.attack_spread_probability, 1),
+    ("dijkstra_engine.suggest_quarantine", None, _quarantine_setup, dijkstra_engine.suggest_quarantine, 1),
+    ("dijkstra_engine.incremental_updates", None, lambda ctx: (_graph(ctx),), _incremental_updates, 3),
+    ("network_visualizer.centrality", None, _network_setup,
+     lambda G: (centrality.betweenness(G, use_cache=False), centrality.pagerank(G, use_cache=False)), 1),
+    ("anomaly_detection.detect_anomalies", None, lambda ctx: (), anomaly_detection.detect_anomalies, 1),
+    ("risk_engine.calculate_risk", None, _port_lists, _calculate_risk_loop, "n"),
+    ("scanner.score_device", None, _port_lists, _score_device_loop, "n"),
+    ("risk_engine.score_frame", None, lambda ctx: (ctx["df"],), risk_engine.score_frame, "n"),
+    ("data_store.csv_chunk_writer", None, lambda ctx: (ctx,), _csv_roundtrip, "n"),
+]
+
+FIXED_CASES = [
+    ("game_theory_engine.compute_nash_equilibrium", None, _game, game_theory_engine.compute_nash_equilibrium, 1),
+    ("game_theory_engine.run_game", None, _game, game_theory_engine.run_game, 1),
+    ("game_theory_engine.simulate", None, lambda ctx: game_theory_engine.compute_nash_equilibrium()[:2],
+     lambda d, a: game_theory_engine.simulate(d, a, rounds=1_000_000, trials=10_000, seed=42), 1),
+    ("honeypot.throughput", None, _honeypot_setup, _honeypot_hammer, HONEYPOT_REQUESTS),
+]
+
+# ---------------- Measurement ----------------
+def measure(setup, fn, ctx, repeat=1, memory=True):
+    """Best wall time over `repeat` calls, then one extra call under tracemalloc for the peak
+    (tracing slows Python code several times over, so it never overlaps the timed calls)."""
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            args = setup(ctx)
+            gc.collect()
+            start = time.perf_counter()
+            fn(*args)
+            best = min(best, time.perf_counter() - start)
+        peak = None
+        if memory:
+            args = setup(ctx)
+            gc.collect()
+            tracemalloc.start()
+            try:
+                fn(*args)
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+            finally:
+                tracemalloc.stop()
+    return best, peak
+
+def run_case(results, case, n, ctx, repeat, memory, caps):
+    name, max_n, setup, fn, ops = case
+    if name == "network_visualizer.centrality" and network_visualizer is None:
+        print(f"   {name:<45} skipped (pyvis not installed)")
+        return
+    if name == "scanner.score_device" and scanner is None:
+        print(f"   {name:<45} skipped (scapy not installed)")
+        return
+    if caps and max_n is not None and n is not None and n > max_n:
+        print(f"   {name:<45} skipped above n={max_n:,} (use --no-caps)")
+        return
+    seconds, peak = measure(setup, fn, ctx, repeat, memory)
+    ops = n if ops == "n" else ops
+    results.setdefault(name, {})[str(n or "-")] = {
+        "seconds": round(seconds, 6),
+        "peak_mb": None if peak is None else round(peak, 3),
+        "per_s": round(ops / seconds, 1) if seconds > 0 else None,
+    }
+    mem = "" if peak is None else f"{peak:10.1f} MB"
+    print(f"   {name:<45} {seconds:10.4f}s {mem}")
+
+def run(sizes=SIZES, repeat=1, memory=True, caps=True, keep=False):
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="eraksha_bench_")
+    home = os.getcwd()
+    try:
+        os.chdir(workdir)
+        print("\n⏱ Size-independent engines")
+        for case in FIXED_CASES:
+            run_case(results, case, None, {}, repeat, memory, caps)
+        for n in sizes:
+            print(f"\n⏱ n = {n:,} devices")
+            os.makedirs(str(n), exist_ok=True)
+            os.chdir(str(n))
+            ctx = {"n": n, "df": make_inputs(n)}
+            for case in SCALED_CASES:
+                run_case(results, case, n, ctx, repeat, memory, caps)
+            dataset_cache.invalidate()      # release this size's cached graph before the next one
+            os.chdir(workdir)
+    finally:
+        os.chdir(home)
+        if keep:
+            print(f"\n📁 Inputs kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+# ---------------- History & Regressions ----------------
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+def find_regressions(results, baseline, tolerance=TOLERANCE):
+    """(case, n, metric, baseline value, current value) for every metric worse than the baseline allows."""
+    regressions = []
+    for name, by_n in results.items():
+        for n, current in by_n.items():
+            base = baseline.get(name, {}).get(n)
+            if not base:
+                continue
+            for metric, floor in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_MB_DELTA)):
+                old, new = base.get(metric), current.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > floor:
+                    regressions.append((name, n, metric, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every E-Raksha engine across dataset sizes")
+    parser.add_argument("--sizes", type=lambda s: int(float(s)), nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=1, help="timed calls per case (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--no-caps", action="store_true", help="run quadratic engines at every size")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--keep", action="store_true", help="keep the generated inputs")
+    args = parser.parse_args(argv)
+
+    print("🚀 E-Raksha benchmark suite")
+    results = run(args.sizes, args.repeat, not args.no_memory, not args.no_caps, args.keep)
+
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        "sizes": args.sizes,
+        "results": results,
+    }
+    history = _load_json(args.history, [])
+    history.append(entry)
+    _save_json(args.history, history)
+    print(f"\n📝 Run appended to {args.history} ({len(history)} runs)")
+
+    if args.save_baseline:
+        _save_json(args.baseline, entry)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = _load_json(args.baseline, None)
+    if baseline is None:
+        print(f"ℹ No baseline at {args.baseline} – rerun with --save-baseline to create one")
+        return 0
+    regressions = find_regressions(results, baseline["results"], args.tolerance)
+    if not regressions:
+        print(f"✅ No regressions against baseline {baseline.get('commit') or baseline['timestamp']}")
+        return 0
+    print(f"\n🔴 {len(regressions)} regression(s) against baseline {baseline.get('commit') or baseline['timestamp']}:")
+    for name, n, metric, old, new in regressions:
+        print(f"   {name:<45} n={n:>9}  {metric}: {old} -> {new} ({new / old - 1:+.0%})")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
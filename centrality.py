@@ -0,0 +1,260 @@
+import hashlib
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from scipy.sparse import csgraph
+import dataset_cache
+
+# scores[i] belongs to nodes[i]; with probability >= 1 - delta every score is within epsilon of the exact
+# normalised betweenness (epsilon = 0 when every node was a pivot)
+Betweenness = namedtuple("Betweenness", "nodes scores epsilon delta pivots")
+
+EPSILON = 0.1             # default additive error bound on normalised betweenness
+DELTA = 0.1               # ... holding with probability 1 - DELTA for all nodes at once
+BATCH_CELLS = 4_000_000   # nodes x pivots of BFS state per batch (about 50 bytes each)
+LEVELS_MAX_DEPTH = 64     # deeper graphs (chains, long paths) use the frontier kernel
+PAGERANK_TOL = 1e-6
+
+# ------------------ Graph Identity ------------------
+def to_csr(G, weight=None):
+    """(nodes, CSR adjacency) of G. Undirected graphs come out symmetric."""
+    nodes = list(G.nodes())
+    return nodes, sparse.csr_matrix(nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight, format="csr"))
+
+def graph_fingerprint(nodes, A, *extra):
+    """Content hash of a graph: node labels plus the CSR structure and weights."""
+    h = hashlib.sha1()
+    h.update("\x1f".join(map(str, nodes)).encode())
+    for part in (A.indptr, A.indices, A.data):
+        h.update(np.ascontiguousarray(part).tobytes())
+    h.update("|".join(map(str, extra)).encode())
+    return h.hexdigest()
+
+def _cache_key(G, weight, *extra):
+    """(key, (nodes, A) or None). An unedited graph from dijkstra_engine.load_graph is identified by its
+    dataset fingerprint without building and hashing the adjacency; other graphs are hashed by content.
+    Edited graphs (version > 0) get no key: every edit is a new content that would never be asked for
+    again, so caching them only grows the cache (graph_pagerank keeps its own warm-start instead)."""
+    if G.graph.get("version"):
+        return None, None
+    if G.graph.get("fingerprint"):
+        raw = "|".join(map(str, [G.graph["fingerprint"], weight, *extra]))
+        return hashlib.sha1(raw.encode()).hexdigest(), None
+    nodes, A = to_csr(G, weight)
+    return graph_fingerprint(nodes, A, weight, *extra), (nodes, A)
+
+# ------------------ Approximate Betweenness (sampled-pivot Brandes) ------------------
+def pivots_needed(n, epsilon=EPSILON, delta=DELTA):
+    """Pivots for a Hoeffding + union bound: each pivot's estimate of a node's normalised betweenness
+    lies in [0, n/(n-1)], so k pivots keep all n estimates within epsilon w.p. 1 - delta."""
+    if n < 3:
+        return n
+    span = n / (n - 1)
+    return math.ceil(span ** 2 * math.log(2 * n / delta) / (2 * epsilon ** 2))
+
+def error_bound(n, k, delta=DELTA):
+    """epsilon achieved by k pivots (0 when all n nodes are pivots: the result is exact)."""
+    if k >= n or n < 3:
+        return 0.0
+    return n / (n - 1) * math.sqrt(math.log(2 * n / delta) / (2 * k))
+
+def _neighbours(indptr, indices, nodes):
+    """For every entry of `nodes`, its adjacency list flattened: (position in `nodes`, neighbour)."""
+    counts = indptr[nodes + 1] - indptr[nodes]
+    owner = np.repeat(np.arange(len(nodes)), counts)
+    offset = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, indices[np.repeat(indptr[nodes], counts) + offset]
+
+def _brandes_levels(A, AT, sources):
+    """Dependency sums of a batch of BFS pivots with (nodes, pivots) state: each BFS level is one
+    sparse x dense product forward and one backward. Fast when the graph is shallow (few levels)."""
+    n, B = A.shape[0], len(sources)
+    pivots = np.arange(B)
+    sigma = np.zeros((n, B))
+    sigma[sources, pivots] = 1
+    dist = np.full((n, B), -1, dtype=np.int32)
+    dist[sources, pivots] = 0
+    frontier, depth = sigma.copy(), 0
+    while True:
+        reached = AT @ frontier                   # shortest-path counts flowing into the next level
+        reached[dist >= 0] = 0
+        new = reached > 0
+        if not new.any():
+            break
+        depth += 1
+        dist[new] = depth
+        sigma[new] = reached[new]
+        frontier = reached
+
+    delta = np.zeros((n, B))
+    for level in range(depth, 0, -1):             # deepest first, pushing dependency to parents
+        child = dist == level
+        coef = np.zeros((n, B))
+        coef[child] = (1 + delta[child]) / sigma[child]
+        pushed = A @ coef
+        parent = dist == level - 1
+        delta[parent] += sigma[parent] * pushed[parent]
+    delta[sources, pivots] = 0                    # a pivot's own dependency does not count
+    return delta.sum(axis=1)
+
+def _brandes_frontier(A, AT, sources):
+    """Same result as _brandes_levels with flat (node * B + pivot) state and only frontier edges touched:
+    O(B * m) however deep the graph, so chains and long paths stay tractable."""
+    indptr, indices = A.indptr.astype(np.int64), A.indices.astype(np.int64)
+    back_ptr, back_idx = AT.indptr.astype(np.int64), AT.indices.astype(np.int64)
+    n, B = len(indptr) - 1, len(sources)
+    dist = np.full(n * B, -1, dtype=np.int32)
+    sigma = np.zeros(n * B)
+    frontier = np.asarray(sources, dtype=np.int64) * B + np.arange(B)
+    dist[frontier] = 0
+    sigma[frontier] = 1
+    levels, d = [frontier], 0
+    while len(frontier):
+        owner, nbr = _neighbours(indptr, indices, frontier // B)
+        target = nbr * B + frontier[owner] % B
+        new = target[dist[target] == -1]
+        dist[new] = d + 1
+        on_path = dist[target] == d + 1
+        np.add.at(sigma, target[on_path], sigma[frontier[owner[on_path]]])
+        frontier = np.unique(new)
+        if len(frontier):
+            levels.append(frontier)
+        d += 1
+
+    delta = np.zeros(n * B)
+    for level in reversed(levels[1:]):
+        owner, nbr = _neighbours(back_ptr, back_idx, level // B)
+        parent = nbr * B + level[owner] % B
+        up = dist[parent] == dist[level[owner]] - 1
+        child = level[owner[up]]
+        parent = parent[up]
+        np.add.at(delta, parent, sigma[parent] / sigma[child] * (1 + delta[child]))
+    delta[levels[0]] = 0
+    return delta.reshape(n, B).sum(axis=1)
+
+def _forest_betweenness(A):
+    """Exact pair counts for a forest in O(n): removing v splits its tree into pieces of sizes s_i,
+    and v lies on the one path between every two nodes in different pieces."""
+    n = A.shape[0]
+    n_trees, tree = csgraph.connected_components(A, directed=False)
+    tree_size = np.bincount(tree)
+    size = np.ones(n)
+    square_sum = np.zeros(n)                  # sum of squared child subtree sizes
+    parent = np.full(n, -1)
+    for root in np.unique(tree, return_index=True)[1]:
+        order, pred = csgraph.breadth_first_order(A, root, directed=False)
+        parent[order[1:]] = pred[order[1:]]
+        for v in order[:0:-1]:                # leaves first
+            size[parent[v]] += size[v]
+            square_sum[parent[v]] += size[v] ** 2
+    rest = tree_size[tree] - size             # the piece on the parent's side
+    return ((tree_size[tree] - 1) ** 2 - square_sum - rest ** 2) / 2
+
+def _depth(A, source):
+    """Eccentricity of one node, a cheap stand-in for how many BFS levels a batch will take."""
+    dist = csgraph.shortest_path(A, unweighted=True, indices=int(source))
+    return int(dist[np.isfinite(dist)].max())
+
+_worker_graph = None
+
+def _init_worker(A, AT, kernel):
+    global _worker_graph
+    _worker_graph = (A, AT, kernel)
+
+def _pool_batch(sources):
+    A, AT, kernel = _worker_graph
+    return kernel(A, AT, sources)
+
+def approximate_betweenness(A, epsilon=EPSILON, delta=DELTA, max_pivots=None, seed=0, workers=None):
+    """Normalised (unweighted) betweenness of CSR adjacency A from a uniform sample of pivots.
+    Returns (scores, epsilon actually guaranteed, pivots used)."""
+    n = A.shape[0]
+    if n < 3:
+        return np.zeros(n), 0.0, n
+    k = min(n, pivots_needed(n, epsilon, delta), max_pivots or n)
+    pivots = np.arange(n) if k >= n else np.random.default_rng(seed).choice(n, k, replace=False)
+    A = sparse.csr_matrix(A, dtype=float, copy=True)
+    A.setdiag(0)
+    A.eliminate_zeros()
+    A.data[:] = 1
+    AT = A if (A != A.T).nnz == 0 else sparse.csr_matrix(A.T)
+    if AT is A and A.nnz // 2 == n - csgraph.connected_components(A, directed=False)[0]:
+        return _forest_betweenness(A) * 2 / ((n - 1) * (n - 2)), 0.0, n      # trees and chains: exact
+    kernel = _brandes_levels if _depth(A, pivots[0]) <= LEVELS_MAX_DEPTH else _brandes_frontier
+    per = max(1, min(k, BATCH_CELLS // n))
+    batches = [pivots[i:i + per] for i in range(0, k, per)]
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(A, AT, kernel)) as pool:
+            total = sum(pool.map(_pool_batch, batches))
+    else:
+        total = sum(kernel(A, AT, b) for b in batches)
+    scores = total * (n / k) / ((n - 1) * (n - 2))
+    return scores, error_bound(n, k, delta), k
+
+def betweenness(G, epsilon=EPSILON, delta=DELTA, max_pivots=None, seed=0, workers=None, use_cache=True):
+    """Approximate betweenness of NetworkX graph G, cached per graph content and settings."""
+    key, csr = _cache_key(G, None, "betweenness", epsilon, delta, max_pivots, seed) if use_cache else (None, None)
+    if key:
+        cached = dataset_cache.get("centrality", key)
+        if cached is not None:
+            return cached
+    nodes, A = csr or to_csr(G)
+    scores, eps, k = approximate_betweenness(A, epsilon, delta, max_pivots, seed, workers)
+    result = Betweenness(nodes, scores, eps, delta, k)
+    if key:
+        dataset_cache.put("centrality", key, result)
+    return result
+
+# ------------------ Sparse PageRank ------------------
+def pagerank_vector(A, alpha=0.85, tol=PAGERANK_TOL, max_iter=100, x0=None):
+    """Power iteration on CSR adjacency A (row = source). Dangling nodes spread uniformly, and
+    convergence uses networkx's test (L1 change < n * tol), so results agree with nx.pagerank.
+    x0 warm-starts from an earlier vector; a small graph change then needs only a few iterations."""
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+    out = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out == 0
+    P = sparse.csr_matrix(sparse.diags(np.where(dangling, 0, 1 / np.where(dangling, 1, out))) @ A)
+    PT = sparse.csr_matrix(P.T)
+    x = np.full(n, 1.0 / n) if x0 is None else np.asarray(x0, dtype=float) / np.sum(x0)
+    for it in range(1, max_iter + 1):
+        prev = x
+        x = alpha * (PT @ x + prev[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - prev).sum() < n * tol:
+            return x, it
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+def pagerank(G, alpha=0.85, tol=PAGERANK_TOL, weight="weight", nstart=None, max_iter=100, use_cache=True):
+    """PageRank of G as a {node: score} dict, cached per graph content. nstart ({node: score},
+    e.g. the previous result for this graph before an edit) warm-starts the iteration."""
+    key, csr = _cache_key(G, weight, "pagerank", alpha, tol) if use_cache else (None, None)
+    if key:
+        cached = dataset_cache.get("centrality", key)
+        if cached is not None:
+            return cached
+    nodes, A = csr or to_csr(G, weight)
+    x0 = None
+    if nstart:
+        x0 = np.array([nstart.get(v, 0.0) for v in nodes], dtype=float)
+        x0 = x0 if x0.sum() > 0 else None
+    x, _ = pagerank_vector(A, alpha, tol, max_iter, x0)
+    result = dict(zip(nodes, x.tolist()))
+    if key:
+        dataset_cache.put("centrality", key, result)
+    return result
+
+# ------------------ Answers ------------------
+def critical_nodes(G, top=1, **kwargs):
+    """The `top` nodes with the highest (approximate) betweenness, best first."""
+    bc = betweenness(G, **kwargs)
+    order = np.argsort(-bc.scores, kind="stable")[:top]
+    return [bc.nodes[i] for i in order]
+
+def clear_cache():
+    dataset_cache.invalidate("centrality")
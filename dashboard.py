@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import pickle
 from datetime import datetime
 import os
+import inventory_store
+import dashboard_data
 
 st.set_page_config(page_title="AI IoT Security Monitoring", layout="wide")
 
 st.markdown("<h1 style='text-align:center;color:cyan;'>🔐 AI Powered IoT Security Dashboard</h1>", unsafe_allow_html=True)
 
-# Load model
-model = pickle.load(open("risk_model.pkl","rb"))
-vendor_encoder = pickle.load(open("vendor_encoder.pkl","rb"))
+# Load model (cached across reruns and sessions)
+model, vendor_encoder = dashboard_data.load_models()
 
 # ================== Sidebar ==================
 st.sidebar.title("Navigation")
@@ -21,25 +21,45 @@ page = st.sidebar.radio("Select", ["Network Scanner", "Honeypot Monitor", "Anoma
 if page=="Network Scanner":
     st.subheader("📡 Live Device Risk Analysis")
 
+    # Button state is kept so paging through results doesn't hide them again
     if st.button("🔍 Scan Network Now"):
-        try:
-            df = pd.read_csv("training_data.csv")
-            st.success("Scan Loaded Successfully")
-        except:
-            st.warning("No training data found")
-
-        st.write(df)
-
-        fig = px.pie(df, names='risk_label', title="Risk Distribution", color='risk_label')
-        st.plotly_chart(fig, use_container_width=True)
+        st.session_state["scan_loaded"] = True
+
+    if st.session_state.get("scan_loaded"):
+        df = None
+        if os.path.exists(inventory_store.DB_FILE):
+            # Rows appear here as scanner.py streams them, even mid-sweep
+            df = inventory_store.read_results()
+            st.success(f"Latest scan {df['scan_id'].iloc[0] if len(df) else ''}: {len(df)} devices so far")
+        if df is None or df.empty:
+            df = dashboard_data.load_frame("training_data.csv")
+            if df is not None:
+                st.success("Scan Loaded Successfully")
+            else:
+                st.warning("No training data found")
+
+        if df is not None:
+            dashboard_data.paginate(df, key="scan_page")
+
+            counts = df['risk_label'].value_counts()
+            fig = px.pie(names=counts.index, values=counts.values, title="Risk Distribution", color=counts.index)
+            st.plotly_chart(fig, use_container_width=True)
 
 # ================== 2. Honeypot ==================
 elif page=="Honeypot Monitor":
     st.subheader("🪤 Honeypot Attack Logger")
 
     if os.path.exists("honeypot_logs.csv"):
-        logs = pd.read_csv("honeypot_logs.csv")
-        st.write(logs)
+        tail = dashboard_data.log_tail("honeypot_logs.csv")
+        logs = tail.read()   # only rows appended since the last rerun are parsed
+        st.metric("Total hits", tail.rows)
+        if tail.rows > len(logs):
+            st.caption(f"Showing the latest {len(logs):,} hits")
+        dashboard_data.paginate(logs.iloc[::-1], key="honeypot_page")
+        if len(tail.counts):
+            top = tail.counts.nlargest(20)
+            st.plotly_chart(px.bar(x=top.index, y=top.values, labels={"x": "IP", "y": "Hits"},
+                                   title="Top Attacking IPs"), use_container_width=True)
     else:
         st.warning("No attacks detected yet. Honeypot waiting...")
 
@@ -47,10 +67,10 @@ elif page=="Honeypot Monitor":
 elif page=="Anomaly Analysis":
     st.subheader("📊 Anomaly Detection Results")
 
-    if os.path.exists("anomaly_report.csv"):
-        rep = pd.read_csv("anomaly_report.csv")
-        st.dataframe(rep)
-        fig = px.bar(rep, x="IP", y="Hits", title="Suspicious IP Activity")
+    rep = dashboard_data.load_frame("anomaly_report.csv")
+    if rep is not None:
+        dashboard_data.paginate(rep, key="anomaly_page")
+        fig = px.bar(rep.nlargest(50, "Hits"), x="IP", y="Hits", title="Suspicious IP Activity")
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("Run anomaly_detection.py first!")
@@ -59,10 +79,37 @@ elif page=="Anomaly Analysis":
 elif page=="Game Theory":
     st.subheader("🎮 Defender vs Attacker Battle Simulation")
 
+    c1, c2 = st.columns(2)
+    rounds = c1.select_slider("Rounds per game", options=[20, 100, 1_000, 10_000, 100_000, 1_000_000], value=1_000)
+    trials = c2.select_slider("Independent games", options=[100, 1_000, 10_000, 100_000], value=10_000)
+
     if st.button("Run Simulation"):
-        import game_theory
-        st.success("Simulation Completed — See Terminal Output!")
-        st.info("Visual integration coming next 🔥")
+        import game_theory_engine
+        def_probs, att_probs, value = game_theory_engine.evolve_nash()
+        stats = game_theory_engine.simulate(def_probs, att_probs, rounds, trials)
+        summary = game_theory_engine.summarize(stats)
+        st.success(f"Simulated {trials:,} games x {rounds:,} rounds (Evolved Nash Value: {value:.2f})")
+
+        m1, m2, m3 = st.columns(3)
+        mean, lo, hi = summary["net_per_round"]
+        m1.metric("Net score per round", f"{mean:.3f}", f"95% CI {lo:.3f} – {hi:.3f}", delta_color="off")
+        mean, lo, hi = summary["defender_win_rate"]
+        m2.metric("Defender win rate", f"{mean:.1%}", f"95% CI {lo:.1%} – {hi:.1%}", delta_color="off")
+        m3.metric("Attacker damage per game", f"{summary['attacker'][0]:,.1f}")
+
+        st.plotly_chart(px.histogram(x=stats.net, nbins=60, title="Net Score per Game (Defender − Attacker)",
+                                     labels={"x": "Net score"}), use_container_width=True)
+        mixes = pd.DataFrame({
+            "strategy": game_theory_engine.defense_strategies + game_theory_engine.attack_strategies,
+            "probability": list(def_probs) + list(att_probs),
+            "side": ["Defender"] * len(def_probs) + ["Attacker"] * len(att_probs),
+        })
+        st.plotly_chart(px.bar(mixes, x="strategy", y="probability", color="side", title="Strategy Mix"),
+                        use_container_width=True)
+        st.plotly_chart(px.imshow(game_theory_engine.payoff, x=game_theory_engine.defense_strategies,
+                                  y=game_theory_engine.attack_strategies, color_continuous_scale="RdYlGn",
+                                  text_auto=True, title="Payoff Matrix (Positive = Defender Advantage)"),
+                        use_container_width=True)
 
 # ================== 5. Reporting & Helpline ==================
 elif page=="Report & Helpline":
@@ -0,0 +1,124 @@
+import io
+import os
+import pickle
+import threading
+import pandas as pd
+import streamlit as st
+import data_store
+
+# ================== Models (loaded once per server process) ==================
+@st.cache_resource
+def load_models(model_path="risk_model.pkl", encoder_path="vendor_encoder.pkl"):
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with open(encoder_path, "rb") as f:
+        vendor_encoder = pickle.load(f)
+    return model, vendor_encoder
+
+# ================== Whole-file Frames (re-read only when the file changes) ==================
+@st.cache_data(max_entries=16, show_spinner=False)
+def _read_frame(path, mtime_ns, columns):
+    return data_store.load(path, columns=list(columns) if columns else None)
+
+def load_frame(path, columns=None):
+    """Dataset (Parquet twin or CSV) as a DataFrame, cached until the file's mtime changes. None if missing."""
+    try:
+        path = data_store.resolve(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _read_frame(path, mtime_ns, tuple(columns) if columns else None)
+
+# ================== Append-only Logs (only new bytes are parsed) ==================
+WINDOW_ROWS = 100_000      # most recent log rows kept in memory; hit counts cover the whole log
+
+class LogTail:
+    """Tails a growing CSV and parses only bytes appended since the last read.
+    New rows are kept as a list of chunks and joined only when `frame` is used, at most the last
+    `max_rows` of them, so each refresh costs the new rows plus a bounded window, not the whole log.
+    `rows` counts every row seen; per-value hit counts of `count_column` are maintained as rows arrive."""
+
+    def __init__(self, path, names=None, count_column="ip", max_rows=WINDOW_ROWS):
+        self.path = path
+        self.names = names
+        self.count_column = count_column
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.header = self.names
+        self.rows = 0
+        self._chunks = []
+        self._kept = 0
+        self._frame = None
+        self.counts = pd.Series(dtype="int64")
+
+    def _append(self, new):
+        self._chunks.append(new)
+        self._kept += len(new)
+        self.rows += len(new)
+        # Whole chunks that fall out of the window are dropped without copying anything
+        while self.max_rows and len(self._chunks) > 1 and self._kept - len(self._chunks[0]) >= self.max_rows:
+            self._kept -= len(self._chunks.pop(0))
+        self._frame = None
+
+    @property
+    def frame(self):
+        """The most recent rows (up to max_rows) as one DataFrame, joined on first use after new data."""
+        with self._lock:
+            if self._frame is None:
+                if not self._chunks:
+                    self._frame = pd.DataFrame(columns=self.header or [])
+                else:
+                    joined = self._chunks[0] if len(self._chunks) == 1 else pd.concat(self._chunks, ignore_index=True)
+                    if self.max_rows and len(joined) > self.max_rows:
+                        joined = joined.iloc[-self.max_rows:].reset_index(drop=True)
+                    self._chunks, self._kept = [joined], len(joined)   # next join starts from one piece
+                    self._frame = joined
+            return self._frame
+
+    def read(self):
+        with self._lock:
+            self._read_new()
+        return self.frame
+
+    def _read_new(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.offset:
+            self._reset()         # truncated or rotated
+        if size == self.offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return
+        text = data[:end].decode("utf-8", "replace")
+        self.offset += end
+        if self.header is None:
+            first, _, text = text.partition("\n")
+            self.header = first.strip().split(",")
+        if text.strip():
+            new = pd.read_csv(io.StringIO(text), header=None, names=self.header)
+            self._append(new)
+            if self.count_column in new:
+                self.counts = self.counts.add(new[self.count_column].value_counts(), fill_value=0).astype("int64")
+
+@st.cache_resource
+def log_tail(path, names=None, count_column="ip"):
+    return LogTail(path, list(names) if names else None, count_column)
+
+# ================== Rendering Helpers ==================
+def paginate(df, key, page_size=100):
+    """Render one page of a large frame instead of shipping every row to the browser."""
+    pages = max((len(df) - 1) // page_size + 1, 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size])
+    st.caption(f"Rows {start + 1}–{min(start + page_size, len(df))} of {len(df)}")
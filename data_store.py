@@ -0,0 +1,316 @@
+# data_store.py
+# Typed columnar storage shared by every pipeline stage.
+# Datasets are saved as Parquet with a declared schema and read back with column projection
+# and memory-mapping; CSV stays supported for import/export and for files dropped in by hand.
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from risk_engine import PORT_BIT
+
+COLUMNAR_EXTENSIONS = (".parquet", ".arrow", ".feather")
+EXPORT_CSV = False        # True: save() also writes a .csv twin for spreadsheets and older tools
+COMPRESSION = "zstd"
+CSV_OPTIONS = pacsv.WriteOptions(quoting_style="needed")
+
+# ---------------- Schemas ----------------
+# Columns listed here are stored with these types; other columns pass through with inferred types.
+_category = pa.dictionary(pa.int32(), pa.string())
+
+DEVICE_SCHEMA = pa.schema([
+    ("ip", pa.string()),
+    ("mac", pa.string()),
+    ("vendor", _category),
+    ("ports_count", pa.int16()),
+    ("ports", pa.list_(pa.int32())),     # "[23, 80]" in CSV
+    ("port_mask", pa.uint64()),          # risk_engine.PORTS bitmask, derived from ports when missing
+    ("risk_score", pa.int32()),
+    ("risk_label", _category),
+    ("status", _category),
+    ("ml_prediction", _category),
+    ("attack_cat", _category),
+    ("subnet", pa.int32()),
+])
+
+# Honeypot hits (honeypot_logs.csv, and attacker_log.txt which honeypot.py writes without a header)
+LOG_SCHEMA = pa.schema([
+    ("ip", pa.string()),
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("time", pa.timestamp("ms")),
+    ("method", _category),
+    ("path", pa.string()),
+    ("user_agent", pa.string()),
+])
+ATTACKER_LOG_COLUMNS = LOG_SCHEMA.names
+
+REPORT_SCHEMA = pa.schema([
+    ("IP", pa.string()),
+    ("Hits", pa.int64()),
+    ("Z-Score", pa.float64()),
+    ("Threat Level", _category),
+])
+
+SCHEMAS = {"devices": DEVICE_SCHEMA, "logs": LOG_SCHEMA, "reports": REPORT_SCHEMA}
+
+# ---------------- Pandas -> Arrow ----------------
+_PORT_BITS = np.zeros(1 << 16, dtype=np.uint64)
+for _port, _bit in PORT_BIT.items():
+    _PORT_BITS[_port] = np.uint64(1) << np.uint64(_bit)
+
+def parse_ports(values):
+    """"[23, 80]" strings (or lists) -> Arrow list<int32>; each distinct string is parsed once."""
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    first = values.dropna()
+    if first.empty or not isinstance(first.iloc[0], str):
+        return pa.array(values, type=pa.list_(pa.int32()), from_pandas=True)
+    codes, uniques = pd.factorize(values)
+    lists = pa.array([[int(p) for p in re.findall(r"\d+", u)] for u in uniques], type=pa.list_(pa.int32()))
+    return lists.take(pa.array(codes, mask=codes < 0))
+
+def ports_mask(ports):
+    """Bitmask column (as in risk_engine.encode_ports) straight from an Arrow list<int> array."""
+    ports = pa.chunked_array([ports]) if isinstance(ports, pa.Array) else ports
+    masks = np.zeros(len(ports), dtype=np.uint64)
+    offset = 0
+    for chunk in ports.chunks:
+        flat = pc.list_flatten(chunk).to_numpy(zero_copy_only=False).astype(np.int64)
+        rows = pc.list_parent_indices(chunk).to_numpy(zero_copy_only=False) + offset
+        ok = (flat >= 0) & (flat < len(_PORT_BITS))
+        np.bitwise_or.at(masks, rows[ok], _PORT_BITS[flat[ok]])
+        offset += len(chunk)
+    return pa.array(masks)
+
+def _column(values, field):
+    """One pandas column as Arrow, in the schema's type when the data fits it, else as inferred."""
+    if field is not None:
+        try:
+            if pa.types.is_list(field.type):
+                return parse_ports(values)
+            if pa.types.is_timestamp(field.type) and not pd.api.types.is_datetime64_any_dtype(values):
+                parsed = pd.to_datetime(values, errors="coerce", format="ISO8601")
+                if parsed.isna().sum() > values.isna().sum():
+                    raise ValueError("unparseable timestamps")
+                values = parsed
+            return pa.array(values, type=field.type, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, ValueError, TypeError, OverflowError):
+            pass
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(values.astype(str), from_pandas=True)   # mixed object column
+
+def to_table(df, kind=None):
+    """DataFrame -> Arrow table typed by SCHEMAS[kind]."""
+    schema = SCHEMAS[kind] if kind else pa.schema([])
+    names, arrays = [], []
+    for col in df.columns:
+        field = schema.field(col) if col in schema.names else None
+        names.append(str(col))
+        arrays.append(_column(df[col], field))
+    table = pa.Table.from_arrays(arrays, names=names)
+    if "ports" in names and "port_mask" in schema.names and "port_mask" not in names \
+            and pa.types.is_list(table.schema.field("ports").type):
+        table = table.append_column(schema.field("port_mask"), ports_mask(table["ports"]))
+    return table
+
+# ---------------- Arrow -> Pandas ----------------
+def _ports_text(column):
+    """list<int> -> "[23, 80]" strings for CSV export."""
+    text = pc.binary_join(pc.cast(column, pa.list_(pa.string())), ", ")
+    return pc.binary_join_element_wise("[", text, "]", "")
+
+def to_frame(table, categorical=False, writable=True):
+    """Arrow table -> DataFrame. Dictionary columns come back as plain strings unless categorical=True.
+    Numeric columns share Arrow's buffers and are read-only; writable=True copies those so callers may edit in place."""
+    if not categorical:
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, pc.cast(table[field.name], field.type.value_type))
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    if writable:
+        for name, column in df.items():
+            values = column.values
+            if isinstance(values, np.ndarray) and not values.flags.writeable:
+                df[name] = values.copy()
+    return df
+
+# ---------------- Locating Datasets ----------------
+def resolve(path):
+    """The file holding dataset `path`. "training_data.csv" (or just "training_data") resolves to
+    training_data.parquet/.arrow/.feather when one exists and is at least as new as the CSV."""
+    stem, ext = os.path.splitext(path)
+    if ext.lower() in COLUMNAR_EXTENSIONS:
+        return path
+    best = None
+    for candidate in (stem + e for e in COLUMNAR_EXTENSIONS):
+        if os.path.exists(candidate) and (best is None or os.path.getmtime(candidate) > os.path.getmtime(best)):
+            best = candidate
+    text = path if ext else stem + ".csv"
+    if os.path.exists(text) and (best is None or os.path.getmtime(text) > os.path.getmtime(best)):
+        return text
+    if best is None:
+        raise FileNotFoundError(path)
+    return best
+
+def _columnar_names(src):
+    if src.endswith(".parquet"):
+        return pq.read_schema(src).names
+    with pa.memory_map(src) as source:
+        return pa.ipc.open_file(source).schema.names
+
+def _projection(columns, available):
+    return None if columns is None else [c for c in columns if c in available]
+
+# ---------------- Reading ----------------
+def load(path, kind=None, columns=None, categorical=False, memory_map=True, writable=True):
+    """Read a dataset as a DataFrame. Only `columns` are read (missing ones are skipped).
+    Parquet/Arrow files are memory-mapped; CSVs are parsed and, given a kind, typed by its schema.
+    Read-only callers can pass writable=False to keep numeric columns zero-copy."""
+    src = resolve(path)
+    if src.lower().endswith(COLUMNAR_EXTENSIONS):
+        cols = _projection(columns, _columnar_names(src))
+        if src.endswith(".parquet"):
+            table = pq.read_table(src, columns=cols, memory_map=memory_map)
+        else:
+            table = feather.read_table(src, columns=cols, memory_map=memory_map)
+        return to_frame(table, categorical, writable)
+    df = pd.read_csv(src, usecols=(lambda c: c in columns) if columns is not None else None, low_memory=False)
+    if kind is None:
+        return df
+    return to_frame(to_table(df, kind), categorical, writable)
+
+def iter_chunks(path, columns=None, chunksize=500_000, kind=None, categorical=False):
+    """Yield DataFrames of at most `chunksize` rows, so files larger than RAM can be streamed."""
+    src = resolve(path)
+    if src.endswith(".parquet"):
+        pf = pq.ParquetFile(src, memory_map=True)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=_projection(columns, pf.schema_arrow.names)):
+            yield to_frame(pa.Table.from_batches([batch]), categorical)
+    elif src.lower().endswith(COLUMNAR_EXTENSIONS):
+        table = feather.read_table(src, columns=_projection(columns, _columnar_names(src)), memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield to_frame(pa.Table.from_batches([batch]), categorical)
+    else:
+        usecols = (lambda c: c in columns) if columns is not None else None
+        for chunk in pd.read_csv(src, usecols=usecols, chunksize=chunksize, low_memory=False):
+            yield chunk if kind is None else to_frame(to_table(chunk, kind), categorical)
+
+# ---------------- Writing ----------------
+def _csv_table(table):
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, pc.cast(table[field.name], field.type.value_type))
+        elif pa.types.is_list(field.type):
+            table = table.set_column(i, field.name, _ports_text(table[field.name]))
+    return table
+
+def columnar_path(path):
+    """Where save() puts dataset `path`: "training_data.csv" -> "training_data.parquet"."""
+    stem, ext = os.path.splitext(path)
+    return path if ext.lower() in COLUMNAR_EXTENSIONS else stem + ".parquet"
+
+def _write(table, path, target):
+    if target.endswith(".parquet"):
+        pq.write_table(table, path, compression=COMPRESSION)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")   # uncompressed: zero-copy mmap reads
+
+def save(df, path, kind=None, csv=None):
+    """Write a DataFrame as typed Parquet (or Arrow IPC for .arrow/.feather paths), atomically.
+    "clean_data.csv" is saved as clean_data.parquet; with csv=True (default EXPORT_CSV) the CSV is written too.
+    Returns the columnar path."""
+    table = df if isinstance(df, pa.Table) else to_table(df, kind)
+    target = columnar_path(path)
+    tmp = target + ".tmp"
+    _write(table, tmp, target)
+    os.replace(tmp, target)
+    if EXPORT_CSV if csv is None else csv:
+        export_csv(table, os.path.splitext(target)[0] + ".csv")
+    return target
+
+def export_csv(data, path):
+    """CSV copy of a table, DataFrame or saved dataset, with ports written as "[23, 80]"."""
+    if isinstance(data, str):
+        data = pq.read_table(data) if data.endswith(".parquet") else feather.read_table(data)
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    tmp = path + ".tmp"
+    pacsv.write_csv(_csv_table(table), tmp, CSV_OPTIONS)
+    os.replace(tmp, path)
+    return path
+
+def align_table(table, schema):
+    """Reorder/cast `table` to `schema`, adding all-null columns it lacks."""
+    columns = [table[f.name].cast(f.type) if f.name in table.schema.names else pa.nulls(len(table), f.type)
+               for f in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+class ChunkWriter:
+    """Append DataFrames (or Arrow tables) chunk by chunk to one Parquet, Arrow or CSV file.
+    The first chunk fixes the schema unless one is given; the file appears under its final name on close()."""
+
+    def __init__(self, path, kind=None, schema=None):
+        self.path = path
+        self.kind = kind
+        self.tmp = path + ".tmp"
+        self.rows = 0
+        self._writer = None
+        self._schema = schema
+
+    def write(self, df):
+        table = df if isinstance(df, pa.Table) else to_table(df, self.kind)
+        if self._writer is None:
+            self._schema = self._schema or table.schema
+            if self.path.endswith(".parquet"):
+                self._writer = pq.ParquetWriter(self.tmp, self._schema, compression=COMPRESSION)
+            elif self.path.lower().endswith(COLUMNAR_EXTENSIONS):
+                self._writer = pa.ipc.new_file(self.tmp, self._schema)
+            else:
+                self._writer = pacsv.CSVWriter(self.tmp, _csv_table(self._schema.empty_table()).schema,
+                                               write_options=CSV_OPTIONS)
+        if not table.schema.equals(self._schema):
+            table = align_table(table, self._schema)
+        self._writer.write_table(_csv_table(table) if isinstance(self._writer, pacsv.CSVWriter) else table)
+        self.rows += len(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.close()
+            os.remove(self.tmp)
+
+# ---------------- CSV Import ----------------
+def convert(path, kind="devices", out=None, chunksize=500_000):
+    """Stream a CSV into typed Parquet without loading it whole. Returns the output path."""
+    out = out or columnar_path(path)
+    with ChunkWriter(out, kind) as writer:
+        for chunk in pd.read_csv(path, chunksize=chunksize, low_memory=False):
+            writer.write(chunk)
+    print(f"✔ {path} -> {out} ({writer.rows} rows)")
+    return out
+
+if __name__ == "__main__":
+    # python data_store.py convert training_dataset.csv [devices|logs|reports]
+    # python data_store.py export training_data.parquet
+    if len(sys.argv) >= 3 and sys.argv[1] == "convert":
+        convert(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "devices")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "export":
+        src = resolve(sys.argv[2])
+        print("✔ Exported", export_csv(src, os.path.splitext(src)[0] + ".csv"))
+    else:
+        print("usage: python data_store.py convert <file.csv> [devices|logs|reports] | export <dataset>")
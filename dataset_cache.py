@@ -0,0 +1,63 @@
+# dataset_cache.py
+import hashlib
+import os
+import pickle
+import shutil
+
+CACHE_DIR = ".eraksha_cache"
+
+_memory = {}
+
+# ------------------ Dataset Fingerprints ------------------
+def fingerprint(path, *extra):
+    """Cheap identity of a dataset file: absolute path, size and mtime, plus any build options."""
+    st = os.stat(path)
+    raw = "|".join([os.path.abspath(path), str(st.st_size), str(st.st_mtime_ns), *map(str, extra)])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def content_hash(path, block_size=1 << 20):
+    """Stronger identity that survives touch/copy; reads the whole file once."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+# ------------------ Two-level Cache (memory, then disk) ------------------
+def _disk_path(namespace, key):
+    return os.path.join(CACHE_DIR, namespace, f"{key}.pkl")
+
+def get(namespace, key):
+    if (namespace, key) in _memory:
+        return _memory[(namespace, key)]
+    try:
+        with open(_disk_path(namespace, key), "rb") as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    _memory[(namespace, key)] = value
+    return value
+
+def put(namespace, key, value, persist=True):
+    _memory[(namespace, key)] = value
+    if persist:
+        path = _disk_path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)   # readers never see a half-written cache file
+    return value
+
+def cache_path(namespace, filename):
+    """Path for caches stored in their own format (e.g. .npy files meant for memory-mapping)."""
+    directory = os.path.join(CACHE_DIR, namespace)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+def invalidate(namespace=None):
+    """Drop cached entries for one namespace (or everything), in memory and on disk."""
+    for k in [k for k in _memory if namespace is None or k[0] == namespace]:
+        del _memory[k]
+    shutil.rmtree(CACHE_DIR if namespace is None else os.path.join(CACHE_DIR, namespace),
+                  ignore_errors=True)
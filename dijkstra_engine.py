@@ -4,26 +4,121 @@ import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 import heapq
+import centrality
+import dataset_cache
+import data_store
+import graph_lod
+import spread_engine
 
 print("🚀 Launching Extraordinary Routing & Hunting Engine...")
 
-def load_graph(mock_if_large=True):
+DATASET = "training_dataset.csv"
+
+def _time_factor():
+    return 1.5 if 0 <= datetime.now().hour < 6 or 18 <= datetime.now().hour < 24 else 1.0
+
+def load_graph(path=DATASET, use_cache=True):
+    """Build (or fetch from cache) the weighted device graph for `path`.
+    Cache entries are keyed on the dataset fingerprint and the day/night time factor."""
+    key = None
+    if use_cache:
+        try:
+            key = dataset_cache.fingerprint(data_store.resolve(path), _time_factor())
+        except FileNotFoundError:
+            pass
+    if key:
+        cached = dataset_cache.get("graph", key)
+        if cached is not None:
+            return cached
+    G, df = _build_graph(path)
+    if key:
+        G.graph["fingerprint"] = key
+        dataset_cache.put("graph", key, (G, df))
+    return G, df
+
+def invalidate_graph_cache():
+    dataset_cache.invalidate("graph")
+
+# ------------------ Vectorized Graph Construction ------------------
+RISK_WEIGHT = {"Low": 0.2, "Medium": 0.6, "High": 1.0}
+GRAPH_COLUMNS = ["ip", "ports_count", "risk_score", "risk_label", "vendor", "attack_cat"]
+VULN_VENDORS = ["unknown", "hikvision", "dahua", "esp"]
+KILL_STAGE = {'Normal': 'None', 'Exploits': 'Exploit', 'DoS': 'Exploit', 'Recon': 'Recon'}
+
+def graph_columns(df, time_factor=None):
+    """All node attributes and chain-edge weights as NumPy columns, one pass per column.
+    Edge i joins row i-1 to row i and takes its weight from row i."""
+    a, b, c = 0.5, 0.3, 0.2
+    time_factor = _time_factor() if time_factor is None else time_factor
+    n = len(df)
+
+    ports = df['ports_count'].to_numpy(dtype=float)
+    label = df['risk_label']
+    risk = label.map(RISK_WEIGHT).fillna(0.5).to_numpy()
+
+    vendor = df['vendor'] if 'vendor' in df else pd.Series([''] * n)
+    codes, uniques = pd.factorize(vendor, use_na_sentinel=False)
+    vendor_text = pd.Series([str(v).lower() for v in uniques], dtype=object)
+    vuln = np.where(vendor_text.str.contains("|".join(VULN_VENDORS), regex=True), 0.8, 0.3)[codes]
+    base_weight = a * ports + b * risk + c * vuln
+
+    congestion = ports * 0.1
+    attack_density = (label == 'High').mean()
+
+    attack_cat = df['attack_cat'] if 'attack_cat' in df else pd.Series(['Normal'] * n)
+    kill_stage = attack_cat.map(KILL_STAGE).fillna('None').to_numpy(dtype=object)
+    stage_factor = np.where(np.isin(kill_stage, ['Exploit', 'Lateral Movement']), 2.0, 1.0)
+
+    high = (label == 'High').to_numpy()
+    impact = np.where(ports > 3, 1.5, 1.0) * np.where(high, 2.0, 1.0)
+    final_weight = base_weight * time_factor * (1 + congestion) * (1 + attack_density) * stage_factor * impact
+    # Everything but the graph-wide density term, so single devices can be re-weighted later
+    edge_cost = base_weight * time_factor * (1 + congestion) * stage_factor * impact
+
+    ips = df['ip'].to_numpy(dtype=object)
+    return {
+        "ip": ips,
+        "risk": df['risk_score'].to_numpy(),
+        "label": label.to_numpy(dtype=object),
+        "kill_chain": kill_stage,
+        "impact": impact,
+        "ports_count": df['ports_count'].to_numpy(),
+        "vendor": vendor.to_numpy(dtype=object),
+        "attack_cat": attack_cat.to_numpy(dtype=object),
+        "edge_cost": edge_cost,
+        "src": ips[:-1],
+        "dst": ips[1:],
+        "weight": final_weight[1:],
+        "trans_prob": np.full(max(n - 1, 0), 0.2),
+        "attack_density": attack_density,
+        "high_count": int(high.sum()),
+    }
+
+def graph_csr(cols):
+    """Symmetric CSR adjacency straight from graph_columns, skipping NetworkX entirely.
+    Returns (nodes, weight matrix, trans_prob matrix) with rows in first-appearance order."""
+    from scipy import sparse
+
+    codes, nodes = pd.factorize(pd.Series(cols["ip"], dtype=object))
+    src, dst = codes[:-1], codes[1:]
+    # A repeated device pair keeps the weight of its last occurrence, as add_edge would
+    pairs = pd.DataFrame({"lo": np.minimum(src, dst), "hi": np.maximum(src, dst),
+                          "w": cols["weight"], "p": cols["trans_prob"]}).drop_duplicates(["lo", "hi"], keep="last")
+    off = (pairs["lo"] != pairs["hi"]).to_numpy()
+    rows = np.concatenate([pairs["lo"].to_numpy(), pairs["hi"].to_numpy()[off]])
+    colidx = np.concatenate([pairs["hi"].to_numpy(), pairs["lo"].to_numpy()[off]])
+    n = len(nodes)
+    weight = sparse.csr_matrix((np.concatenate([pairs["w"].to_numpy(), pairs["w"].to_numpy()[off]]), (rows, colidx)), shape=(n, n))
+    trans = sparse.csr_matrix((np.concatenate([pairs["p"].to_numpy(), pairs["p"].to_numpy()[off]]), (rows, colidx)), shape=(n, n))
+    return np.asarray(nodes, dtype=object), weight, trans
+
+def _build_graph(path):
     print("   Loading dataset – Forging network graph...")
     try:
-        df = pd.read_csv("training_dataset.csv")
+        df = data_store.load(path, columns=GRAPH_COLUMNS)
         print(f"   Dataset loaded: {len(df)} rows – Building graph...")
-        if len(df) > 50000 and mock_if_large:  # Too large = slow; fallback mock for fast demo
-            print("   Large dataset detected – Switching to fast mock mode for instant launch!")
-            df = pd.DataFrame({
-                'ip': ['Router-1', 'Camera-A', 'Smart-TV', 'Phone-X', 'Laptop-Y'],
-                'ports_count': [2, 5, 3, 1, 4],
-                'risk_score': [20, 80, 50, 10, 60],
-                'risk_label': ['Low', 'High', 'Medium', 'Low', 'Medium'],
-                'vendor': ['TP-Link', 'Hikvision', 'Samsung', 'Apple', 'Unknown'],
-                'attack_cat': ['Normal', 'Exploits', 'DoS', 'Normal', 'Recon']
-            })
     except FileNotFoundError:
-        print("   training_dataset.csv not found – Creating innovative mock graph for demo!")
+        print(f"   {path} not found – Creating innovative mock graph for demo!")
         df = pd.DataFrame({
             'ip': ['192.168.1.1', '192.168.1.2', '192.168.1.3', '192.168.1.4', '192.168.1.5'],
             'ports_count': [1, 4, 2, 5, 3],
@@ -33,35 +128,35 @@ def load_graph(mock_if_large=True):
             'attack_cat': ['Normal', 'Exploits', 'Normal', 'DoS', 'Recon']
         })
 
-    G = nx.Graph()
-    a, b, c = 0.5, 0.3, 0.2
-
-    for i, row in df.iterrows():
-        risk = {"Low": 0.2, "Medium": 0.6, "High": 1.0}.get(row['risk_label'], 0.5)
-        vuln = 0.8 if any(k.lower() in str(row.get('vendor', '')).lower() for k in ["unknown", "hikvision", "dahua", "esp"]) else 0.3
-        base_weight = a * row['ports_count'] + b * risk + c * vuln
-
-        time_factor = 1.5 if 0 <= datetime.now().hour < 6 or 18 <= datetime.now().hour < 24 else 1.0
-        congestion = row['ports_count'] * 0.1
-        attack_density = (df['risk_label'] == 'High').mean()
-
-        kill_stage = {'Normal': 'None', 'Exploits': 'Exploit', 'DoS': 'Exploit', 'Recon': 'Recon'}.get(row.get('attack_cat', 'Normal'), 'None')
-        stage_factor = 2.0 if kill_stage in ['Exploit', 'Lateral Movement'] else 1.0
-
-        impact = (1.5 if row['ports_count'] > 3 else 1.0) * (2.0 if row['risk_label'] == 'High' else 1.0)
-        final_weight = base_weight * time_factor * (1 + congestion) * (1 + attack_density) * stage_factor * impact
-
-        G.add_node(row["ip"], risk=row['risk_score'], label=row['risk_label'], kill_chain=kill_stage, impact=impact)
-        if i > 0:
-            prev = df.iloc[i-1]["ip"]
-            G.add_edge(prev, row["ip"], weight=final_weight, trans_prob=0.2)
+    cols = graph_columns(df)
+    G = nx.Graph(version=0)
+    G.add_nodes_from(
+        (ip, {"risk": r, "label": l, "kill_chain": k, "impact": m,
+              "ports_count": pc, "vendor": vd, "attack_cat": ac, "edge_cost": ec})
+        for ip, r, l, k, m, pc, vd, ac, ec in zip(cols["ip"], cols["risk"].tolist(), cols["label"],
+                                                  cols["kill_chain"], cols["impact"].tolist(),
+                                                  cols["ports_count"].tolist(), cols["vendor"],
+                                                  cols["attack_cat"], cols["edge_cost"].tolist())
+    )
+    # Density counts graph nodes (a device listed twice is one node), as the incremental updates do
+    G.graph["device_count"] = G.number_of_nodes()
+    G.graph["high_count"] = sum(label == 'High' for _, label in G.nodes(data='label'))
+    density = G.graph["high_count"] / G.graph["device_count"] if G.graph["device_count"] else 0.0
+    G.graph["attack_density"] = G.graph["weight_density"] = density
+    weights = cols["weight"] * ((1 + density) / (1 + cols["attack_density"]))
 
-    for u, v in G.edges:
-        G.edges[u, v]['trans_prob'] = G.edges[u, v].get('trans_prob', 0.2)
+    # Each chain edge is weighted by the device it leads to: that device "owns" the weight
+    G.add_edges_from(
+        (u, v, {"weight": w, "trans_prob": p, "owner": v})
+        for u, v, w, p in zip(cols["src"], cols["dst"], weights.tolist(), cols["trans_prob"].tolist())
+    )
 
     print(f"   Graph forged: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges – Ready for hunt!")
     return G, df
 
+def _min_edge_weight(G, u):
+    return min((d.get('weight', 1) for d in G[u].values()), default=0.0)
+
 def find_safest_path(start, end):
     print(f"   Hunting safest path from {start} to {end} with A*...")
     G, _ = load_graph()
@@ -69,17 +164,36 @@ def find_safest_path(start, end):
         print("   Start/end not in graph – Check IPs.")
         return None, None
 
+    # A tree already grown from this asset answers the query by lookup
+    if start in G.graph.get("path_trees", {}):
+        path, cost = _tree_path(G, start, end)
+        if path is None:
+            print("   No path found – Network isolated.")
+            return None, None
+        print(f"   🛡️ Safest Path Found: {' -> '.join(path)} (Cost: {cost:.2f})")
+        return path, cost
+
+    # Admissible (and consistent): any route from u still has to cross one of u's edges
+    # and finish on one of end's edges, so it costs at least the larger of the two minima.
+    end_min = _min_edge_weight(G, end)
+    min_w = {}
+
     def heuristic(u):
-        return G.nodes[u]['risk'] + G.nodes[u]['impact']
+        if u == end:
+            return 0.0
+        if u not in min_w:
+            min_w[u] = _min_edge_weight(G, u)
+        return max(min_w[u], end_min)
 
     open_set = []
     heapq.heappush(open_set, (heuristic(start), 0, start))
     came_from = {}
-    g_score = {node: float('inf') for node in G.nodes}
-    g_score[start] = 0
+    g_score = {start: 0}
 
     while open_set:
         _, current_g, current = heapq.heappop(open_set)
+        if current_g > g_score.get(current, float('inf')):
+            continue   # stale heap entry
         if current == end:
             path = []
             while current in came_from:
@@ -87,8 +201,9 @@ def find_safest_path(start, end):
                 current = came_from[current]
             path.append(start)
             path.reverse()
-            print(f"   🛡️ Safest Path Found: {' -> '.join(path)} (Cost: {current_g:.2f})")
-            return path, current_g
+            cost = current_g * density_scale(G)
+            print(f"   🛡️ Safest Path Found: {' -> '.join(path)} (Cost: {cost:.2f})")
+            return path, cost
 
         for neighbor in G.neighbors(current):
             tentative_g = current_g + G.edges[current, neighbor].get('weight', 1)
@@ -101,30 +216,216 @@ def find_safest_path(start, end):
     print("   No path found – Network isolated.")
     return None, None
 
+# ------------------ One-to-many Routing (shortest-path-tree reuse) ------------------
+def shortest_path_tree(G, source):
+    """Dijkstra predecessor/distance maps from source, grown once and kept on the graph."""
+    trees = G.graph.setdefault("path_trees", {})
+    if source not in trees:
+        trees[source] = nx.dijkstra_predecessor_and_distance(G, source, weight='weight')
+    return trees[source]
+
+def _tree_path(G, source, target):
+    pred, dist = shortest_path_tree(G, source)
+    if target not in dist:
+        return None, None
+    path = [target]
+    while path[-1] != source:
+        path.append(pred[path[-1]][0])
+    path.reverse()
+    return path, dist[target] * density_scale(G)
+
+def find_safest_paths(source, targets=None):
+    """Safest route from one asset to many targets (all reachable nodes by default)
+    from a single Dijkstra pass. Returns {target: (path, cost)}; unreachable = (None, None)."""
+    print(f"   Hunting safest paths from {source} with one Dijkstra pass...")
+    G, _ = load_graph()
+    if source not in G:
+        print("   Source not in graph – Check IPs.")
+        return {}
+    _, dist = shortest_path_tree(G, source)
+    targets = list(dist) if targets is None else targets
+    return {t: _tree_path(G, source, t) for t in targets}
+
+def find_safest_paths_multi(sources, targets=None):
+    """Safest route to each target from whichever of `sources` reaches it most cheaply,
+    using one multi-source Dijkstra. Returns {target: (path, cost)}."""
+    G, _ = load_graph()
+    sources = [s for s in sources if s in G]
+    if not sources:
+        return {}
+    key = frozenset(sources)
+    forests = G.graph.setdefault("path_forests", {})
+    if key not in forests:
+        forests[key] = nx.multi_source_dijkstra(G, key, weight='weight')
+    dist, paths = forests[key]
+    targets = list(dist) if targets is None else targets
+    scale = density_scale(G)
+    return {t: (paths[t], dist[t] * scale) if t in dist else (None, None) for t in targets}
+
+def transition_state(G):
+    """Sparse transition matrix and node index for G, built once per graph object."""
+    if "transition" not in G.graph:
+        nodes, P = spread_engine.transition_matrix(G)
+        G.graph["transition"] = (nodes, {n: i for i, n in enumerate(nodes)}, P)
+    return G.graph["transition"]
+
 def attack_spread_probability(start_node, target_node, steps=5):
     print(f"   Calculating MDP spread probability over {steps} steps...")
     G, _ = load_graph()
     if start_node not in G or target_node not in G:
         return 0.0
 
-    adj = nx.to_numpy_array(G, weight='trans_prob')
-    adj /= (adj.sum(axis=1, keepdims=True) + 1e-6)
+    _, index, P = transition_state(G)
+    prob = spread_engine.spread_probabilities(P, [index[start_node]], steps, all_steps=False)
 
-    nodes = list(G.nodes())
-    prob = np.zeros(len(nodes))
-    prob[nodes.index(start_node)] = 1.0
-
-    for _ in range(steps):
-        prob = np.dot(prob, adj)
-
-    spread_prob = prob[nodes.index(target_node)] * 100
+    spread_prob = float(prob[0, index[target_node]] * 100)
     print(f"   ⚠️ Breach Probability: {spread_prob:.2f}%")
     return spread_prob
 
+def breach_probability_map(sources, steps=5):
+    """Breach probabilities from every source to every node, for every step count, in one pass.
+    Returns (nodes, array of shape (steps, len(sources), len(nodes)))."""
+    G, _ = load_graph()
+    nodes, index, P = transition_state(G)
+    return nodes, spread_engine.spread_probabilities(P, [index[s] for s in sources], steps)
+
+def graph_pagerank(G):
+    """PageRank of G, recomputed only after the graph changes and warm-started from the last vector.
+    The unedited graph's result is also cached across runs by centrality (keyed on the dataset fingerprint);
+    edited graphs are not, the warm start keeps their recomputation to a few iterations."""
+    if G.graph.get("pagerank_version") != G.graph.get("version"):
+        G.graph["pagerank"] = centrality.pagerank(G, weight='weight', nstart=G.graph.get("pagerank"))
+        G.graph["pagerank_version"] = G.graph.get("version")
+    return G.graph["pagerank"]
+
+# ------------------ Incremental Graph Updates ------------------
+# These edit the live graph returned by load_graph (the in-memory cached object) in place.
+def _edge_change_ok(pred, dist, u, v, old_w, new_w):
+    """Does a cached shortest-path tree survive one edge change (None = edge absent)?"""
+    if u == v or old_w == new_w:
+        return True
+    in_tree = u in pred.get(v, ()) or v in pred.get(u, ())
+    if new_w is None or (old_w is not None and new_w > old_w):
+        return not in_tree   # only dearer/removed tree edges can lengthen routes
+    du, dv = dist.get(u, float('inf')), dist.get(v, float('inf'))
+    return du + new_w >= dv and dv + new_w >= du   # cheaper/new edges must not open a shortcut
+
+# Edge weights are stored at the density they were built with (weight_density). The attack density
+# multiplies every route alike, so when it moves only this one factor changes: routes and trees stay
+# valid, and costs are scaled by density_scale() when they are reported.
+def density_scale(G):
+    return (1 + G.graph["attack_density"]) / (1 + G.graph.get("weight_density", G.graph["attack_density"]))
+
+def _set_density(G, high_delta, count_delta):
+    G.graph["high_count"] += high_delta
+    G.graph["device_count"] += count_delta
+    G.graph.setdefault("weight_density", G.graph["attack_density"])
+    G.graph["attack_density"] = G.graph["high_count"] / G.graph["device_count"] if G.graph["device_count"] else 0.0
+
+def _owned_weight(G, owner):
+    """Stored weight of an edge owned by `owner` (in weight_density units)."""
+    return G.nodes[owner]['edge_cost'] * (1 + G.graph.get("weight_density", G.graph["attack_density"]))
+
+def edge_weight(G, u, v):
+    """Current weight of one edge, density included."""
+    return G.edges[u, v]['weight'] * density_scale(G)
+
+def _commit_changes(G, changes, new_node=None):
+    """Patch cached path trees for a batch of (u, v, old_w, new_w) edge changes and
+    mark the remaining derived state (transition matrix, PageRank) for refresh."""
+    trees = G.graph.get("path_trees", {})
+    for source in list(trees):
+        pred, dist = trees[source]
+        if source not in G:
+            del trees[source]
+            continue
+        if new_node is not None and new_node not in dist:
+            # Graft a new device onto the tree through its cheapest known neighbour
+            reach = [(dist[u] + G.edges[u, new_node]['weight'], u) for u in G[new_node] if u in dist and u != new_node]
+            if reach:
+                best = min(reach)[0]
+                dist[new_node] = best
+                pred[new_node] = [u for c, u in reach if c == best]
+        if not all(_edge_change_ok(pred, dist, *change) for change in changes):
+            del trees[source]
+    G.graph.pop("path_forests", None)
+    G.graph.pop("transition", None)
+    G.graph["version"] = G.graph.get("version", 0) + 1
+
+def _device_attrs(device):
+    cols = graph_columns(pd.DataFrame([device]))
+    return {"risk": cols["risk"].tolist()[0], "label": cols["label"][0], "kill_chain": cols["kill_chain"][0],
+            "impact": cols["impact"].tolist()[0], "ports_count": cols["ports_count"].tolist()[0],
+            "vendor": cols["vendor"][0], "attack_cat": cols["attack_cat"][0],
+            "edge_cost": cols["edge_cost"].tolist()[0]}
+
+def add_device(G, device, links=None, trans_prob=0.2):
+    """Add one device (dict with ip, ports_count, risk_score, risk_label, vendor, attack_cat)
+    linked to `links`, or to the most recently added device as in the dataset chain."""
+    ip = device['ip']
+    if ip in G:
+        return rescore_device(G, ip, **{k: v for k, v in device.items() if k != 'ip'})
+    if links is None:
+        links = [next(reversed(list(G.nodes)))] if len(G) else []
+    G.add_node(ip, **_device_attrs(device))
+    _set_density(G, int(G.nodes[ip]['label'] == 'High'), 1)
+    changes = []
+    for u in links:
+        if u in G:
+            w = _owned_weight(G, ip)
+            G.add_edge(u, ip, weight=w, trans_prob=trans_prob, owner=ip)
+            changes.append((u, ip, None, w))
+    _commit_changes(G, changes, new_node=ip)
+
+def remove_device(G, ip):
+    if ip not in G:
+        return
+    high = int(G.nodes[ip]['label'] == 'High')
+    for source, (pred, dist) in list(G.graph.get("path_trees", {}).items()):
+        if ip in dist and source != ip:
+            if any(ip in p for p in pred.values()):
+                del G.graph["path_trees"][source]   # other routes ran through this device
+            else:
+                del dist[ip]                        # a leaf: nothing else depended on it
+                pred.pop(ip, None)
+    G.remove_node(ip)
+    _set_density(G, -high, -1)
+    _commit_changes(G, [])
+
+def rescore_device(G, ip, **updates):
+    """Re-score one device (risk_score, risk_label, ports_count, vendor, attack_cat) in place,
+    re-weighting only the edges it owns."""
+    node = G.nodes[ip]
+    device = {"ip": ip, "risk_score": node['risk'], "risk_label": node['label'], "ports_count": node['ports_count'],
+              "vendor": node['vendor'], "attack_cat": node['attack_cat']}
+    device.update(updates)
+    old_high = node['label'] == 'High'
+    node.update(_device_attrs(device))
+    _set_density(G, int(node['label'] == 'High') - int(old_high), 0)
+    changes = []
+    for u, d in G[ip].items():
+        if d.get('owner') == ip:
+            old_w, d['weight'] = d['weight'], _owned_weight(G, ip)
+            changes.append((u, ip, old_w, d['weight']))
+    _commit_changes(G, changes)
+
+def add_link(G, u, v, trans_prob=0.2):
+    """Connect two existing devices; the edge is weighted by (and owned by) v."""
+    old_w = G.edges[u, v]['weight'] if G.has_edge(u, v) else None
+    w = _owned_weight(G, v)
+    G.add_edge(u, v, weight=w, trans_prob=trans_prob, owner=v)
+    _commit_changes(G, [(u, v, old_w, w)])
+
+def remove_link(G, u, v):
+    if G.has_edge(u, v):
+        old_w = G.edges[u, v]['weight']
+        G.remove_edge(u, v)
+        _commit_changes(G, [(u, v, old_w, None)])
+
 def suggest_quarantine():
     print("   Analyzing for quarantine recommendation...")
     G, df = load_graph()
-    pagerank = nx.pagerank(G, weight='weight')
+    pagerank = graph_pagerank(G)
     high_risk = [n for n in G.nodes if G.nodes[n]['label'] == "High"]
     if high_risk:
         central = max(high_risk, key=lambda n: pagerank.get(n, 0) * G.nodes[n]['impact'])
@@ -133,6 +434,40 @@ def suggest_quarantine():
     print("   No immediate quarantine needed.")
     return None
 
+# ------------------ Routing Visualization ------------------
+EDGE_LABEL_MAX = 200        # weight labels are only legible on small graphs
+NODE_LABEL_MAX = 300
+
+def render_routing_png(G, out="routing_example.png", by="subnet"):
+    """PNG of the device graph: every device while it stays legible, beyond graph_lod.LOD_THRESHOLD
+    one node per /24 subnet (or vendor / risk band) sized by device count. Layouts come from graph_lod's cache."""
+    nodes, A = centrality.to_csr(G)
+    risk = np.array([G.nodes[n].get('risk', np.nan) for n in nodes], dtype=float)
+    detailed = len(nodes) <= graph_lod.LOD_THRESHOLD
+    if not detailed:
+        view = graph_lod.overview(nodes, A, risk, by, [G.nodes[n].get('vendor') for n in nodes])
+        node_size = (20 + 400 * np.sqrt(view.size / view.size.max()) / max(1, len(view.labels) / 100)).tolist()
+        title = f"E-Raksha Network – {len(nodes)} devices by {by}"
+    else:
+        view = graph_lod.full_view(nodes, A, risk)
+        node_size = 1000 if len(nodes) <= NODE_LABEL_MAX else 60
+        title = "E-Raksha Network – Safe Path Hunt Visualization"
+    pos = graph_lod.layout(view)
+    H = nx.Graph()
+    H.add_nodes_from(view.labels)
+    H.add_weighted_edges_from((view.labels[i], view.labels[j], c) for i, j, c in graph_lod.edges(view))
+
+    plt.figure(figsize=(12, 10))
+    nx.draw(H, pos, nodelist=list(view.labels), node_color=view.mean_risk, cmap='RdYlGn_r', node_size=node_size,
+            with_labels=len(view.labels) <= NODE_LABEL_MAX, font_weight='bold',
+            width=0.5 if H.number_of_edges() > EDGE_LABEL_MAX else 1.0)
+    if detailed and G.number_of_edges() <= EDGE_LABEL_MAX:
+        nx.draw_networkx_edge_labels(H, pos, edge_labels={(u, v): f"{d['weight'] * density_scale(G):.1f}" for u, v, d in G.edges(data=True)})
+    plt.title(title)
+    plt.savefig(out, dpi=300, bbox_inches='tight')
+    plt.close()
+    return out
+
 if __name__ == "__main__":
     G, df = load_graph()
     if len(df) < 2:
@@ -146,13 +481,6 @@ if __name__ == "__main__":
 
     # Extraordinary Viz
     print("\n   🎨 Generating routing visualization PNG...")
-    plt.figure(figsize=(12, 10))
-    pos = nx.spring_layout(G, seed=42)
-    node_colors = [G.nodes[n]['risk'] for n in G.nodes]
-    nx.draw(G, pos, node_color=node_colors, cmap='RdYlGn_r', node_size=1000, with_labels=True, font_weight='bold')
-    nx.draw_networkx_edge_labels(G, pos, edge_labels={(u,v): f"{d['weight']:.1f}" for u,v,d in G.edges(data=True)})
-    plt.title("E-Raksha Network – Safe Path Hunt Visualization")
-    plt.savefig("routing_example.png", dpi=300, bbox_inches='tight')
-    plt.close()
+    render_routing_png(G)
     print("   routing_example.png generated – Open for stunning view!")
     print("\n🏆 Engine Launch Complete – Ready for Cyber Fortress!")
\ No newline at end of file
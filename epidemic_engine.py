@@ -0,0 +1,214 @@
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy import sparse
+
+# nodes: labels, P: symmetric CSR of per-edge trans_prob, risk: 0-100 per node
+Network = namedtuple("Network", "nodes P risk")
+# infection_time[i, k]: step node i was infected in trial k (0 = initial source, inf = never)
+Outbreak = namedtuple("Outbreak", "nodes infection_time steps recovery")
+
+TRANS_PROB = 0.2          # edge transmission probability when the data has none (as in dijkstra_engine)
+DEFAULT_RISK = 50         # risk assumed for nodes without a score (gateways, routers)
+RISK_FLOOR = 0.2          # a risk-0 device is still this susceptible; risk 100 takes the full edge probability
+BATCH_CELLS = 20_000_000  # nodes x trials per simulation block, bounds memory
+BATCH_TRIALS = 250        # at most this many trials per block, so small networks still spread over the pool
+
+# ------------------ Network Construction ------------------
+def from_graph(G, weight="trans_prob", risk="risk"):
+    """Network from a NetworkX graph (e.g. dijkstra_engine.load_graph()[0])."""
+    nodes = list(G.nodes())
+    P = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight, format="csr")
+    if not G.is_directed():
+        P = P.maximum(P.T)
+    scores = np.array([G.nodes[n].get(risk, DEFAULT_RISK) for n in nodes], dtype=float)
+    return Network(np.asarray(nodes, dtype=object), sparse.csr_matrix(P, dtype=float), scores)
+
+def from_edges(src, dst, trans_prob=None, risk=None):
+    """Undirected network from edge columns. `risk` maps node -> score; missing nodes get DEFAULT_RISK.
+    A repeated pair keeps its highest transmission probability."""
+    codes, nodes = pd.factorize(pd.concat([pd.Series(src, dtype=object), pd.Series(dst, dtype=object)],
+                                          ignore_index=True))
+    m = len(codes) // 2
+    p = np.full(m, TRANS_PROB) if trans_prob is None else np.asarray(trans_prob, dtype=float)
+    n = len(nodes)
+    P = sparse.coo_matrix((p, (codes[:m], codes[m:])), shape=(n, n)).tocsr()
+    P.sum_duplicates()
+    P = sparse.csr_matrix(P.maximum(P.T))     # no duplicate entries left to add up after this
+    P.setdiag(0)
+    P.eliminate_zeros()
+    scores = np.full(n, float(DEFAULT_RISK))
+    if risk is not None:
+        scores = pd.Series(nodes).map(risk).fillna(DEFAULT_RISK).to_numpy(dtype=float)
+    return Network(np.asarray(nodes, dtype=object), P, scores)
+
+def chain(ips, risk, trans_prob=TRANS_PROB):
+    """Devices linked in row order, the topology the original simulation and dijkstra_engine use."""
+    ips = pd.Series(ips, dtype=object)
+    return from_edges(ips.iloc[:-1].to_numpy(), ips.iloc[1:].to_numpy(),
+                      np.full(max(len(ips) - 1, 0), trans_prob), dict(zip(ips, risk)))
+
+def index_of(net, labels):
+    lookup = pd.Index(net.nodes)
+    idx = lookup.get_indexer(list(labels))
+    if (idx < 0).any():
+        missing = [l for l, i in zip(labels, idx) if i < 0]
+        raise KeyError(f"not in network: {missing[:5]}")
+    return idx
+
+# ------------------ Transmission Model ------------------
+def log_survival(net, quarantine=()):
+    """L[i, j] = log(1 - p_ij * s_j): the log-chance an infected i fails to infect j in one step,
+    with s_j the risk-weighted susceptibility of j. Quarantined nodes neither catch nor pass it on.
+    Infections from several neighbours combine by adding their logs, one sparse product per step."""
+    s = RISK_FLOOR + (1 - RISK_FLOOR) * np.clip(net.risk, 0, 100) / 100
+    keep = np.ones(len(net.nodes))
+    keep[np.asarray(quarantine, dtype=np.int64)] = 0
+    L = sparse.csr_matrix(net.P @ sparse.diags(s * keep))
+    L = sparse.csr_matrix(sparse.diags(keep) @ L)
+    L.data = np.log1p(-np.minimum(L.data, 1 - 1e-12))
+    L.eliminate_zeros()
+    return sparse.csr_matrix(L.T, dtype=np.float32)   # row j gathers j's infected neighbours
+
+def _run_batch(LT, sources, trials, steps, recovery, seed, source_p=None):
+    """One block of trials, state arrays shaped (nodes, trials). sources: node indices seeded in every
+    trial, or with source_p a pool to draw one source per trial from."""
+    rng = np.random.default_rng(seed)
+    n = LT.shape[0]
+    time = np.full((n, trials), np.inf, dtype=np.float32)
+    infected = np.zeros((n, trials), dtype=bool)
+    if source_p is None:
+        infected[sources] = True
+    else:
+        infected[rng.choice(sources, size=trials, p=source_p), np.arange(trials)] = True
+    susceptible = ~infected
+    time[infected] = 0
+    for t in range(1, steps + 1):
+        if not infected.any():
+            break
+        hazard = LT @ infected.astype(np.float32)          # sum of log-survival over infectious neighbours
+        at_risk = hazard < 0
+        at_risk &= susceptible
+        cells = np.flatnonzero(at_risk)                    # flat (node, trial) indices, random draws only here
+        cells = cells[rng.random(len(cells)) < -np.expm1(hazard.ravel()[cells])]
+        if recovery:
+            sick = np.flatnonzero(infected)
+            infected.ravel()[sick[rng.random(len(sick)) < recovery]] = False
+        infected.ravel()[cells] = True
+        susceptible.ravel()[cells] = False
+        time.ravel()[cells] = t
+    return time
+
+def _seed_batches(trials, n, seed):
+    per = max(1, min(BATCH_TRIALS, BATCH_CELLS // max(n, 1)))
+    sizes = [min(per, trials - start) for start in range(0, trials, per)]
+    return sizes, np.random.SeedSequence(seed).spawn(len(sizes))
+
+_worker_LT = None
+
+def _init_worker(LT):
+    global _worker_LT
+    _worker_LT = LT
+
+def _pool_batch(args):
+    return _run_batch(_worker_LT, *args)
+
+def simulate(net, sources=None, steps=20, trials=1000, recovery=0.0, quarantine=(), seed=None, workers=None):
+    """SI (recovery=0) or SIR outbreak, `trials` independent runs of `steps` steps.
+    sources: node labels infected at step 0 in every trial; None draws one source per trial, weighted by risk.
+    recovery: chance per step an infected node stops spreading (SIR). Trials are split into blocks that
+    run on a process pool (workers=None: all cores, 1: in this process). Same seed, same result,
+    whatever the number of workers."""
+    LT = log_survival(net, index_of(net, quarantine) if len(quarantine) else ())
+    if sources is None:
+        pool = np.setdiff1d(np.arange(len(net.nodes)), index_of(net, quarantine) if len(quarantine) else [])
+        weight = np.clip(net.risk[pool], 0, None) + 1
+        src, src_p = pool, weight / weight.sum()
+    else:
+        src, src_p = index_of(net, [sources] if isinstance(sources, str) else sources), None
+    sizes, seeds = _seed_batches(trials, len(net.nodes), seed)
+    jobs = [(src, size, steps, recovery, s, src_p) for size, s in zip(sizes, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(LT,)) as executor:
+            blocks = list(executor.map(_pool_batch, jobs))
+    else:
+        blocks = [_run_batch(LT, *job) for job in jobs]
+    return Outbreak(net.nodes, np.hstack(blocks), steps, recovery)
+
+# ------------------ Results ------------------
+def final_size(outbreak):
+    """Nodes ever infected, per trial."""
+    return np.isfinite(outbreak.infection_time).sum(axis=0)
+
+def epidemic_curve(outbreak):
+    """(steps + 1, trials): nodes infected by each step, cumulative."""
+    t = outbreak.infection_time
+    return np.stack([(t <= s).sum(axis=0) for s in range(outbreak.steps + 1)])
+
+def node_summary(outbreak, quantiles=(0.5, 0.9)):
+    """Per node: chance of infection and when it happens (over the trials that reach it)."""
+    t = outbreak.infection_time
+    hit = np.isfinite(t)
+    reached = np.where(hit, t, np.nan)
+    out = pd.DataFrame({"node": outbreak.nodes, "p_infected": hit.mean(axis=1)})
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)     # nodes no trial reaches stay NaN
+        out["mean_time"] = np.nanmean(reached, axis=1)
+        for q in quantiles:
+            out[f"t{int(q * 100)}"] = np.nanquantile(reached, q, axis=1)
+    return out.sort_values(["p_infected", "mean_time"], ascending=[False, True], ignore_index=True)
+
+def representative_trial(outbreak, which="median"):
+    """Index of the trial whose final size is the median (or "max"/"min") of all trials."""
+    sizes = final_size(outbreak)
+    if which == "max":
+        return int(sizes.argmax())
+    if which == "min":
+        return int(sizes.argmin())
+    return int(np.abs(sizes - np.median(sizes)).argmin())
+
+# ------------------ Containment Comparison ------------------
+def containment_strategies(net, k=5):
+    """Candidate quarantine sets of k nodes each."""
+    degree = np.asarray(net.P.sum(axis=1)).ravel()
+    top = lambda score: list(net.nodes[np.argsort(-score, kind="stable")[:k]])
+    return {
+        "none": [],
+        "highest_risk": top(net.risk),
+        "highest_degree": top(degree),
+        "risk_x_degree": top(net.risk * degree),
+    }
+
+def compare_containment(net, strategies=None, sources=None, steps=20, trials=1000, recovery=0.0,
+                        seed=42, workers=None, level=0.95):
+    """Outbreak size under each quarantine set. Every strategy replays the same seed, so they face
+    the same random draws wherever their networks agree (common random numbers)."""
+    from scipy.stats import norm
+    strategies = containment_strategies(net) if strategies is None else strategies
+    z = norm.ppf(0.5 + level / 2)
+    rows = []
+    for name, quarantine in strategies.items():
+        srcs = sources
+        if sources is not None:
+            srcs = [s for s in ([sources] if isinstance(sources, str) else sources) if s not in set(quarantine)]
+            if not srcs:
+                rows.append({"strategy": name, "quarantined": len(quarantine), "mean_infected": 0.0,
+                             "ci_low": 0.0, "ci_high": 0.0, "p95_infected": 0.0, "share_infected": 0.0})
+                continue
+        sizes = final_size(simulate(net, srcs, steps, trials, recovery, quarantine, seed, workers))
+        half = z * sizes.std(ddof=1) / np.sqrt(len(sizes)) if len(sizes) > 1 else 0.0
+        rows.append({
+            "strategy": name,
+            "quarantined": len(quarantine),
+            "mean_infected": sizes.mean(),
+            "ci_low": sizes.mean() - half,
+            "ci_high": sizes.mean() + half,
+            "p95_infected": np.percentile(sizes, 95),
+            "share_infected": sizes.mean() / len(net.nodes),
+        })
+    return pd.DataFrame(rows).sort_values("mean_infected", ignore_index=True)
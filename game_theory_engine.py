@@ -1,7 +1,12 @@
+import sys
+from collections import namedtuple
 import numpy as np
-import random
+import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.optimize import linprog
+from scipy.stats import norm
+import data_store
+import nash_engine
+from risk_engine import PORTS, PORT_BIT
 
 attack_strategies = ["port_scanning", "brute_force", "malware_probe", "ddos_attempt", "lateral_movement"]
 defense_strategies = ["firewall_block", "rate_limit", "honeypot_redirect", "ip_blacklist", "isolate_node"]
@@ -14,31 +19,28 @@ payoff = np.array([
     [1, -2, 3, 2, 5]
 ])
 
-def compute_nash_equilibrium():
-    num_attacks = payoff.shape[0]
-    num_defenses = payoff.shape[1]
-
-    c = np.ones(num_defenses)
-    A_ub = -payoff.T
-    b_ub = -np.ones(num_attacks)
-    res_def = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=(0, 1))
-
-    c_att = -np.ones(num_attacks)
-    A_ub_att = payoff
-    b_ub_att = np.ones(num_defenses)
-    res_att = linprog(c_att, A_ub=A_ub_att, b_ub=b_ub_att, bounds=(0, 1))
-
-    if res_def.success and res_att.success:
-        def_probs = res_def.x / (res_def.x.sum() + 1e-12)
-        att_probs = -res_att.x / (-res_att.x.sum() + 1e-12)
-        value = 1 / (res_def.fun + 1e-12)
-        return def_probs, att_probs, value
-    else:
-        uniform = 1.0 / num_defenses
-        return np.full(num_defenses, uniform), np.full(num_attacks, uniform), 0.0
-
-def evolve_nash(generations=5):
-    def_probs, att_probs, value = compute_nash_equilibrium()
+# Defender's payoff when attack (row) meets defense (column); the attacker minimises it
+ATTACK_PORTS = {
+    "port_scanning": PORTS,
+    "brute_force": (21, 22, 23, 2323),
+    "malware_probe": (80, 443, 8080, 8000),
+    "ddos_attempt": (80, 443, 1883, 5683, 8883),
+    "lateral_movement": (22, 23, 554, 1883),
+}
+ATTACK_MASKS = np.array([sum(1 << PORT_BIT[p] for p in ATTACK_PORTS[a]) for a in attack_strategies], dtype=np.int64)
+POPCOUNT = np.array([bin(i).count("1") for i in range(1 << len(PORTS))])
+DEVICES_FILE = "training_data.csv"
+
+# ------------------ Nash Equilibrium ------------------
+def compute_nash_equilibrium(M=None, method="auto"):
+    """(defender mix, attacker mix, game value) for M (default: the 5x5 payoff). Memoised by nash_engine."""
+    eq = nash_engine.solve(payoff if M is None else M, method=method)
+    return eq.defender.copy(), eq.attacker.copy(), eq.value
+
+def evolve_nash(generations=5, M=None):
+    """Mutate the attacker mix each generation and re-solve the equilibrium; the re-solves are
+    cache hits in nash_engine, so a generation costs a mutation, not an LP."""
+    def_probs, att_probs, value = compute_nash_equilibrium(M)
 
     for gen in range(generations):
         mutation = np.random.normal(0, 0.05, len(att_probs))
@@ -49,36 +51,102 @@ def evolve_nash(generations=5):
             att_probs /= att_sum
         else:
             att_probs = np.ones(len(att_probs)) / len(att_probs)
-        def_probs, _, value = compute_nash_equilibrium()
+        def_probs, _, value = compute_nash_equilibrium(M)
 
     print(f"Evolved Nash after {generations} generations: Defender {np.round(def_probs, 3)}, Value: {value:.2f}")
     return def_probs, att_probs, value
 
-def run_game(rounds=20):
-    def_probs, att_probs, value = evolve_nash()
-    attacker_score = 0
-    defender_score = 0
-    output = "\n⚔ EXTRAORDINARY EVOLUTIONARY NASH SIMULATION ⚔\n\n"
-
-    for i in range(rounds):
-        A = np.random.choice(range(len(attack_strategies)), p=att_probs)
-        D = np.random.choice(range(len(defense_strategies)), p=def_probs)
-
-        score = payoff[A][D]
-        if score > 0:
-            defender_score += score
-            output += f"Round {i+1:2d}: 🛡️ Defender wins! Countered *{attack_strategies[A]}* with **{defense_strategies[D]}** (+{score})\n"
-        else:
-            attacker_score += abs(score)
-            output += f"Round {i+1:2d}: ⚠️ Attack succeeded: *{attack_strategies[A]}* bypassed {defense_strategies[D]} (-{abs(score)})\n"
-
-    output += f"\n{'='*50}\nFINAL RESULT (Evolved Nash Value: {value:.2f})\n{'='*50}\n"
-    output += f"Attacker Total Score : {attacker_score}\n"
-    output += f"Defender Total Score : {defender_score}\n"
-    output += "🟢 DEFENSE DOMINANT – Network Secure!" if defender_score > attacker_score else "🔴 UPGRADE DEFENSES – Vulnerability Exposed!"
-    output += "\n\nInnovation Impact: Evolutionary adaptation models real-world APT mutation – Boosts IoT resilience by 15-25% in prolonged attacks."
-
-    # Create stunning visualization: Payoff Matrix Heatmap with probability bars
+# ------------------ Per-class Games from Risk Data ------------------
+def class_payoff(devices, max_devices=200, loss_scale=5.0):
+    """Game over the devices of one class: the attacker picks (device, attack), the defender (device, defense).
+    Defending the attacked device plays out the base payoff; otherwise the defender loses that
+    device's expected damage, scaled by its risk score and how many of the attack's ports it exposes.
+    Returns (M, ips, attack labels, defense labels); only the max_devices riskiest devices are kept."""
+    devices = devices.nlargest(max_devices, "risk_score")
+    n, k = len(devices), len(attack_strategies)
+    masks = devices["port_mask"].fillna(0).to_numpy(np.int64)
+    exposure = POPCOUNT[masks[:, None] & ATTACK_MASKS] / POPCOUNT[ATTACK_MASKS]
+    risk = devices["risk_score"].fillna(0).to_numpy(float) / 100
+    loss = loss_scale * risk[:, None] * (0.2 + 0.8 * exposure)       # (device, attack)
+
+    M = np.repeat(-loss.reshape(-1, 1), n * len(defense_strategies), axis=1)
+    blocks = M.reshape(n, k, n, len(defense_strategies))
+    device = np.arange(n)
+    blocks[device, :, device, :] = payoff
+    ips = devices["ip"].astype(str).tolist()
+    attacks = [f"{ip}:{a}" for ip in ips for a in attack_strategies]
+    defenses = [f"{ip}:{d}" for ip in ips for d in defense_strategies]
+    return M, ips, attacks, defenses
+
+def class_games(df, by="vendor", max_devices=200):
+    """{class: class_payoff(...)} for every value of `by` (vendor, subnet, status, ...)."""
+    return {cls: class_payoff(group, max_devices) for cls, group in df.groupby(by, observed=True, sort=True)}
+
+def plan_defenses(df=None, by="vendor", max_devices=200, method="auto", top=3):
+    """Solve one game per device class in a single batch and list where each class's defender should focus."""
+    if df is None:
+        df = data_store.load(DEVICES_FILE, "devices", columns=[by, "ip", "ports", "port_mask", "risk_score"])
+    games = class_games(df, by, max_devices)
+    solved = nash_engine.solve_many([g[0] for g in games.values()], method=method)
+    rows = []
+    for (cls, (_, ips, _, defenses)), eq in zip(games.items(), solved):
+        best = np.argsort(eq.defender)[::-1][:top]
+        rows.append({
+            by: cls,
+            "devices": len(ips),
+            "value": round(eq.value, 3),
+            "gap": eq.gap,
+            "method": eq.method,
+            "focus": ", ".join(f"{defenses[i]} ({eq.defender[i]:.0%})" for i in best if eq.defender[i] > 0),
+        })
+    return pd.DataFrame(rows)
+
+# ------------------ Monte-Carlo Simulation ------------------
+GameStats = namedtuple("GameStats", "defender attacker net defender_wins rounds trials")
+SIM_CELLS = 10_000_000    # trials x payoff cells drawn per block, bounds simulate()'s memory
+LOG_ROUNDS = 50           # run_game narrates at most this many rounds
+
+def simulate(def_probs, att_probs, rounds=1_000_000, trials=10_000, M=None, seed=None):
+    """Play `trials` independent games of `rounds` rounds each; arrays of per-game totals come back.
+    A game's scores only depend on how often each (attack, defense) cell comes up, which is a single
+    multinomial draw, so the cost grows with trials x cells and not with rounds."""
+    M = payoff if M is None else np.asarray(M)
+    rng = np.random.default_rng(seed)
+    cells = np.outer(att_probs, def_probs).ravel()
+    cells /= cells.sum()
+    gains = M.ravel().astype(float)
+    block = max(1, SIM_CELLS // len(cells))
+    defender, attacker = np.empty(trials), np.empty(trials)
+    for start in range(0, trials, block):
+        counts = rng.multinomial(rounds, cells, size=min(block, trials - start))
+        defender[start:start + len(counts)] = counts @ np.clip(gains, 0, None)
+        attacker[start:start + len(counts)] = counts @ np.clip(-gains, 0, None)
+    return GameStats(defender, attacker, defender - attacker, defender > attacker, rounds, trials)
+
+def confidence_interval(values, level=0.95):
+    """(mean, low, high): normal-approximation interval for the mean of `values`."""
+    values = np.asarray(values, dtype=float)
+    mean = values.mean()
+    half = norm.ppf(0.5 + level / 2) * values.std(ddof=1) / np.sqrt(len(values)) if len(values) > 1 else 0.0
+    return float(mean), float(mean - half), float(mean + half)
+
+def summarize(stats, level=0.95):
+    """Means with confidence intervals, win rate and the spread of per-game net scores."""
+    net_percentiles = np.percentile(stats.net, [5, 50, 95])
+    return {
+        "rounds": stats.rounds,
+        "trials": stats.trials,
+        "defender": confidence_interval(stats.defender, level),
+        "attacker": confidence_interval(stats.attacker, level),
+        "net": confidence_interval(stats.net, level),
+        "net_per_round": confidence_interval(stats.net / stats.rounds, level),
+        "defender_win_rate": confidence_interval(stats.defender_wins, level),
+        "net_p5_p50_p95": net_percentiles,
+    }
+
+# ------------------ Visualization ------------------
+def render_payoff(def_probs, att_probs, value, resilience, out="payoff_matrix_visualization.png", dpi=300):
+    """Payoff heatmap with the two mixed strategies as bars. Separate from the simulation so callers opt in."""
     fig, ax1 = plt.subplots(figsize=(12, 9))
     im = ax1.imshow(payoff, cmap='RdYlGn_r', vmin=-4, vmax=5)
     fig.colorbar(im, ax=ax1, label='Payoff (Positive = Defender Advantage)', shrink=0.8)
@@ -87,7 +155,7 @@ def run_game(rounds=20):
     ax1.set_xticklabels(defense_strategies, rotation=45, ha='right', fontsize=10)
     ax1.set_yticks(range(len(attack_strategies)))
     ax1.set_yticklabels(attack_strategies, fontsize=10)
-    ax1.set_title(f"Evolutionary Nash Payoff Matrix\n(Game Value: {value:.2f} | Defender Resilience: {defender_score / (defender_score + attacker_score + 1e-6):.1%})",
+    ax1.set_title(f"Evolutionary Nash Payoff Matrix\n(Game Value: {value:.2f} | Defender Resilience: {resilience:.1%})",
                   fontsize=14, pad=20)
     ax1.set_xlabel("AI Defense Strategies", fontsize=12)
     ax1.set_ylabel("Mutating Attack Strategies", fontsize=12)
@@ -106,17 +174,48 @@ def run_game(rounds=20):
     ax2.legend(loc='upper right')
 
     plt.tight_layout()
-    plt.savefig("payoff_matrix_visualization.png", dpi=300, bbox_inches='tight', facecolor='white')
+    plt.savefig(out, dpi=dpi, bbox_inches='tight', facecolor='white')
     plt.close()
+    return out
 
-    output += "\n\n🎨 Generated high-resolution visualization: payoff_matrix_visualization.png"
-    output += "\n   → Open this file to see the strategic heatmap with evolved probabilities!"
+# ------------------ Narrated Game ------------------
+def run_game(rounds=20, render=True):
+    def_probs, att_probs, value = evolve_nash()
+    A = np.random.choice(len(attack_strategies), size=rounds, p=att_probs)
+    D = np.random.choice(len(defense_strategies), size=rounds, p=def_probs)
+    scores = payoff[A, D]
+    defender_score = int(scores[scores > 0].sum())
+    attacker_score = int(-scores[scores <= 0].sum())
+
+    lines = ["\n⚔ EXTRAORDINARY EVOLUTIONARY NASH SIMULATION ⚔\n"]
+    for i, (a, d, score) in enumerate(zip(A[:LOG_ROUNDS], D[:LOG_ROUNDS], scores[:LOG_ROUNDS])):
+        if score > 0:
+            lines.append(f"Round {i+1:2d}: 🛡️ Defender wins! Countered *{attack_strategies[a]}* with **{defense_strategies[d]}** (+{score})")
+        else:
+            lines.append(f"Round {i+1:2d}: ⚠️ Attack succeeded: *{attack_strategies[a]}* bypassed {defense_strategies[d]} (-{abs(score)})")
+    if rounds > LOG_ROUNDS:
+        lines.append(f"... {rounds - LOG_ROUNDS} more rounds")
 
-    return output
+    lines += [
+        f"\n{'='*50}\nFINAL RESULT (Evolved Nash Value: {value:.2f})\n{'='*50}",
+        f"Attacker Total Score : {attacker_score}",
+        f"Defender Total Score : {defender_score}",
+        "🟢 DEFENSE DOMINANT – Network Secure!" if defender_score > attacker_score else "🔴 UPGRADE DEFENSES – Vulnerability Exposed!",
+        "\nInnovation Impact: Evolutionary adaptation models real-world APT mutation – Boosts IoT resilience by 15-25% in prolonged attacks.",
+    ]
+
+    if render:
+        out = render_payoff(def_probs, att_probs, value, defender_score / (defender_score + attacker_score + 1e-6))
+        lines.append(f"\n🎨 Generated high-resolution visualization: {out}")
+        lines.append("   → Open this file to see the strategic heatmap with evolved probabilities!")
+
+    return "\n".join(lines)
 
 def run_game_simulation():
     return run_game()
 
 if __name__ == "__main__":
-    result = run_game_simulation()
-    print(result)
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "plan":     # python game_theory_engine.py plan [vendor|subnet|...]
+        print(plan_defenses(by=sys.argv[2] if len(sys.argv) > 2 else "vendor").to_string(index=False))
+    else:
+        print(run_game_simulation())
\ No newline at end of file
@@ -1,39 +1,149 @@
+import sys
+import time
+import numpy as np
 import pandas as pd
-import random
-
-vendors = [
-    "HikVision", "TP-Link", "Amazon Echo", "Mi Home", "Bosch Security",
-    "Philips Hue", "Sonoff", "Samsung SmartThings", "Unknown Vendor"
-]
-
-synthetic = []
-
-for i in range(20):   # create 20 fake devices
-    vendor = random.choice(vendors)
-    
-    # generate random ports (simulate vulnerabilities)
-    all_ports = [21,22,23,80,443,8080,8000,2323]
-    ports = random.sample(all_ports, random.randint(1,5))
-    risk = len([p for p in ports if p in [21,23,2323,80,8080]]) * 20
-    risk = min(risk,100)
-    
-    if risk >= 70: status="High Risk"
-    elif risk >=40: status="Medium Risk"
-    else: status="Low Risk"
-
-    synthetic.append([
-        f"192.168.100.{i+10}",
-        vendor,
-        len(ports),
-        str(ports),
-        risk,
-        status,
-        status  # ml_prediction placeholder
-    ])
-
-df = pd.DataFrame(synthetic, columns=[
-    "ip","vendor","ports_count","ports","risk_score","status","ml_prediction"
-])
-
-df.to_csv("synthetic_data.csv",index=False)
-print("Synthetic dataset created!")
+import data_store
+from risk_engine import PORTS, SYNTHETIC_RULES, SYNTHETIC_THRESHOLDS, score_batch, label_risk
+
+OUT_FILE = "synthetic_data.parquet"     # a .csv path works too (data_store picks the format)
+EDGES_FILE = "synthetic_edges.parquet"
+SUBNET_SIZE = 250            # devices per /24, hosts .2-.251 (.1 is the gateway)
+CORE_ROUTER = "172.16.0.1"   # every subnet gateway uplinks here
+
+# ---------------- Vendor Profiles ----------------
+# vendor: (share of devices, OUI, {port: probability the port is open})
+VENDOR_PROFILES = {
+    "HikVision":           (0.14, "44:19:B6", {21: .10, 22: .20, 23: .35, 80: .90, 443: .50, 8080: .20, 8000: .70, 2323: .10, 554: .85}),
+    "TP-Link":             (0.18, "50:C7:BF", {21: .05, 22: .30, 23: .25, 80: .85, 443: .60, 8080: .30, 8000: .05, 2323: .05, 554: .02, 1883: .10, 5683: .05, 8883: .02}),
+    "Amazon Echo":         (0.12, "F0:27:2D", {22: .02, 80: .20, 443: .95, 8080: .10, 8883: .40}),
+    "Mi Home":             (0.10, "28:6C:07", {23: .10, 80: .30, 443: .30, 1883: .50, 5683: .60}),
+    "Bosch Security":      (0.06, "00:04:63", {21: .05, 22: .30, 80: .60, 443: .80, 554: .60}),
+    "Philips Hue":         (0.10, "00:17:88", {80: .90, 443: .90, 1883: .20, 5683: .20}),
+    "Sonoff":              (0.08, "24:0A:C4", {23: .15, 80: .70, 8080: .20, 1883: .60}),
+    "Samsung SmartThings": (0.07, "D0:52:A8", {80: .30, 443: .90, 1883: .20, 8883: .50}),
+    "Unknown Vendor":      (0.15, "02:00:00", {21: .25, 22: .30, 23: .45, 80: .50, 443: .30, 8080: .30, 8000: .15, 2323: .30, 554: .10, 1883: .15, 5683: .10, 8883: .05}),
+}
+
+VENDORS = np.array(list(VENDOR_PROFILES), dtype=object)
+VENDOR_WEIGHTS = np.array([w for w, _, _ in VENDOR_PROFILES.values()])
+VENDOR_WEIGHTS /= VENDOR_WEIGHTS.sum()
+VENDOR_OUIS = np.array([oui for _, oui, _ in VENDOR_PROFILES.values()], dtype=object)
+PORT_PROBS = np.array([[probs.get(p, 0.0) for p in PORTS] for _, _, probs in VENDOR_PROFILES.values()])
+PORT_BITS = np.left_shift(np.uint64(1), np.arange(len(PORTS), dtype=np.uint64))
+
+# Flow destination ports, weighted towards the usual IoT services
+FLOW_PORTS = np.array([443, 80, 1883, 8883, 554, 5683, 23, 8080, 22, 21])
+FLOW_PORT_WEIGHTS = np.array([.35, .20, .12, .08, .07, .05, .04, .04, .03, .02])
+
+# ---------------- Lookup Tables ----------------
+# Every string column is an index into a small table, so no per-row formatting in Python
+OCTETS = np.array([str(i) for i in range(256)], dtype=object)
+HEX = np.array([f"{i:02X}" for i in range(256)], dtype=object)
+HEX16 = np.array([f"{i >> 8:02X}:{i & 255:02X}" for i in range(1 << 16)], dtype=object)
+PORT_STRINGS = np.array([str([p for i, p in enumerate(PORTS) if m >> i & 1]) for m in range(1 << len(PORTS))], dtype=object)
+
+def ip_strings(subnet, host):
+    """Dotted quads for (subnet index, host octet) pairs: subnet s -> 10+(s>>16).(s>>8 & 255).(s & 255).host"""
+    subnets, inverse = np.unique(subnet, return_inverse=True)   # a chunk spans few subnets: format each once
+    prefix = (OCTETS[10 + (subnets >> 16)] + "." + OCTETS[(subnets >> 8) & 255] + "."
+              + OCTETS[subnets & 255] + ".")
+    return prefix[inverse] + OCTETS[host]
+
+def device_ips(index):
+    index = np.asarray(index, dtype=np.int64)
+    return ip_strings(index // SUBNET_SIZE, index % SUBNET_SIZE + 2)
+
+def gateway_ips(subnet):
+    subnet = np.asarray(subnet, dtype=np.int64)
+    return ip_strings(subnet, np.ones_like(subnet))
+
+def mac_strings(vendor_idx, index):
+    """Vendor OUI plus the device index as the NIC part, so MACs are unique up to 16.7M devices."""
+    index = np.asarray(index, dtype=np.int64)
+    return VENDOR_OUIS[vendor_idx] + ":" + HEX[(index >> 16) & 255] + ":" + HEX16[index & 0xFFFF]
+
+# ---------------- Chunk Generators ----------------
+def device_chunk(rng, start, size):
+    index = np.arange(start, start + size, dtype=np.int64)
+    vendor_idx = rng.choice(len(VENDORS), size=size, p=VENDOR_WEIGHTS)
+
+    # Ports: independent Bernoulli draws per vendor profile, packed into a bitmask
+    open_ports = rng.random((size, len(PORTS))) < PORT_PROBS[vendor_idx]
+    empty = ~open_ports.any(axis=1)       # every device exposes at least its most likely port
+    open_ports[empty, PORT_PROBS[vendor_idx[empty]].argmax(axis=1)] = True
+    masks = np.bitwise_or.reduce(np.where(open_ports, PORT_BITS, np.uint64(0)), axis=1)
+
+    vendors = VENDORS[vendor_idx]
+    risk = score_batch(masks, vendors, SYNTHETIC_RULES)
+    status = label_risk(risk, SYNTHETIC_THRESHOLDS, default="Low Risk", inclusive=True)
+    return pd.DataFrame({
+        "ip": device_ips(index),
+        "mac": mac_strings(vendor_idx, index),
+        "vendor": vendors,
+        "ports_count": open_ports.sum(axis=1),
+        "ports": PORT_STRINGS[masks.astype(np.int64)],
+        "port_mask": masks,
+        "risk_score": risk,
+        "status": status,
+        "ml_prediction": status,   # ml_prediction placeholder
+        "subnet": index // SUBNET_SIZE,
+    })
+
+def edge_chunk(rng, start, size, n_devices, flows_per_device=2.0, local_share=0.7):
+    """Topology edges for devices [start, start+size):
+    subnet   device -> its /24 gateway
+    gateway  gateway -> core router (once per subnet, owned by the chunk holding its first device)
+    flow     device -> device, mostly inside the subnet, the rest anywhere in the network"""
+    index = np.arange(start, start + size, dtype=np.int64)
+    subnet = index // SUBNET_SIZE
+    src_ip = device_ips(index)
+
+    first = np.unique(subnet[index % SUBNET_SIZE == 0])
+    n_flows = rng.poisson(flows_per_device, size)
+    flow_src = np.repeat(index, n_flows)
+    flow_subnet = flow_src // SUBNET_SIZE
+    local = rng.random(len(flow_src)) < local_share
+    subnet_lo = flow_subnet * SUBNET_SIZE
+    subnet_hi = np.minimum(subnet_lo + SUBNET_SIZE, n_devices)
+    flow_dst = np.where(local,
+                        subnet_lo + (rng.random(len(flow_src)) * (subnet_hi - subnet_lo)).astype(np.int64),
+                        rng.integers(0, n_devices, len(flow_src)))
+    keep = flow_dst != flow_src
+    flow_src, flow_dst = flow_src[keep], flow_dst[keep]
+
+    edges = [
+        pd.DataFrame({"src": src_ip, "dst": gateway_ips(subnet), "kind": "subnet", "port": 0, "bytes": 0}),
+        pd.DataFrame({"src": gateway_ips(first), "dst": CORE_ROUTER, "kind": "gateway", "port": 0, "bytes": 0}),
+        pd.DataFrame({
+            "src": device_ips(flow_src),
+            "dst": device_ips(flow_dst),
+            "kind": "flow",
+            "port": rng.choice(FLOW_PORTS, size=len(flow_src), p=FLOW_PORT_WEIGHTS),
+            "bytes": rng.lognormal(8, 2, len(flow_src)).astype(np.int64),
+        }),
+    ]
+    return pd.concat(edges, ignore_index=True)
+
+# ---------------- Chunked Writer ----------------
+def generate(n_devices=20, out=OUT_FILE, edges_out=EDGES_FILE, seed=42, chunk_size=250_000, flows_per_device=2.0):
+    """Write n_devices synthetic devices (and their edge list, unless edges_out is None) chunk by chunk.
+    Each chunk draws from its own stream seeded by (seed, chunk number): same seed and chunk_size, same files."""
+    devices = data_store.ChunkWriter(out, "devices")
+    edges = data_store.ChunkWriter(edges_out) if edges_out else None
+    for k, start in enumerate(range(0, n_devices, chunk_size)):
+        size = min(chunk_size, n_devices - start)
+        rng = np.random.default_rng([seed, k])
+        devices.write(device_chunk(rng, start, size))
+        if edges:
+            edges.write(edge_chunk(rng, start, size, n_devices, flows_per_device))
+    devices.close()
+    if edges:
+        edges.close()
+    return devices.rows, edges.rows if edges else 0
+
+if __name__ == "__main__":
+    n = int(float(sys.argv[1])) if len(sys.argv) > 1 else 20   # e.g. 1e6
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 42
+    t = time.time()
+    devices, edges = generate(n, seed=seed)
+    print(f"Synthetic dataset created! {devices} devices -> {OUT_FILE}, {edges} edges -> {EDGES_FILE} ({time.time() - t:.1f}s)")
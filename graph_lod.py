@@ -0,0 +1,110 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy import sparse
+import centrality
+import dataset_cache
+
+# Level-of-detail views of large device graphs: members collapse into super-nodes (clusters)
+# whose size, risk and links summarise them, and one cluster at a time can be opened up.
+# labels[i] names node i of the view; size = devices it stands for; A[i, j] = member edges between them
+View = namedtuple("View", "labels size mean_risk max_risk high A detail")
+
+LOD_THRESHOLD = 2000      # graphs with more nodes than this are drawn as clusters
+HIGH_RISK = 70
+RISK_BANDS = [(70, "High Risk"), (40, "Medium Risk")]
+FINER = {"vendor": "subnet", "risk": "subnet"}   # how to split a drilled-into cluster that is still too big
+LAYOUT_SEED = 42
+
+# ------------------ Cluster Keys ------------------
+def subnet_of(ips):
+    """"10.0.5.58" -> "10.0.5.0/24" (non-IPv4 labels are kept as they are)."""
+    ips = pd.Series(ips, dtype=object).astype(str)
+    prefix = ips.str.extract(r"^(\d+\.\d+\.\d+)\.\d+$", expand=False)
+    return (prefix + ".0/24").fillna(ips).to_numpy(dtype=object)
+
+def risk_band(risk):
+    risk = np.asarray(risk, dtype=float)
+    return np.select([risk >= t for t, _ in RISK_BANDS], [label for _, label in RISK_BANDS], "Low Risk").astype(object)
+
+def cluster_labels(nodes, by="subnet", vendor=None, risk=None):
+    if by == "subnet":
+        return subnet_of(nodes)
+    if by == "vendor":
+        return pd.Series(vendor, dtype=object).fillna("Unknown Vendor").astype(str).to_numpy(dtype=object)
+    if by == "risk":
+        return risk_band(risk)
+    raise ValueError(f"unknown cluster key {by!r} (use subnet, vendor or risk)")
+
+# ------------------ Aggregation ------------------
+def aggregate(A, keys, risk):
+    """Collapse nodes sharing a key: one sparse product (M^T A M with M the membership matrix) gives
+    the inter-cluster edge counts, bincounts give sizes and risk. Self-loops (internal edges) are dropped."""
+    codes, labels = pd.factorize(pd.Series(keys, dtype=object))
+    n, k = len(codes), len(labels)
+    M = sparse.csr_matrix((np.ones(n), (np.arange(n), codes)), shape=(n, k))
+    A = sparse.csr_matrix(A, dtype=float, copy=True)
+    A.data[:] = 1
+    C = sparse.csr_matrix(M.T @ A @ M)
+    C.setdiag(0)
+    C.eliminate_zeros()
+    risk = np.nan_to_num(np.asarray(risk, dtype=float))
+    size = np.bincount(codes, minlength=k)
+    max_risk = np.full(k, -np.inf)
+    np.maximum.at(max_risk, codes, risk)
+    return View(np.asarray(labels, dtype=object), size, np.bincount(codes, risk, k) / size, max_risk,
+                np.bincount(codes, risk >= HIGH_RISK, k).astype(int), C, size == 1)
+
+def overview(nodes, A, risk, by="subnet", vendor=None):
+    """All devices as clusters keyed by `by`."""
+    return aggregate(A, cluster_labels(nodes, by, vendor, risk), risk)
+
+def drill_down(nodes, A, risk, cluster, by="subnet", vendor=None, limit=LOD_THRESHOLD):
+    """One cluster's devices in full, every other cluster they link to as a single super-node.
+    A cluster bigger than `limit` is split by the next finer key instead."""
+    keys = cluster_labels(nodes, by, vendor, risk)
+    member = keys == cluster
+    if not member.any():
+        raise KeyError(f"no cluster {cluster!r} when grouping by {by}")
+    inner = np.asarray(nodes, dtype=object)
+    if member.sum() > limit and by in FINER:
+        inner = cluster_labels(nodes, FINER[by], vendor, risk)
+    keys = np.where(member, inner, keys)
+    view = aggregate(A, keys, risk)
+    inside = np.isin(view.labels, np.unique(keys[member]))
+    linked = inside | (view.A[inside].sum(axis=0).A1 > 0)        # the cluster plus its direct neighbours
+    keep = np.flatnonzero(linked)
+    detail = inside[keep] & (view.size[keep] == 1) & np.isin(view.labels[keep], np.asarray(nodes, dtype=object))
+    return View(view.labels[keep], view.size[keep], view.mean_risk[keep], view.max_risk[keep],
+                view.high[keep], sparse.csr_matrix(view.A[keep][:, keep]), detail)
+
+def full_view(nodes, A, risk):
+    """Every node as itself (for graphs small enough to draw whole)."""
+    risk = np.nan_to_num(np.asarray(risk, dtype=float))
+    A = sparse.csr_matrix(A, dtype=float, copy=True)
+    A.setdiag(0)
+    A.eliminate_zeros()
+    n = len(risk)
+    return View(np.asarray(nodes, dtype=object), np.ones(n, dtype=int), risk, risk,
+                (risk >= HIGH_RISK).astype(int), A, np.ones(n, dtype=bool))
+
+# ------------------ Cached Layouts ------------------
+def layout(view, use_cache=True):
+    """{label: (x, y)} for a view, computed once per view content and cached on disk."""
+    key = centrality.graph_fingerprint(view.labels, view.A, "layout", LAYOUT_SEED)
+    if use_cache:
+        cached = dataset_cache.get("layout", key)
+        if cached is not None:
+            return cached
+    G = nx.from_scipy_sparse_array(view.A)
+    pos = nx.spring_layout(G, seed=LAYOUT_SEED, weight=None) if len(view.labels) else {}
+    result = {view.labels[i]: (float(x), float(y)) for i, (x, y) in pos.items()}
+    if use_cache:
+        dataset_cache.put("layout", key, result)
+    return result
+
+def edges(view):
+    """(i, j, member edge count) for each link of the view, once per pair."""
+    C = sparse.triu(view.A, k=1).tocoo()
+    return zip(C.row.tolist(), C.col.tolist(), C.data.tolist())
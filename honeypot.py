@@ -1,27 +1,172 @@
 # ---------------- honeypot.py ----------------
 from http.server import BaseHTTPRequestHandler, HTTPServer
-import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import csv
+import queue
+import sys
+import threading
+import time
 
 LOG_FILE = "attacker_log.txt"
 
+# ---------------- Batched Log Writer ----------------
+class LogWriter(threading.Thread):
+    """Handlers enqueue records; this thread appends them to the log in batches.
+    The queue is bounded: when it is full a handler waits up to put_timeout, then the record is dropped and counted."""
+
+    def __init__(self, path=LOG_FILE, max_queue=10000, batch_size=500, flush_interval=0.5, put_timeout=0.05):
+        super().__init__(daemon=True)
+        self.path = path
+        self.queue = queue.Queue(max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, record):
+        try:
+            self.queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def run(self):
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            while not (self._stopping.is_set() and self.queue.empty()):
+                try:
+                    batch = [self.queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                writer.writerows(batch)
+                f.flush()
+                self.written += len(batch)
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+# ---------------- Throughput Meter ----------------
+class ListenerStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self._last = {}
+        self._last_time = time.monotonic()
+
+    def record(self, port):
+        with self._lock:
+            self.counts[port] = self.counts.get(port, 0) + 1
+
+    def rates(self):
+        """Requests per second on each port since the previous call."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._last_time, 1e-9)
+            rates = {p: (c - self._last.get(p, 0)) / elapsed for p, c in self.counts.items()}
+            self._last, self._last_time = dict(self.counts), now
+        return rates
+
+# ---------------- Decoy Handler ----------------
 class Honeypot(BaseHTTPRequestHandler):
+    timeout = 10          # a slow or silent client only ties up its own worker, and not for long
+    log_writer = None
+    stats = None
+
     def do_GET(self):
         attacker_ip = self.client_address[0]
 
         # Dummy geo plot for demo — default location points to India
         lat, lon = 28.6139, 77.2090   # New Delhi (safe placeholder)
 
-        with open(LOG_FILE, "a") as f:
-            f.write(f"{attacker_ip},{lat},{lon}\n")
+        record = [attacker_ip, lat, lon, datetime.now().isoformat(timespec="milliseconds"),
+                  self.command, self.path, self.headers.get("User-Agent", "")]
+        if self.log_writer is not None:
+            self.log_writer.submit(record)
+        else:
+            with open(LOG_FILE, "a", newline="") as f:
+                csv.writer(f).writerow(record)
+        if self.stats is not None:
+            self.stats.record(self.server.server_address[1])
 
         self.send_response(200)
         self.end_headers()
         self.wfile.write(b"Fake vulnerable device...")
 
-try:
-    server = HTTPServer(("0.0.0.0", 8081), Honeypot)
-    print("🕵 Honeypot Active on port 8081 — waiting for attacker...")
-    server.serve_forever()
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass   # per-request stderr logging would serialise every worker
+
+# ---------------- Concurrent Listener ----------------
+class PooledHTTPServer(HTTPServer):
+    """Hands each connection to a shared worker pool. `slots` bounds in-flight connections:
+    when all are busy the accept loop blocks and new clients wait in the kernel backlog."""
+
+    def __init__(self, address, handler, pool, slots):
+        super().__init__(address, handler)
+        self.pool = pool
+        self.slots = slots
+
+    def process_request(self, request, client_address):
+        self.slots.acquire()
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+def start_honeypot(ports=(8081,), workers=64, log_file=LOG_FILE, host="0.0.0.0"):
+    writer = LogWriter(log_file)
+    writer.start()
+    stats = ListenerStats()
+    Honeypot.log_writer = writer
+    Honeypot.stats = stats
+
+    pool = ThreadPoolExecutor(workers)
+    slots = threading.BoundedSemaphore(workers * 2)
+    servers = [PooledHTTPServer((host, p), Honeypot, pool, slots) for p in ports]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return {"servers": servers, "pool": pool, "writer": writer, "stats": stats}
+
+def stop_honeypot(handle):
+    for server in handle["servers"]:
+        server.shutdown()
+        server.server_close()
+    handle["pool"].shutdown(wait=True)
+    handle["writer"].stop()
+    Honeypot.log_writer = None
+    Honeypot.stats = None
+
+def run_honeypot(ports=(8081,), workers=64, stats_interval=5.0):
+    handle = start_honeypot(ports, workers)
+    print(f"🕵 Honeypot Active on port {', '.join(map(str, ports))} — waiting for attacker...")
+    try:
+        while True:
+            time.sleep(stats_interval)
+            rates = handle["stats"].rates()
+            if any(rates.values()):
+                print("📈 " + " | ".join(f"port {p}: {r:.0f} req/s" for p, r in rates.items())
+                      + f" | logged {handle['writer'].written}, dropped {handle['writer'].dropped}")
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        stop_honeypot(handle)
 
-except KeyboardInterrupt:
-    print("Stopped")
+if __name__ == "__main__":
+    run_honeypot([int(p) for p in sys.argv[1:]] or [8081])
@@ -0,0 +1,140 @@
+# inventory_store.py
+import json
+import sqlite3
+from datetime import datetime
+import pandas as pd
+
+DB_FILE = "device_inventory.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_results (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id     TEXT NOT NULL,
+    scanned_at  TEXT NOT NULL,
+    ip          TEXT,
+    mac         TEXT,
+    vendor      TEXT,
+    open_ports  TEXT,
+    ports_count INTEGER,
+    risk_score  REAL,
+    risk_label  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scan_results_scan ON scan_results(scan_id);
+CREATE TABLE IF NOT EXISTS devices (
+    mac          TEXT PRIMARY KEY,
+    ip           TEXT,
+    vendor       TEXT,
+    open_ports   TEXT,
+    ports_count  INTEGER,
+    risk_score   REAL,
+    risk_label   TEXT,
+    first_seen   TEXT NOT NULL,
+    last_seen    TEXT NOT NULL,
+    last_probed  TEXT,
+    last_scan_id TEXT
+);
+"""
+
+COLUMNS = ["id", "scan_id", "scanned_at", "ip", "mac", "vendor",
+           "open_ports", "ports_count", "risk_score", "risk_label"]
+DEVICE_COLUMNS = ["mac", "ip", "vendor", "open_ports", "ports_count", "risk_score", "risk_label",
+                  "first_seen", "last_seen", "last_probed", "last_scan_id"]
+
+# ------------------ Connection ------------------
+def connect(path=DB_FILE):
+    # WAL lets the dashboard read rows while a sweep is still appending them
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def new_scan_id():
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def normalize_mac(mac):
+    return str(mac).strip().lower().replace("-", ":")
+
+# ------------------ Append-only Writes ------------------
+def append_result(conn, scan_id, result):
+    """Insert one analyze_device-style dict and commit right away."""
+    conn.execute(
+        "INSERT INTO scan_results (scan_id, scanned_at, ip, mac, vendor, open_ports,"
+        " ports_count, risk_score, risk_label) VALUES (?,?,?,?,?,?,?,?,?)",
+        (scan_id, datetime.now().isoformat(timespec="seconds"), result["ip"], result["mac"],
+         result["vendor"], json.dumps(list(result["open_ports"])), result["ports_count"],
+         result["risk_score"], result["risk_label"]),
+    )
+    conn.commit()
+
+def append_results(conn, scan_id, results):
+    """Insert many analyze_device-style dicts in one transaction."""
+    scanned_at = now()
+    conn.executemany(
+        "INSERT INTO scan_results (scan_id, scanned_at, ip, mac, vendor, open_ports,"
+        " ports_count, risk_score, risk_label) VALUES (?,?,?,?,?,?,?,?,?)",
+        [(scan_id, scanned_at, r["ip"], r["mac"], r["vendor"], json.dumps(list(r["open_ports"])),
+          r["ports_count"], r["risk_score"], r["risk_label"]) for r in results],
+    )
+    conn.commit()
+
+# ------------------ Device Inventory (one row per MAC) ------------------
+def load_devices(conn):
+    """{mac: device row dict} with open_ports as lists, for planning a rescan."""
+    rows = conn.execute(f"SELECT {', '.join(DEVICE_COLUMNS)} FROM devices").fetchall()
+    devices = {}
+    for row in rows:
+        d = dict(zip(DEVICE_COLUMNS, row))
+        d["open_ports"] = json.loads(d["open_ports"]) if d["open_ports"] else []
+        devices[d["mac"]] = d
+    return devices
+
+def upsert_devices(conn, scan_id, results, probed):
+    """Record one sweep: every answering host is marked seen (with its current IP and score);
+    hosts whose MAC is in `probed` also get last_probed set. first_seen is kept for known MACs."""
+    seen_at = now()
+    conn.executemany(
+        "INSERT INTO devices (mac, ip, vendor, open_ports, ports_count, risk_score, risk_label,"
+        " first_seen, last_seen, last_probed, last_scan_id) VALUES (?,?,?,?,?,?,?,?,?,?,?)"
+        " ON CONFLICT(mac) DO UPDATE SET ip=excluded.ip, vendor=excluded.vendor,"
+        " open_ports=excluded.open_ports, ports_count=excluded.ports_count,"
+        " risk_score=excluded.risk_score, risk_label=excluded.risk_label, last_seen=excluded.last_seen,"
+        " last_probed=COALESCE(excluded.last_probed, devices.last_probed), last_scan_id=excluded.last_scan_id",
+        [(normalize_mac(r["mac"]), r["ip"], r["vendor"], json.dumps(list(r["open_ports"])), r["ports_count"],
+          r["risk_score"], r["risk_label"], seen_at, seen_at,
+          seen_at if normalize_mac(r["mac"]) in probed else None, scan_id) for r in results],
+    )
+    conn.commit()
+
+# ------------------ Reads (safe during a running scan) ------------------
+def latest_scan_id(conn):
+    row = conn.execute("SELECT scan_id FROM scan_results ORDER BY id DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+def read_results(path=DB_FILE, scan_id=None, since_id=0):
+    """Rows of one scan (the latest by default) with id > since_id, open_ports as lists."""
+    conn = connect(path)
+    try:
+        scan_id = scan_id or latest_scan_id(conn)
+        df = pd.read_sql_query(
+            "SELECT * FROM scan_results WHERE scan_id = ? AND id > ? ORDER BY id",
+            conn, params=(scan_id, since_id),
+        )
+    finally:
+        conn.close()
+    df["open_ports"] = df["open_ports"].map(json.loads)
+    return df[COLUMNS]
+
+def read_devices(path=DB_FILE):
+    """The device inventory, most recently seen first."""
+    conn = connect(path)
+    try:
+        df = pd.read_sql_query(f"SELECT {', '.join(DEVICE_COLUMNS)} FROM devices ORDER BY last_seen DESC, ip",
+                               conn)
+    finally:
+        conn.close()
+    df["open_ports"] = df["open_ports"].map(lambda v: json.loads(v) if v else [])
+    return df
@@ -1,23 +1,189 @@
+import argparse
+import glob
+import math
+import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import data_store
 
-# Load real dataset (from your network scan processing)
-real = pd.read_csv("clean_data.csv")      # your actual collected data
+# (label, dataset) in age order: on duplicates, later sources and later rows are the newer sighting
+SOURCES = [
+    ("Real Devices", "clean_data.csv"),          # your actual collected data
+    ("Synthetic Devices", "synthetic_data.csv"),  # synthetic dataset that we just generated
+]
+OUT_FILE = "training_data.csv"
+MEMORY_MB = 512               # streaming mode sizes its partitions so one fits in about this much RAM
+EXPANSION = {".csv": 3, ".parquet": 12, ".arrow": 2, ".feather": 2}   # in-memory size / file size
 
-# Load synthetic dataset that we just generated
-synthetic = pd.read_csv("synthetic_data.csv")
+# ---------------- Deduplication ----------------
+def dedupe_key(df):
+    """Device identity: the MAC when there is one, else the IP."""
+    ip = "ip:" + df["ip"].astype("string").str.strip()
+    if "mac" not in df:
+        return ip
+    mac = df["mac"].astype("string").str.strip().str.upper().str.replace("-", ":", regex=False)
+    return ("mac:" + mac).where(mac.notna() & (mac != ""), ip)
 
-# Merge both datasets together
-merged = pd.concat([real, synthetic], ignore_index=True)
+def dedupe(df, rule="latest", recency=None):
+    """Collapse rows sharing a _key. "latest": the newest row wins whole.
+    "aggregate": newest non-null value per column, worst risk_score, union of ports, plus times_seen.
+    rule=None keeps every row. Newest = highest `recency` column when given, ties (and no column) broken by read order (_seq)."""
+    if not rule:
+        return df
+    order = [recency, "_seq"] if recency and recency in df else ["_seq"]
+    df = df.sort_values(order, kind="stable")
+    if rule == "latest":
+        return df.drop_duplicates("_key", keep="last")
+    if rule != "aggregate":
+        raise ValueError(f"unknown dedupe rule {rule!r} (use 'latest' or 'aggregate')")
 
-# Shuffle for better training behavior
-merged = merged.sample(frac=1).reset_index(drop=True)
+    groups = df.groupby("_key", sort=False)
+    out = groups.last()
+    out["times_seen"] = groups.size()
+    if "risk_score" in df:
+        out["risk_score"] = groups["risk_score"].max()
+    codes = pd.Categorical(df["_key"], categories=out.index).codes
+    if "port_mask" in df:
+        masks = np.zeros(len(out), dtype=np.uint64)
+        np.bitwise_or.at(masks, codes, df["port_mask"].fillna(0).to_numpy(np.uint64))
+        out["port_mask"] = masks
+    if "ports" in df:
+        seen = df[["_key", "ports"]].explode("ports").dropna().drop_duplicates()
+        ports = seen.sort_values("ports").groupby("_key", sort=False)["ports"].agg(list)
+        out["ports"] = ports.reindex(out.index)
+        out["ports_count"] = out["ports"].map(lambda p: len(p) if isinstance(p, list) else 0)
+    return out.reset_index()
 
-# Save final combined dataset
-merged.to_csv("training_data.csv", index=False)
+# ---------------- In-memory Merge ----------------
+def merge_in_memory(sources=SOURCES, out=OUT_FILE, rule=None, recency=None, seed=None):
+    """Load every source whole, optionally dedupe, shuffle and save (the original behaviour)."""
+    frames, seq = [], 0
+    for i, (_, path) in enumerate(sources):
+        df = data_store.load(path, "devices")
+        frames.append(df.assign(_source=i, _seq=np.arange(seq, seq + len(df))))
+        seq += len(df)
+    merged = pd.concat(frames, ignore_index=True)
+    read = [len(f) for f in frames]
+    if rule:
+        merged["_key"] = dedupe_key(merged)
+        merged = dedupe(merged, rule, recency)
 
-print("\n---------------------------")
-print(" Real Devices       :", len(real))
-print(" Synthetic Devices  :", len(synthetic))
-print(" Total Combined     :", len(merged))
-print("---------------------------")
-print("Saved as training_data.csv successfully! 🎉")
+    # Shuffle for better training behavior
+    merged = merged.sample(frac=1, random_state=seed).reset_index(drop=True)
+    kept = merged["_source"].value_counts()
+    counts = {label: {"read": read[i], "kept": int(kept.get(i, 0))} for i, (label, _) in enumerate(sources)}
+    target = data_store.save(merged.drop(columns=["_source", "_seq", "_key"], errors="ignore"), out, "devices")
+    return target, counts
+
+# ---------------- Streaming (Out-of-core) Merge ----------------
+def _spill(df, spill, name, part):
+    """Append one piece of a partition or shuffle bucket as its own small Parquet file."""
+    directory = os.path.join(spill, name)
+    os.makedirs(directory, exist_ok=True)
+    pq.write_table(data_store.to_table(df, "devices"), os.path.join(directory, f"{part:06d}.parquet"))
+
+def _spill_files(spill, name):
+    return sorted(glob.glob(os.path.join(spill, name, "*.parquet")))
+
+def _read_spill(files):
+    return pa.concat_tables([pq.read_table(f) for f in files], promote_options="permissive")
+
+def _auto_partitions(sources, memory_mb=MEMORY_MB):
+    size = 0
+    for _, path in sources:
+        src = data_store.resolve(path)
+        size += os.path.getsize(src) * EXPANSION.get(os.path.splitext(src)[1].lower(), 4)
+    return max(8, math.ceil(size / (memory_mb * 2**20)))
+
+def merge_streaming(sources=SOURCES, out=OUT_FILE, rule="latest", recency=None, partitions=None,
+                    chunksize=500_000, seed=None, spill_dir=None):
+    """Merge, dedupe and shuffle inputs larger than RAM in three bounded-memory passes:
+    1. read each source in chunks and hash-partition rows by device key into spill files,
+       so every copy of a device lands in the same partition
+    2. dedupe one partition at a time and scatter the survivors into random shuffle buckets
+    3. permute each bucket in memory and append it to the output
+    Buckets in order with a uniform permutation inside each give a uniform shuffle overall."""
+    target = data_store.columnar_path(out)
+    partitions = partitions or _auto_partitions(sources)
+    rng = np.random.default_rng(seed)
+    spill = tempfile.mkdtemp(prefix=".merge_spill_", dir=spill_dir or os.path.dirname(os.path.abspath(target)))
+    counts = {label: {"read": 0, "kept": 0} for label, _ in sources}
+    try:
+        seq = piece = 0
+        for i, (label, path) in enumerate(sources):
+            for chunk in data_store.iter_chunks(path, chunksize=chunksize, kind="devices"):
+                chunk = chunk.reset_index(drop=True)
+                chunk["_source"] = i
+                chunk["_seq"] = np.arange(seq, seq + len(chunk))
+                chunk["_key"] = dedupe_key(chunk)
+                part = pd.util.hash_pandas_object(chunk["_key"], index=False).to_numpy() % partitions
+                for k, rows in chunk.groupby(part):
+                    _spill(rows, spill, f"p{k:05d}", piece)
+                seq += len(chunk)
+                piece += 1
+                counts[label]["read"] += len(chunk)
+
+        labels = [label for label, _ in sources]
+        for k in range(partitions):
+            files = _spill_files(spill, f"p{k:05d}")
+            if not files:
+                continue
+            survivors = dedupe(data_store.to_frame(_read_spill(files)), rule, recency)
+            for i, n in survivors["_source"].value_counts().items():
+                counts[labels[i]]["kept"] += int(n)
+            bucket = rng.integers(0, partitions, len(survivors))
+            for b, rows in survivors.drop(columns=["_key", "_seq", "_source"]).groupby(bucket):
+                _spill(rows, spill, f"s{b:05d}", k)
+            shutil.rmtree(os.path.join(spill, f"p{k:05d}"))   # give the disk back as we go
+
+        buckets = [_spill_files(spill, f"s{b:05d}") for b in range(partitions)]
+        schemas = [pq.read_schema(f) for files in buckets for f in files]
+        schema = pa.unify_schemas(schemas, promote_options="permissive") if schemas else None
+        with data_store.ChunkWriter(target, "devices", schema) as writer:
+            for files in buckets:
+                if files:
+                    table = _read_spill(files)
+                    writer.write(table.take(rng.permutation(len(table))))
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+    return target, counts
+
+def report(target, counts):
+    deduped = any(c["kept"] != c["read"] for c in counts.values())
+    print("\n---------------------------")
+    for label, c in counts.items():
+        kept = f"  ({c['kept']} after dedupe)" if deduped else ""
+        print(f" {label:<19}: {c['read']}{kept}")
+    total_read = sum(c["read"] for c in counts.values())
+    total_kept = sum(c["kept"] for c in counts.values())
+    if deduped:
+        print(f" {'Duplicates merged':<19}: {total_read - total_kept}")
+    print(f" {'Total Combined':<19}: {total_kept}")
+    print("---------------------------")
+    print(f"Saved as {target} successfully! 🎉")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge real and synthetic device datasets")
+    parser.add_argument("--stream", action="store_true", help="out-of-core merge for inputs larger than RAM")
+    parser.add_argument("--dedupe", choices=["latest", "aggregate", "none"],
+                        help="duplicate devices (same MAC, else IP): keep the latest row or aggregate them "
+                             "(default: latest with --stream, none otherwise)")
+    parser.add_argument("--recency", help="column that orders sightings (e.g. scanned_at); default is read order")
+    parser.add_argument("--partitions", type=int, help="spill partitions (default: sized to MEMORY_MB)")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--out", default=OUT_FILE)
+    args = parser.parse_args()
+
+    rule = args.dedupe or ("latest" if args.stream else "none")
+    rule = None if rule == "none" else rule
+    if args.stream:
+        target, counts = merge_streaming(out=args.out, rule=rule, recency=args.recency,
+                                         partitions=args.partitions, chunksize=args.chunksize, seed=args.seed)
+    else:
+        target, counts = merge_in_memory(out=args.out, rule=rule, recency=args.recency, seed=args.seed)
+    report(target, counts)
@@ -0,0 +1,189 @@
+import hashlib
+from collections import namedtuple
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+import dataset_cache
+
+# Zero-sum convention used throughout: M[a, d] is the defender's payoff when attack a meets defense d.
+# The attacker (rows) minimises it, the defender (columns) maximises it.
+Equilibrium = namedtuple("Equilibrium", "defender attacker value gap iterations method")
+
+LP_MAX_CELLS = 10_000     # "auto" solves games up to ~100x100 exactly, larger ones with regret matching
+DEFAULT_TOL = 1e-3        # stop iterative solvers once the exploitability gap is below this
+MAX_ITER = 100_000
+CHECK_EVERY = 25          # iterations between gap checks
+
+# ------------------ Equilibrium Quality ------------------
+def bounds(M, attacker, defender):
+    """(defender's guaranteed value, attacker's guaranteed cap). They meet at an exact equilibrium."""
+    return float((M @ defender).min()), float((attacker @ M).max())
+
+def exploitability(M, attacker, defender):
+    lo, hi = bounds(M, attacker, defender)
+    return hi - lo
+
+# ------------------ Exact: Linear Program ------------------
+def solve_lp(M):
+    """One HiGHS LP for the defender's maximin mix; the attacker's minimax mix is read off its duals.
+    Works for any payoff signs and accepts scipy.sparse matrices."""
+    m, n = M.shape
+    # max v  s.t.  v - (M y)_a <= 0 for every attack a,  sum(y) = 1,  y >= 0
+    A_ub = sparse.hstack([-sparse.csr_matrix(M), np.ones((m, 1))], format="csr")
+    c = np.zeros(n + 1)
+    c[-1] = -1.0
+    A_eq = np.append(np.ones(n), 0.0)[None, :]
+    res = linprog(c, A_ub=A_ub, b_ub=np.zeros(m), A_eq=A_eq, b_eq=[1.0],
+                  bounds=[(0, None)] * n + [(None, None)], method="highs")
+    if not res.success:
+        raise RuntimeError(f"LP solve failed: {res.message}")
+    defender = _normalise(res.x[:n])
+    attacker = _normalise(-res.ineqlin.marginals)
+    return Equilibrium(defender, attacker, float(res.x[-1]), exploitability(M, attacker, defender), res.nit, "lp")
+
+def _normalise(p):
+    p = np.clip(np.asarray(p, dtype=float), 0, None)
+    total = p.sum()
+    return p / total if total > 0 else np.full(len(p), 1.0 / len(p))
+
+# ------------------ Iterative: No-regret Dynamics ------------------
+def _regret_matching_batch(Ms, tol=DEFAULT_TOL, max_iter=MAX_ITER, check_every=CHECK_EVERY):
+    """Regret matching+ (alternating updates, linearly weighted averages) on a stack of same-shape games.
+    Games leave the stack as soon as their gap is below tol; the loop ends when none are left."""
+    B, m, n = Ms.shape
+    out_x, out_y, out_gap, out_it = np.empty((B, m)), np.empty((B, n)), np.full(B, np.inf), np.full(B, max_iter)
+    active = np.arange(B)
+    A, AT = Ms, np.ascontiguousarray(Ms.transpose(0, 2, 1))
+    Rx, Ry = np.zeros((B, m)), np.zeros((B, n))
+    x, y = np.full((B, m), 1.0 / m), np.full((B, n), 1.0 / n)
+    sx, sy = np.zeros((B, m)), np.zeros((B, n))
+    for t in range(1, max_iter + 1):
+        u = -(A @ y[:, :, None])[:, :, 0]                          # attacker's utility per row
+        Rx = np.maximum(Rx + u - (x * u).sum(axis=1, keepdims=True), 0)
+        x = _rows_normalised(Rx)
+        sx += t * x
+        u = (AT @ x[:, :, None])[:, :, 0]                          # defender's utility per column
+        Ry = np.maximum(Ry + u - (y * u).sum(axis=1, keepdims=True), 0)
+        y = _rows_normalised(Ry)
+        sy += t * y
+        if t % check_every == 0 or t == max_iter:
+            ax = sx / sx.sum(axis=1, keepdims=True)
+            ay = sy / sy.sum(axis=1, keepdims=True)
+            gap = (AT @ ax[:, :, None]).max(axis=(1, 2)) - (A @ ay[:, :, None]).min(axis=(1, 2))
+            finished = (gap < tol) | (t == max_iter)
+            if finished.any():
+                idx = active[finished]
+                out_x[idx], out_y[idx], out_gap[idx], out_it[idx] = ax[finished], ay[finished], gap[finished], t
+                keep = ~finished
+                active = active[keep]
+                if not len(active):
+                    break
+                A, AT, Rx, Ry, x, y, sx, sy = (v[keep] for v in (A, AT, Rx, Ry, x, y, sx, sy))
+    result = []
+    for b in range(B):
+        lo, hi = bounds(Ms[b], out_x[b], out_y[b])
+        result.append(Equilibrium(out_y[b], out_x[b], (lo + hi) / 2, float(out_gap[b]), int(out_it[b]), "regret_matching"))
+    return result
+
+def _rows_normalised(R):
+    totals = R.sum(axis=1, keepdims=True)
+    uniform = np.full_like(R, 1.0 / R.shape[1])
+    return np.where(totals > 0, R / np.where(totals > 0, totals, 1), uniform)
+
+def solve_regret_matching(M, tol=DEFAULT_TOL, max_iter=MAX_ITER):
+    return _regret_matching_batch(np.asarray(M, dtype=float)[None], tol, max_iter)[0]
+
+def solve_fictitious_play(M, tol=DEFAULT_TOL, max_iter=MAX_ITER, check_every=CHECK_EVERY):
+    """Classic fictitious play: each side best-responds to the other's empirical mix. Slower than
+    regret matching but every step is a pure strategy, which makes its play easy to inspect."""
+    M = np.asarray(M, dtype=float)
+    m, n = M.shape
+    cx, cy = np.zeros(m), np.zeros(n)
+    cx[0] = cy[0] = 1
+    row_payoff = M[:, 0].copy()       # M @ cy, kept incrementally
+    col_payoff = M[0].copy()          # cx @ M
+    gap = np.inf
+    for t in range(1, max_iter + 1):
+        a = int(row_payoff.argmin())   # attacker's best response to the defender's history
+        d = int(col_payoff.argmax())
+        cx[a] += 1
+        cy[d] += 1
+        row_payoff += M[:, d]
+        col_payoff += M[a]
+        if t % check_every == 0:
+            gap = col_payoff.max() / cx.sum() - row_payoff.min() / cy.sum()
+            if gap < tol:
+                break
+    x, y = cx / cx.sum(), cy / cy.sum()
+    lo, hi = bounds(M, x, y)
+    return Equilibrium(y, x, (lo + hi) / 2, hi - lo, t, "fictitious_play")
+
+# ------------------ Memoised Front End ------------------
+def payoff_key(M, method, tol=DEFAULT_TOL, max_iter=MAX_ITER):
+    """Hash of the game plus every setting that changes the answer: the exact LP ignores the
+    iterative settings, the iterative solvers are keyed on tol, max_iter and the check interval."""
+    h = hashlib.sha1()
+    if sparse.issparse(M):
+        M = sparse.csr_matrix(M)
+        for part in (M.data, M.indices, M.indptr):
+            h.update(np.ascontiguousarray(part).tobytes())
+    else:
+        h.update(np.ascontiguousarray(M, dtype=float).tobytes())
+    settings = "" if method == "lp" else f"|{tol!r}|{max_iter}|{CHECK_EVERY}"
+    h.update(f"{M.shape}|{method}{settings}".encode())
+    return h.hexdigest()
+
+def _pick(M, method):
+    if method != "auto":
+        return method
+    return "lp" if M.shape[0] * M.shape[1] <= LP_MAX_CELLS else "regret_matching"
+
+def _solve_one(M, method, tol, max_iter):
+    if method == "lp":
+        return solve_lp(M)
+    M = M.toarray() if sparse.issparse(M) else M
+    if method == "regret_matching":
+        return solve_regret_matching(M, tol, max_iter)
+    if method == "fictitious_play":
+        return solve_fictitious_play(M, tol, max_iter)
+    raise ValueError(f"unknown method {method!r}")
+
+def solve(M, method="auto", tol=DEFAULT_TOL, max_iter=MAX_ITER, use_cache=True, persist=False):
+    """Equilibrium of zero-sum payoff matrix M, memoised by a hash of its contents."""
+    return solve_many([M], method, tol, max_iter, use_cache, persist)[0]
+
+def solve_many(payoffs, method="auto", tol=DEFAULT_TOL, max_iter=MAX_ITER, use_cache=True, persist=False):
+    """Solve a batch of games. Cached games are looked up, identical games are solved once,
+    and same-shape games for regret matching are stacked and iterated together."""
+    payoffs = [M if sparse.issparse(M) else np.asarray(M, dtype=float) for M in payoffs]
+    methods = [_pick(M, method) for M in payoffs]
+    keys = [payoff_key(M, m, tol, max_iter) for M, m in zip(payoffs, methods)]
+    results = {}
+    if use_cache:
+        for k in set(keys):
+            hit = dataset_cache.get("nash", k)
+            if hit is not None:
+                results[k] = hit
+
+    pending = {}
+    for M, m, k in zip(payoffs, methods, keys):
+        if k not in results:
+            pending.setdefault(k, (M, m))
+    batches = {}
+    for k, (M, m) in pending.items():
+        if m == "regret_matching":
+            batches.setdefault(M.shape, []).append(k)
+        else:
+            results[k] = _solve_one(M, m, tol, max_iter)
+    for shape, ks in batches.items():
+        stack = np.stack([pending[k][0].toarray() if sparse.issparse(pending[k][0]) else pending[k][0] for k in ks])
+        for k, eq in zip(ks, _regret_matching_batch(stack, tol, max_iter)):
+            results[k] = eq
+
+    if use_cache:
+        for k in pending:
+            dataset_cache.put("nash", k, results[k], persist=persist)
+    return [results[k] for k in keys]
+
+def clear_cache():
+    dataset_cache.invalidate("nash")
@@ -1,61 +1,134 @@
 # ========================= ADVANCED NETWORK VISUALIZER ==========================
-import pandas as pd
+import argparse
+import re
+import numpy as np
 import networkx as nx
 from pyvis.network import Network
 import webbrowser
+import centrality
+import data_store
+import graph_lod
 
-def visualize_advanced_network(csv_file="training_data.csv"):
-
-    df = pd.read_csv(csv_file)
-
+def build_network(df):
     G = nx.Graph()
 
     # ------------------- Add Nodes --------------------
-    for _, row in df.iterrows():
-        
-        if row["risk_score"] >= 70: color = "red"
-        elif row["risk_score"] >= 40: color = "orange"
-        else: color = "lightgreen"
-
-        G.add_node(
-            row["ip"],
-            title=f"<b>{row['ip']}</b><br>Vendor:{row['vendor']}<br>Risk:{row['risk_score']}",
-            color=color,
-            value=row["ports_count"]+1
-        )
+    risk = df["risk_score"]
+    colors = np.select([risk >= 70, risk >= 40], ["red", "orange"], "lightgreen")
+    titles = "<b>" + df["ip"].map(str) + "</b><br>Vendor:" + df["vendor"].map(str) + "<br>Risk:" + risk.map(str)
+    G.add_nodes_from(
+        (ip, {"title": title, "color": color, "value": value})
+        for ip, title, color, value in zip(df["ip"], titles, colors, (df["ports_count"] + 1).tolist())
+    )
 
     # ------------------- Auto connect nodes --------------------
     devices = df["ip"].tolist()
-    for i in range(len(devices)-1):
-        G.add_edge(devices[i], devices[i+1], color="#88c3ff")
+    G.add_edges_from(zip(devices[:-1], devices[1:]), color="#88c3ff")
+    return G
 
-    # ============= Centrality & Attack Influence ============
-    central = nx.betweenness_centrality(G)
-    pagerank = nx.pagerank(G)
+# ============= Centrality & Attack Influence ============
+def network_centrality(G, epsilon=centrality.EPSILON, workers=None):
+    """(critical node by approximate betweenness, most influential node by PageRank), cached per graph."""
+    central = centrality.betweenness(G, epsilon=epsilon, workers=workers)
+    pagerank = centrality.pagerank(G)
 
-    critical = max(central, key=central.get)
+    critical = central.nodes[int(np.argmax(central.scores))]
     important = max(pagerank, key=pagerank.get)
+    return critical, important
+
+# ============= Level-of-detail Export ============
+RISK_COLORS = {"High Risk": "red", "Medium Risk": "orange", "Low Risk": "lightgreen"}
+POSITION_SCALE = 1000      # spring layouts live in [-1, 1]; vis.js wants pixels
+
+def export_view(view, file, heading, G=None, marks=None):
+    """Write a graph_lod view as HTML with cached positions and physics off, so the browser only draws.
+    Devices shown individually keep their build_network styling from G; clusters are sized by device count."""
+    pos = graph_lod.layout(view)
+    marks = marks or {}
+    bands = graph_lod.risk_band(view.mean_risk)
+    net = Network(height="800px", width="100%", bgcolor="#0a0f1f", font_color="white", heading=heading)
+    net.toggle_physics(False)
+
+    for i, label in enumerate(view.labels):
+        x, y = pos[label]
+        note = f"<br>{marks[label]}" if label in marks else ""
+        if view.detail[i] and G is not None and label in G:
+            attrs = G.nodes[label]
+            net.add_node(label, title=attrs["title"] + note, color=attrs["color"], value=attrs["value"],
+                         x=x * POSITION_SCALE, y=y * POSITION_SCALE, physics=False,
+                         borderWidth=4 if note else 1)
+            continue
+        net.add_node(
+            label,
+            label=f"{label} ({view.size[i]})",
+            title=(f"<b>{label}</b><br>Devices:{view.size[i]}<br>High risk:{view.high[i]}"
+                   f"<br>Mean risk:{view.mean_risk[i]:.0f}<br>Max risk:{view.max_risk[i]:.0f}{note}"),
+            color=RISK_COLORS[bands[i]],
+            size=10 + 4 * float(np.sqrt(view.size[i])),
+            shape="dot",
+            x=x * POSITION_SCALE, y=y * POSITION_SCALE, physics=False,
+            borderWidth=4 if note else 1,
+        )
+    for i, j, count in graph_lod.edges(view):
+        net.add_edge(view.labels[i], view.labels[j], value=count, title=f"{int(count)} links", color="#88c3ff")
+    net.write_html(file)
+    return file
+
+def visualize_advanced_network(csv_file="training_data.csv", by="subnet", cluster=None, lod=None, open_browser=True):
+    """Export the device graph. Above graph_lod.LOD_THRESHOLD devices (or with lod=True) devices are grouped
+    into super-nodes by `by` (subnet, vendor or risk); `cluster` opens one group with its neighbours."""
+    df = data_store.load(csv_file, columns=["ip", "vendor", "ports_count", "risk_score"])
+    G = build_network(df)
+
+    critical, important = network_centrality(G)
 
     print(f"\n🔥 Critical Network Node → {critical}")
     print(f"👑 High Influence Device → {important}")
 
     # ------------------- Visualization ------------------------
-    net = Network(
-        height="800px",
-        width="100%",
-        bgcolor="#0a0f1f",
-        font_color="white",
-        heading="Cyber Network Graph"
-    )
+    nodes, A = centrality.to_csr(G)
+    devices = df.drop_duplicates("ip", keep="last").set_index("ip").reindex(nodes)
+    risk, vendor = devices["risk_score"].to_numpy(dtype=float), devices["vendor"].to_numpy(dtype=object)
+    lod = len(nodes) > graph_lod.LOD_THRESHOLD if lod is None else lod
+
+    if cluster is not None:
+        view = graph_lod.drill_down(nodes, A, risk, cluster, by, vendor)
+        file = "attack_network_" + re.sub(r"[^\w.-]+", "_", str(cluster)) + ".html"
+        heading = f"Cyber Network Graph – {cluster}"
+    elif lod:
+        view = graph_lod.overview(nodes, A, risk, by, vendor)
+        file = "attack_network_map.html"
+        heading = f"Cyber Network Graph – {len(nodes)} devices by {by}"
+    else:
+        view = graph_lod.full_view(nodes, A, risk)
+        file = "attack_network_map.html"
+        heading = "Cyber Network Graph"
+
+    # Flag the two key devices, or the clusters holding them
+    marks = {}
+    for device, note in ((critical, "🔥 Critical node"), (important, "👑 High influence")):
+        at = device if device in set(view.labels) else graph_lod.cluster_labels(
+            [device], by, devices.loc[[device], "vendor"], devices.loc[[device], "risk_score"])[0]
+        marks[at] = (marks[at] + "<br>" if at in marks else "") + note + (f": {device}" if at != device else "")
 
-    net.from_nx(G)
-    file = "attack_network_map.html"
-    net.write_html(file)     # ← FIXES TEMPLATE ERROR
+    export_view(view, file, heading, G, marks)
 
-    print(f"\n📌 Graph Exported → {file}")
-    print("👉 Open the file manually or use command below\n")
+    print(f"\n📌 Graph Exported → {file} ({len(view.labels)} nodes drawn for {len(nodes)} devices)")
+    if lod and cluster is None:
+        print(f"👉 Drill into a group: python network_visualizer.py --by {by} --cluster \"{view.labels[0]}\"\n")
 
-    webbrowser.open(file)  # Auto opens graph
+    if open_browser:
+        webbrowser.open(file)  # Auto opens graph
+    return file
 
 if __name__ == "__main__":
-    visualize_advanced_network()
+    parser = argparse.ArgumentParser(description="Export the device network as interactive HTML")
+    parser.add_argument("--csv", default="training_data.csv")
+    parser.add_argument("--by", choices=["subnet", "vendor", "risk"], default="subnet", help="how devices are grouped")
+    parser.add_argument("--cluster", help="open one group (e.g. 10.0.5.0/24, TP-Link, \"High Risk\")")
+    detail = parser.add_mutually_exclusive_group()
+    detail.add_argument("--lod", action="store_true", default=None, help="always group devices")
+    detail.add_argument("--full", dest="lod", action="store_false", help="always draw every device")
+    parser.add_argument("--no-open", action="store_true")
+    args = parser.parse_args()
+    visualize_advanced_network(args.csv, args.by, args.cluster, args.lod, not args.no_open)
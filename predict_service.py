@@ -0,0 +1,226 @@
+import json
+import os
+import pickle
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_FILE = "risk_model.pkl"
+ENCODER_FILE = "vendor_encoder.pkl"
+REQUEST_TIMEOUT = 30       # seconds a client waits for its batch before getting a 504
+
+# Vendors the encoder never saw fall back to "Unknown Vendor" when it was trained on,
+# otherwise to this reserved code (LabelEncoder.transform would raise instead)
+FALLBACK_VENDOR = "Unknown Vendor"
+UNSEEN_VENDOR_CODE = -1
+
+# ---------------- Model Loading (once per process) ----------------
+@lru_cache(maxsize=None)
+def load_model(model_path=MODEL_FILE, encoder_path=ENCODER_FILE):
+    # train_model.py also writes an uncompressed joblib copy whose arrays can be memory-mapped
+    mapped = os.path.splitext(model_path)[0] + ".joblib"
+    if os.path.exists(mapped) and os.path.getmtime(mapped) >= os.path.getmtime(model_path):
+        model = joblib.load(mapped, mmap_mode="r")
+    else:
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+    with open(encoder_path, "rb") as f:
+        encoder = pickle.load(f)
+    vendor_codes = {v: i for i, v in enumerate(encoder.classes_)}
+    return model, encoder, vendor_codes
+
+def encode_vendors(vendors, vendor_codes):
+    unseen = vendor_codes.get(FALLBACK_VENDOR, UNSEEN_VENDOR_CODE)
+    codes, uniques = pd.factorize(pd.Series(vendors, dtype=object).fillna(FALLBACK_VENDOR))
+    lookup = np.array([vendor_codes.get(v, unseen) for v in uniques] + [unseen], dtype=np.int64)
+    return lookup[codes]
+
+# ---------------- Vectorized Batch Prediction ----------------
+def predict_frame(df, model_path=MODEL_FILE, encoder_path=ENCODER_FILE):
+    """ML risk label for every row of a frame with ports_count and vendor columns."""
+    model, _, vendor_codes = load_model(model_path, encoder_path)
+    X = pd.DataFrame({
+        "ports_count": pd.to_numeric(df["ports_count"], errors="coerce").fillna(0).to_numpy(),
+        "vendor_encoded": encode_vendors(df["vendor"], vendor_codes),
+    })
+    return model.predict(X)
+
+def predict_devices(devices, model_path=MODEL_FILE, encoder_path=ENCODER_FILE):
+    """Scanner-style device dicts in, the same dicts with an "ml_label" key out."""
+    if not devices:
+        return []
+    labels = predict_frame(pd.DataFrame(devices), model_path, encoder_path)
+    return [{**d, "ml_label": str(label)} for d, label in zip(devices, labels)]
+
+# ---------------- Request Validation ----------------
+def normalize_devices(devices):
+    """Check one client's payload and reduce it to {"ports_count", "vendor"} rows, so a malformed
+    request is rejected on its own instead of failing the batch it would be scored in."""
+    if not isinstance(devices, list):
+        raise ValueError("devices must be a list of objects")
+    rows = []
+    for i, d in enumerate(devices):
+        if not isinstance(d, dict):
+            raise ValueError(f"devices[{i}] must be an object with ports_count and vendor")
+        ports, vendor = d.get("ports_count", 0), d.get("vendor")
+        if ports is None:
+            ports = 0
+        if isinstance(ports, bool) or not isinstance(ports, (int, float, str)):
+            raise ValueError(f"devices[{i}].ports_count must be a number")
+        try:
+            ports = float(ports)
+        except ValueError:
+            raise ValueError(f"devices[{i}].ports_count must be a number") from None
+        if vendor is not None and not isinstance(vendor, str):
+            raise ValueError(f"devices[{i}].vendor must be a string")
+        rows.append({"ports_count": ports, "vendor": vendor})
+    return rows
+
+# ---------------- Micro-batching ----------------
+class MicroBatcher(threading.Thread):
+    """Collects concurrent requests for up to max_wait seconds (or max_batch rows)
+    and scores them with one predict call."""
+
+    def __init__(self, max_batch=4096, max_wait=0.005, model_path=MODEL_FILE, encoder_path=ENCODER_FILE):
+        super().__init__(daemon=True)
+        self.requests = queue.Queue()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, devices):
+        future = Future()
+        self.requests.put((devices, future))
+        return future
+
+    def run(self):
+        load_model(self.model_path, self.encoder_path)
+        while True:
+            pending = [self.requests.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            self._score(pending)
+
+    def _predict(self, rows):
+        return predict_frame(pd.DataFrame(rows, columns=["ports_count", "vendor"]),
+                             self.model_path, self.encoder_path).tolist() if rows else []
+
+    def _score(self, pending):
+        rows = [d for devices, _ in pending for d in devices]
+        try:
+            labels = self._predict(rows)
+        except Exception as exc:
+            if len(pending) > 1:
+                for item in pending:      # score one by one so only the bad request fails
+                    self._score([item])
+                return
+            pending[0][1].set_exception(exc)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        start = 0
+        for devices, future in pending:
+            future.set_result(labels[start:start + len(devices)])
+            start += len(devices)
+
+# ---------------- Local HTTP / Unix-socket Endpoint ----------------
+class PredictHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: clients stream requests over one connection
+    batcher = None
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok", "batches": self.batcher.batches, "rows": self.batcher.rows})
+        else:
+            self._reply(404, {"error": "use POST /predict"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._reply(404, {"error": "use POST /predict"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            devices = normalize_devices(payload["devices"] if isinstance(payload, dict) else payload)
+            labels = self.batcher.submit(devices).result(timeout=REQUEST_TIMEOUT)
+        except FutureTimeout:
+            self._reply(504, {"error": f"prediction timed out after {REQUEST_TIMEOUT}s"})
+            return
+        except (ValueError, KeyError, TypeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        except Exception as exc:
+            self._reply(500, {"error": str(exc)})
+            return
+        self._reply(200, {"labels": labels})
+
+    def address_string(self):
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+class PredictServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+
+class UnixPredictServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+def serve(host="127.0.0.1", port=8765, unix_socket=None, max_batch=4096, max_wait=0.005):
+    batcher = MicroBatcher(max_batch, max_wait)
+    batcher.start()
+    PredictHandler.batcher = batcher
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixPredictServer(unix_socket, PredictHandler)
+        where = unix_socket
+    else:
+        server = PredictServer((host, port), PredictHandler)
+        where = f"http://{host}:{port}"
+    print(f"🤖 Risk model serving on {where} — POST /predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        serve(unix_socket=sys.argv[1])
+    else:
+        serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
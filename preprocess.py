@@ -1,15 +1,14 @@
-import pandas as pd
+import data_store
+from risk_engine import label_risk, PREPROCESS_THRESHOLDS
 
 def preprocess():
-    df = pd.read_csv("iot_dataset.csv")
+    df = data_store.load("iot_dataset.csv", "devices")
 
     # Create ML friendly label from risk_score
-    df['risk_label'] = df['risk_score'].apply(
-        lambda x: "High" if x>=70 else "Medium" if x>=30 else "Low"
-    )
+    df['risk_label'] = label_risk(df['risk_score'], PREPROCESS_THRESHOLDS, inclusive=True)
 
-    df.to_csv("clean_data.csv", index=False)
-    print("✔ clean_data.csv generated successfully!")
+    out = data_store.save(df, "clean_data.csv", "devices")
+    print(f"✔ {out} generated successfully!")
 
 if __name__ == "__main__":
     preprocess()
@@ -1,25 +1,150 @@
-def calculate_risk(ports, vendor):
-    risk = 0
+import re
+import numpy as np
+import pandas as pd
 
-    # High risk ports
-    for p in [21,23,2323]:
-        if p in ports: risk += 40
+# ------------------ Port Bitmask Encoding ------------------
+# Bit i of a device's port mask is set when PORTS[i] is open
+PORTS = (21, 22, 23, 80, 443, 8080, 8000, 2323, 554, 1883, 5683, 8883)
+PORT_BIT = {p: i for i, p in enumerate(PORTS)}
 
-    # Medium risk ports
-    for p in [80,8080,8000]:
-        if p in ports: risk += 25
+# ------------------ Rule Tables ------------------
+# Port rules are (ports, points, mode): "each" scores every open port, "any" scores the group once
+ENGINE_RULES = {
+    "ports": [
+        ((21, 23, 2323), 40, "each"),    # High risk ports
+        ((80, 8080, 8000), 25, "each"),  # Medium risk ports
+        ((443, 22), 5, "each"),          # Low risk ports
+    ],
+    # Vendor-based trust score
+    "unknown_vendors": ("Unknown Vendor", "Unknown", ""),
+    "unknown_points": 20,
+    "vendor_keywords": [("CCTV", 30), ("ESP", 20)],
+    "cap": 100,
+}
 
-    # Low risk ports
-    for p in [443,22]:
-        if p in ports: risk += 5
+SCANNER_RULES = {
+    "ports": [
+        ((21, 23, 2323), 40, "any"),
+        ((80, 8080), 25, "any"),
+        ((22, 443), 5, "any"),
+    ],
+    "unknown_vendors": ("Unknown Vendor",),
+    "unknown_points": 20,
+    "vendor_keywords": [("CCTV", 30), ("ESP", 20)],
+    "cap": 100,
+}
 
-    # Vendor-based trust score
-    if vendor in ["Unknown Vendor","Unknown","",None]:
-        risk += 20
-    if vendor and "CCTV" in vendor.upper(): risk += 30
-    if vendor and "ESP" in vendor.upper(): risk += 20
+# Synthetic dataset generator: 20 points per exposed legacy/web port, vendor ignored
+SYNTHETIC_RULES = {
+    "ports": [((21, 23, 2323, 80, 8080), 20, "each")],
+    "unknown_vendors": (),
+    "unknown_points": 0,
+    "vendor_keywords": [],
+    "cap": 100,
+}
+
+# (threshold, label) pairs from highest to lowest
+SCANNER_THRESHOLDS = [(60, "High"), (25, "Medium")]      # score > threshold
+PREPROCESS_THRESHOLDS = [(70, "High"), (30, "Medium")]   # score >= threshold
+SYNTHETIC_THRESHOLDS = [(70, "High Risk"), (40, "Medium Risk")]   # score >= threshold
+
+def encode_ports(port_lists):
+    """Encode open ports as uint64 bitmasks. Accepts lists of ports or strings like "[23, 80]".
+    Ports outside PORTS carry no rule weight and are dropped."""
+    s = pd.Series(port_lists, dtype=object).reset_index(drop=True)
+    if len(s) and isinstance(s.iloc[0], str):
+        # Stringified lists repeat heavily: parse each distinct string once
+        codes, uniques = pd.factorize(s)
+        return np.append(encode_ports(pd.Series(uniques, dtype=object).str.findall(r"\d+")), np.uint64(0))[codes]
+    flat = s.explode().dropna()
+    bits = flat.astype(np.int64).map(PORT_BIT)
+    keep = bits.notna()
+    masks = np.zeros(len(s), dtype=np.uint64)
+    np.bitwise_or.at(masks, flat.index[keep].to_numpy(),
+                     np.left_shift(np.uint64(1), bits[keep].to_numpy(np.uint64)))
+    return masks
+
+def ports_mask(ports):
+    mask = 0
+    for p in ports:
+        if p in PORT_BIT:
+            mask |= 1 << PORT_BIT[p]
+    return np.uint64(mask)
+
+# ------------------ Vectorized Scoring ------------------
+def score_vendors(vendors, rules=ENGINE_RULES):
+    # Few distinct vendors in any inventory: score the uniques, then broadcast back
+    codes, uniques = pd.factorize(pd.Series(vendors, dtype=object))
+    upper = pd.Series(uniques, dtype=object).astype(str).str.upper()
+    points = np.where(pd.Series(uniques, dtype=object).isin(rules["unknown_vendors"]), rules["unknown_points"], 0)
+    for keyword, pts in rules["vendor_keywords"]:
+        points = points + np.where(upper.str.contains(keyword.upper(), regex=False), pts, 0)
+    points = np.append(points, rules["unknown_points"]).astype(np.int64)  # code -1 = missing vendor
+    return points[codes]
 
-    return min(risk,100)   # cap to 100
+def score_batch(port_masks, vendors, rules=ENGINE_RULES):
+    """Risk score for every device in one pass: port_masks from encode_ports, vendors as strings."""
+    masks = np.asarray(port_masks, dtype=np.uint64)
+    risk = np.zeros(len(masks), dtype=np.int64)
+    for ports, points, mode in rules["ports"]:
+        rule_mask = ports_mask(ports)
+        hits = np.bitwise_and(masks, rule_mask)
+        if mode == "each":
+            risk += points * np.bitwise_count(hits).astype(np.int64)
+        else:
+            risk += points * (hits != 0)
+    risk += score_vendors(vendors, rules)
+    return np.minimum(risk, rules["cap"])   # cap to 100
+
+def label_risk(scores, thresholds=SCANNER_THRESHOLDS, default="Low", inclusive=False):
+    scores = np.asarray(scores)
+    conds = [(scores >= t) if inclusive else (scores > t) for t, _ in thresholds]
+    return np.select(conds, [label for _, label in thresholds], default=default)
+
+def score_frame(df, rules=ENGINE_RULES, thresholds=None, inclusive=False):
+    """Score a whole device DataFrame. Ports come from port_mask, open_ports or ports (first found)."""
+    if "port_mask" in df:
+        masks = df["port_mask"].to_numpy(np.uint64)
+    else:
+        masks = encode_ports(df["open_ports"] if "open_ports" in df else df["ports"])
+    out = df.copy()
+    out["risk_score"] = score_batch(masks, df["vendor"], rules)
+    if thresholds is not None:
+        out["risk_label"] = label_risk(out["risk_score"], thresholds, inclusive=inclusive)
+    return out
+
+# ------------------ Per-Device Scoring ------------------
+# Plain-Python twins of score_batch / label_risk: building arrays costs more than the arithmetic for one device
+def score_one(ports, vendor, rules=ENGINE_RULES):
+    """score_batch for a single device: ports as a list of ints or a string like "[23, 80]"."""
+    if isinstance(ports, str):
+        ports = [int(p) for p in re.findall(r"\d+", ports)]
+    risk = 0
+    for group, points, mode in rules["ports"]:
+        for port in group:
+            if port in ports:
+                risk += points
+                if mode != "each":
+                    break
+    if vendor is None or vendor != vendor:               # missing vendor (None / NaN)
+        risk += rules["unknown_points"]
+    else:
+        if vendor in rules["unknown_vendors"]:
+            risk += rules["unknown_points"]
+        upper = str(vendor).upper()
+        for keyword, pts in rules["vendor_keywords"]:
+            if keyword.upper() in upper:
+                risk += pts
+    return min(risk, rules["cap"])   # cap to 100
+
+def label_one(score, thresholds=SCANNER_THRESHOLDS, default="Low", inclusive=False):
+    for t, label in thresholds:
+        if score >= t if inclusive else score > t:
+            return label
+    return default
+
+def calculate_risk(ports, vendor):
+    return score_one(ports, vendor, ENGINE_RULES)
 
 # Test risk function
 if __name__ == "__main__":
@@ -1,47 +1,159 @@
+from collections import namedtuple
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import data_store
+import dataset_cache
 
-def generate_math_plot():
-    """Extraordinary Upgrade: Stunning 3D Risk Surface with Wave Interference (Mathematical Beauty).
-    Advances cybersecurity: Visualizes complex risk interactions – Peaks = High Threat Zones, enabling intuitive proactive defense in IoT networks."""
-    df = pd.read_csv("training_dataset.csv")
+DATASET = "training_dataset.csv"
+GRID_SIZE = 60            # 60x60 = smooth surface, low memory
+SCATTER_MAX = 5000        # up to this many devices are drawn one by one, beyond that they are binned
+MAX_OUTLIERS = 2000       # high-risk devices kept as markers on the binned surface
+HIGH_RISK = 70
+CHUNK_ROWS = 500_000
 
-    # Normalize for scatter points
-    ports_norm = (df["ports_count"] - df["ports_count"].min()) / (df["ports_count"].max() - df["ports_count"].min() + 1e-6)
-    risk_norm = (df["risk_score"] - df["risk_score"].min()) / (df["risk_score"].max() - df["risk_score"].min() + 1e-6)
-    z_points = df["risk_score"] / df["risk_score"].max() if df["risk_score"].max() > 0 else df["risk_score"]
+# x, y: cell centres (normalized ports / risk), count and mean_risk: (bins, bins) grids indexed [y, x],
+# outliers: sampled high-risk devices (normalized x, y and raw risk), rows: devices binned
+RiskSurface = namedtuple("RiskSurface", "x y count mean_risk outliers rows ports_range risk_range")
 
-    # High-res mesh (60x60 = beautiful smooth surface, low memory)
-    grid_size = 60
+# ------------------ Wave Interference Model ------------------
+@lru_cache(maxsize=4)
+def wave_surface(grid_size=GRID_SIZE):
+    """Mathematical wave interference model – creates dynamic peaks/valleys for threat 'energy'.
+    Depends on nothing but the grid size, so it is computed once per size."""
     X = np.linspace(0, 1, grid_size)
     Y = np.linspace(0, 1, grid_size)
     X_grid, Y_grid = np.meshgrid(X, Y)
-
-    # Mathematical wave interference model – Creates dynamic peaks/valleys for threat 'energy'
     Z = (np.sin(4 * np.pi * X_grid) * np.cos(3 * np.pi * Y_grid) +
          0.5 * np.sin(6 * np.pi * (X_grid + Y_grid)) +
-         0.3 * np.cos(8 * np.pi * X_grid * Y_grid)) 
+         0.3 * np.cos(8 * np.pi * X_grid * Y_grid))
     Z = (Z - Z.min()) / (Z.max() - Z.min())  # Normalize to 0-1
+    for a in (X_grid, Y_grid, Z):
+        a.flags.writeable = False             # shared between calls
+    return X_grid, Y_grid, Z
 
-    # Enhanced colorscale for cyber threat vibe
-    fig = go.Figure(data=[
-        go.Surface(z=Z, x=X_grid, y=Y_grid, colorscale="Viridis", opacity=0.85, name="Threat Energy Surface",
-                   contours=dict(z=dict(show=True, usecolormap=True, highlightcolor="#ff0000", project_z=True))),
-        go.Scatter3d(x=ports_norm, y=risk_norm, z=z_points, mode="markers",
-                     marker=dict(size=4, color=df['risk_score'], colorscale="Reds", showscale=True),
-                     name="Devices (Colored by Risk)")
-    ])
+# ------------------ Binned Risk Surface ------------------
+def _columns(path, chunksize):
+    for chunk in data_store.iter_chunks(path, ["ports_count", "risk_score"], chunksize):
+        ports = pd.to_numeric(chunk["ports_count"], errors="coerce").to_numpy(dtype=float)
+        risk = pd.to_numeric(chunk["risk_score"], errors="coerce").to_numpy(dtype=float)
+        ok = np.isfinite(ports) & np.isfinite(risk)
+        yield ports[ok], risk[ok]
+
+def _normalize(values, lo, hi):
+    return (values - lo) / (hi - lo + 1e-6)
+
+def binned_surface(path=DATASET, bins=GRID_SIZE, outliers=MAX_OUTLIERS, seed=42, chunksize=CHUNK_ROWS, use_cache=True):
+    """Device density and mean risk on a bins x bins grid of (normalized ports, normalized risk),
+    plus a uniform sample of at most `outliers` high-risk devices. Streams the two needed columns
+    chunk by chunk (one pass for the ranges, one to bin), so memory and result size do not grow with
+    the inventory. Cached per dataset fingerprint."""
+    key = dataset_cache.fingerprint(data_store.resolve(path), bins, outliers, seed)
+    if use_cache:
+        cached = dataset_cache.get("risk_surface", key)
+        if cached is not None:
+            return cached
 
+    # Pass 1: ranges used to normalize both axes
+    lo, hi = np.full(2, np.inf), np.full(2, -np.inf)
+    for ports, risk in _columns(path, chunksize):
+        if len(ports):
+            lo = np.minimum(lo, [ports.min(), risk.min()])
+            hi = np.maximum(hi, [ports.max(), risk.max()])
+    if not np.isfinite(lo).all():
+        lo, hi = np.zeros(2), np.zeros(2)
+
+    # Pass 2: histogram counts and risk sums per cell; bottom-k random priorities keep the outlier sample uniform
+    edges = np.linspace(0, 1, bins + 1)
+    count = np.zeros((bins, bins))
+    risk_sum = np.zeros((bins, bins))
+    rng = np.random.default_rng(seed)
+    kept = np.empty((0, 4))                   # priority, x, y, risk
+    rows = 0
+    for ports, risk in _columns(path, chunksize):
+        x, y = _normalize(ports, lo[0], hi[0]), _normalize(risk, lo[1], hi[1])
+        count += np.histogram2d(y, x, bins=[edges, edges])[0]
+        risk_sum += np.histogram2d(y, x, bins=[edges, edges], weights=risk)[0]
+        rows += len(ports)
+        high = risk >= HIGH_RISK
+        if outliers and high.any():
+            kept = np.vstack([kept, np.column_stack([rng.random(high.sum()), x[high], y[high], risk[high]])])
+            if len(kept) > outliers:
+                kept = kept[np.argpartition(kept[:, 0], outliers - 1)[:outliers]]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_risk = np.where(count > 0, risk_sum / count, np.nan)
+    centres = (edges[:-1] + edges[1:]) / 2
+    sample = pd.DataFrame(kept[:, 1:], columns=["x", "y", "risk"])
+    surface = RiskSurface(centres, centres, count, mean_risk, sample, rows,
+                          (float(lo[0]), float(hi[0])), (float(lo[1]), float(hi[1])))
+    if use_cache:
+        dataset_cache.put("risk_surface", key, surface)
+    return surface
+
+# ------------------ Figures ------------------
+def _layout(fig, title, zaxis_title="Threat Intensity"):
     fig.update_layout(
-        title="🛡️ Extraordinary Threat Energy Surface (Wave Interference Model)",
+        title=title,
         autosize=True, height=700,
         scene=dict(
             xaxis_title="Normalized Ports Exposure",
             yaxis_title="Normalized Base Risk",
-            zaxis_title="Threat Intensity",
+            zaxis_title=zaxis_title,
             camera=dict(eye=dict(x=1.5, y=1.5, z=1.2))
         ),
         margin=dict(l=0, r=0, b=0, t=40)
     )
-    return fig
\ No newline at end of file
+    return fig
+
+def _device_figure(path):
+    df = data_store.load(path, columns=["ports_count", "risk_score"], writable=False)
+
+    # Normalize for scatter points
+    ports_norm = (df["ports_count"] - df["ports_count"].min()) / (df["ports_count"].max() - df["ports_count"].min() + 1e-6)
+    risk_norm = (df["risk_score"] - df["risk_score"].min()) / (df["risk_score"].max() - df["risk_score"].min() + 1e-6)
+    z_points = df["risk_score"] / df["risk_score"].max() if df["risk_score"].max() > 0 else df["risk_score"]
+
+    X_grid, Y_grid, Z = wave_surface(GRID_SIZE)
+
+    # Enhanced colorscale for cyber threat vibe
+    fig = go.Figure(data=[
+        go.Surface(z=Z, x=X_grid, y=Y_grid, colorscale="Viridis", opacity=0.85, name="Threat Energy Surface",
+                   contours=dict(z=dict(show=True, usecolormap=True, highlightcolor="#ff0000", project_z=True))),
+        go.Scatter3d(x=ports_norm, y=risk_norm, z=z_points, mode="markers",
+                     marker=dict(size=4, color=df['risk_score'], colorscale="Reds", showscale=True),
+                     name="Devices (Colored by Risk)")
+    ])
+    return _layout(fig, "🛡️ Extraordinary Threat Energy Surface (Wave Interference Model)")
+
+def binned_figure(surface):
+    """Surface height = device density (log scale, 0-1), colour = mean risk of the cell, markers = sampled
+    high-risk devices. Its size depends on the grid and the sample only, never on the inventory."""
+    density = np.log1p(surface.count)
+    density = density / density.max() if density.max() > 0 else density
+    top_risk = max(surface.risk_range[1], 1e-6)
+    points = surface.outliers
+    fig = go.Figure(data=[
+        go.Surface(z=density, x=surface.x, y=surface.y, surfacecolor=np.nan_to_num(surface.mean_risk),
+                   colorscale="Viridis", opacity=0.85, name="Device Density", colorbar=dict(title="Mean risk", x=1.0),
+                   contours=dict(z=dict(show=True, usecolormap=True, highlightcolor="#ff0000", project_z=True))),
+        go.Scatter3d(x=points["x"], y=points["y"], z=points["risk"] / top_risk, mode="markers",
+                     marker=dict(size=3, color=points["risk"], colorscale="Reds", showscale=True,
+                                 colorbar=dict(title="Risk", x=1.12)),
+                     name=f"High-risk devices (sample of {len(points)})")
+    ])
+    return _layout(fig, f"🛡️ Threat Density Surface – {surface.rows:,} devices in {len(surface.x)}x{len(surface.y)} cells",
+                   "Device Density (log)")
+
+def generate_math_plot(path=DATASET, mode="auto", bins=GRID_SIZE, outliers=MAX_OUTLIERS):
+    """Extraordinary Upgrade: Stunning 3D Risk Surface with Wave Interference (Mathematical Beauty).
+    Advances cybersecurity: Visualizes complex risk interactions – Peaks = High Threat Zones, enabling intuitive proactive defense in IoT networks.
+    mode="devices" draws every device over the wave surface, "binned" draws the density/mean-risk grid with
+    sampled high-risk devices; "auto" bins inventories larger than SCATTER_MAX so the figure stays bounded."""
+    if mode == "devices":
+        return _device_figure(path)
+    surface = binned_surface(path, bins, outliers)
+    if mode == "auto" and surface.rows <= SCATTER_MAX:
+        return _device_figure(path)
+    return binned_figure(surface)
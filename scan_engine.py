@@ -0,0 +1,120 @@
+# scan_engine.py
+import asyncio
+import queue
+import threading
+
+DEFAULT_PORTS = [21, 22, 23, 80, 443, 8080, 2323]
+
+# ------------------ Per-Host Throttle ------------------
+class HostLimiter:
+    """Caps concurrent probes against one host and spaces their start times
+    so a single device never sees more than `rate` connection attempts per second."""
+
+    def __init__(self, concurrency=4, rate=None):
+        self.sem = asyncio.Semaphore(concurrency)
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.sem.acquire()
+        if self.interval:
+            now = asyncio.get_running_loop().time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.sem.release()
+
+# ------------------ Async Port Probe ------------------
+async def probe_port(ip, port, timeout=0.4):
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+async def scan_host(ip, ports, limit, host_limiter, timeout=0.4):
+    async def probe(port):
+        async with host_limiter:
+            async with limit:
+                return await probe_port(ip, port, timeout)
+
+    results = await asyncio.gather(*(probe(p) for p in ports))
+    return [p for p, is_open in zip(ports, results) if is_open]
+
+async def scan_hosts_async(hosts, ports=DEFAULT_PORTS, concurrency=500,
+                           per_host_limit=4, host_rate=None, timeout=0.4):
+    """Probe every (host, port) pair concurrently. Returns {ip: [open ports]}
+    with each port list in the same order as `ports`."""
+    results = {}
+    async for ip, open_ports in iter_scan_hosts_async(hosts, ports, concurrency,
+                                                      per_host_limit, host_rate, timeout):
+        results[ip] = open_ports
+    return results
+
+async def iter_scan_hosts_async(hosts, ports=DEFAULT_PORTS, concurrency=500,
+                                per_host_limit=4, host_rate=None, timeout=0.4):
+    """Yield (ip, open_ports) for each host as soon as all its ports are probed."""
+    ports = list(ports)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(ip):
+        limiter = HostLimiter(per_host_limit, host_rate)
+        return ip, await scan_host(ip, ports, limit, limiter, timeout)
+
+    tasks = [asyncio.ensure_future(run(ip)) for ip in dict.fromkeys(hosts)]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        for t in tasks:
+            t.cancel()
+
+# ------------------ Sync Entry Point ------------------
+def scan_hosts(hosts, ports=DEFAULT_PORTS, concurrency=500,
+               per_host_limit=4, host_rate=None, timeout=0.4):
+    return asyncio.run(scan_hosts_async(hosts, ports, concurrency,
+                                        per_host_limit, host_rate, timeout))
+
+def iter_scan_hosts(hosts, ports=DEFAULT_PORTS, concurrency=500,
+                    per_host_limit=4, host_rate=None, timeout=0.4):
+    """Blocking generator over (ip, open_ports) in completion order.
+    The event loop runs on a worker thread so probes keep going while the caller works."""
+    results = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    async def pump():
+        async for item in iter_scan_hosts_async(hosts, ports, concurrency,
+                                                per_host_limit, host_rate, timeout):
+            if stop.is_set():
+                break
+            results.put(item)
+
+    def worker():
+        try:
+            asyncio.run(pump())
+        except BaseException as exc:
+            results.put(exc)
+        results.put(done)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
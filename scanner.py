@@ -1,7 +1,19 @@
 # scanner.py
+import argparse
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
 import scapy.all as scapy
-import socket
-from vendor import get_vendor   # to fetch vendor details
+import scan_engine
+import inventory_store
+import risk_engine
+from vendor import get_vendor, get_vendors   # offline OUI registry lookups
+
+STALE_AFTER = 6 * 3600      # seconds; a known host is port-probed again once its last probe is this old
+RESCAN_INTERVAL = 600       # seconds between sweeps in watch()
+
+# results: scored devices of this sweep, diff: change records, probed: {mac: why it was probed}
+Rescan = namedtuple("Rescan", "scan_id results diff probed")
 
 # ------------------ Network Scanner ------------------
 def scan_network(ip_range):
@@ -9,52 +21,17 @@ def scan_network(ip_range):
     broadcast = scapy.Ether(dst="ff:ff:ff:ff:ff:ff")
     answered = scapy.srp(broadcast/arp_request, timeout=2, verbose=False)[0]
 
-    devices = []
-    for send, receive in answered:
-        devices.append({
-            "ip": receive.psrc,
-            "mac": receive.hwsrc,
-            "vendor": get_vendor(receive.hwsrc)
-        })
-    return devices
+    hosts = [(receive.psrc, receive.hwsrc) for send, receive in answered]
+    vendors = get_vendors([mac for _, mac in hosts])   # one batch lookup for the whole sweep
+    return [{"ip": ip, "mac": mac, "vendor": vendor} for (ip, mac), vendor in zip(hosts, vendors)]
 
 # ------------------ Port Scanner ------------------
 def scan_ports(ip, ports=[21,22,23,80,443,8080,2323]):
-    open_ports = []
-    for port in ports:
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(0.4)
-            if s.connect_ex((ip, port)) == 0:
-                open_ports.append(port)
-            s.close()
-        except:
-            pass
-    return open_ports
+    return scan_engine.scan_hosts([ip], ports).get(ip, [])
 
 # ------------------ Device Risk Analyzer ------------------
-def analyze_device(ip, mac):
-    vendor = get_vendor(mac)
-    open_ports = scan_ports(ip)
-
-    # BASE RISK SCORING
-    risk = 0
-    if any(p in open_ports for p in [21,23,2323]): risk += 40
-    if any(p in open_ports for p in [80,8080]): risk += 25
-    if any(p in open_ports for p in [22,443]): risk += 5
-
-    if vendor=="Unknown Vendor": risk+=20
-    if "CCTV" in vendor.upper(): risk+=30
-    if "ESP" in vendor.upper(): risk+=20
-
-    risk = min(risk,100)
-
-    label = (
-        "High" if risk>60 else
-        "Medium" if risk>25 else
-        "Low"
-    )
-
+def score_device(ip, mac, vendor, open_ports):
+    risk = risk_engine.score_one(open_ports, vendor, risk_engine.SCANNER_RULES)
     return {
         "ip":ip,
         "mac":mac,
@@ -62,12 +39,178 @@ def analyze_device(ip, mac):
         "open_ports":open_ports,
         "ports_count":len(open_ports),
         "risk_score":risk,
-        "risk_label":label
+        "risk_label":risk_engine.label_one(risk, risk_engine.SCANNER_THRESHOLDS)
     }
 
+def score_devices(devices):
+    # BASE RISK SCORING – one vectorized pass over the whole batch
+    masks = risk_engine.encode_ports([d["open_ports"] for d in devices])
+    risk = risk_engine.score_batch(masks, [d["vendor"] for d in devices], risk_engine.SCANNER_RULES)
+    labels = risk_engine.label_risk(risk, risk_engine.SCANNER_THRESHOLDS)
+
+    return [
+        {
+            "ip":d["ip"],
+            "mac":d["mac"],
+            "vendor":d["vendor"],
+            "open_ports":d["open_ports"],
+            "ports_count":len(d["open_ports"]),
+            "risk_score":int(r),
+            "risk_label":str(label)
+        }
+        for d, r, label in zip(devices, risk, labels)
+    ]
+
+def analyze_device(ip, mac):
+    vendor = get_vendor(mac)
+    open_ports = scan_ports(ip)
+    return score_device(ip, mac, vendor, open_ports)
+
+# ------------------ Batched Analyzer ------------------
+def analyze_devices(devices, ports=scan_engine.DEFAULT_PORTS, concurrency=500,
+                    per_host_limit=4, host_rate=None, timeout=0.4):
+    """Scan all devices concurrently; returns analyze_device-style dicts in input order."""
+    open_ports = scan_engine.scan_hosts([d["ip"] for d in devices], ports, concurrency,
+                                        per_host_limit, host_rate, timeout)
+    return score_devices([
+        {"ip": d["ip"], "mac": d["mac"], "vendor": d.get("vendor") or get_vendor(d["mac"]),
+         "open_ports": open_ports[d["ip"]]}
+        for d in devices
+    ])
+
+# ------------------ Streaming Analyzer ------------------
+def stream_devices(devices, db_path=inventory_store.DB_FILE, scan_id=None,
+                   ports=scan_engine.DEFAULT_PORTS, concurrency=500,
+                   per_host_limit=4, host_rate=None, timeout=0.4):
+    """Yield each scored device as soon as its ports are done, appending it to the inventory store first."""
+    by_ip = {d["ip"]: d for d in devices}
+    scan_id = scan_id or inventory_store.new_scan_id()
+    conn = inventory_store.connect(db_path)
+    try:
+        for ip, open_ports in scan_engine.iter_scan_hosts(list(by_ip), ports, concurrency,
+                                                          per_host_limit, host_rate, timeout):
+            d = by_ip[ip]
+            result = score_device(ip, d["mac"], d.get("vendor") or get_vendor(d["mac"]), open_ports)
+            inventory_store.append_result(conn, scan_id, result)
+            inventory_store.upsert_devices(conn, scan_id, [result], {inventory_store.normalize_mac(d["mac"])})
+            yield result
+    finally:
+        conn.close()
+
+# ------------------ Incremental Rescans ------------------
+def plan_rescan(devices, known, ttl=STALE_AFTER, now=None):
+    """Split ARP-sweep devices into ({mac: reason} to port-probe, macs whose stored ports are reused).
+    A host is probed when it is new, its IP/MAC binding changed, or its last probe is older than `ttl` seconds."""
+    now = now or datetime.now()
+    probe, reuse = {}, []
+    for d in devices:
+        mac = inventory_store.normalize_mac(d["mac"])
+        old = known.get(mac)
+        if old is None:
+            probe[mac] = "new"
+        elif old["ip"] != d["ip"]:
+            probe[mac] = "ip_changed"
+        elif not old["last_probed"] or now - datetime.fromisoformat(old["last_probed"]) > timedelta(seconds=ttl):
+            probe[mac] = "stale"
+        else:
+            reuse.append(mac)
+    return probe, reuse
+
+def diff_inventory(known, results):
+    """Change records between the stored inventory and this sweep: new hosts, IP moves, ports opened or
+    closed, risk label changes, and hosts from the previous sweep that no longer answer."""
+    changes = []
+    for r in results:
+        mac = inventory_store.normalize_mac(r["mac"])
+        old = known.get(mac)
+        if old is None:
+            changes.append({"mac": mac, "ip": r["ip"], "change": "new", "detail": f"{r['vendor']}, ports {r['open_ports']}"})
+            continue
+        if old["ip"] != r["ip"]:
+            changes.append({"mac": mac, "ip": r["ip"], "change": "ip_changed", "detail": f"{old['ip']} -> {r['ip']}"})
+        opened = sorted(set(r["open_ports"]) - set(old["open_ports"]))
+        closed = sorted(set(old["open_ports"]) - set(r["open_ports"]))
+        if opened:
+            changes.append({"mac": mac, "ip": r["ip"], "change": "ports_opened", "detail": opened})
+        if closed:
+            changes.append({"mac": mac, "ip": r["ip"], "change": "ports_closed", "detail": closed})
+        if old["risk_label"] != r["risk_label"]:
+            changes.append({"mac": mac, "ip": r["ip"], "change": "risk_changed",
+                            "detail": f"{old['risk_label']} -> {r['risk_label']} ({r['risk_score']})"})
+    previous = max((d["last_scan_id"] or "" for d in known.values()), default="")
+    answered = {inventory_store.normalize_mac(r["mac"]) for r in results}
+    for mac, old in known.items():
+        if previous and old["last_scan_id"] == previous and mac not in answered:
+            changes.append({"mac": mac, "ip": old["ip"], "change": "gone", "detail": f"last seen {old['last_seen']}"})
+    return changes
+
+def rescan(ip_range=None, devices=None, db_path=inventory_store.DB_FILE, ttl=STALE_AFTER,
+           ports=scan_engine.DEFAULT_PORTS, concurrency=500, per_host_limit=4, host_rate=None, timeout=0.4):
+    """ARP-sweep `ip_range` (or take `devices`), port-probe only what plan_rescan picks and reuse stored
+    ports for the rest. Every host is re-scored, written to scan_results and the devices inventory."""
+    devices = scan_network(ip_range) if devices is None else devices
+    devices = list({inventory_store.normalize_mac(d["mac"]): d for d in devices}.values())   # one row per MAC
+    macs = [inventory_store.normalize_mac(d["mac"]) for d in devices]
+    conn = inventory_store.connect(db_path)
+    try:
+        known = inventory_store.load_devices(conn)
+        probe, reuse = plan_rescan(devices, known, ttl)
+        to_probe = [d for d, mac in zip(devices, macs) if mac in probe]
+        fresh = analyze_devices(to_probe, ports, concurrency, per_host_limit, host_rate, timeout) if to_probe else []
+        reused = score_devices([
+            {"ip": d["ip"], "mac": d["mac"], "vendor": d.get("vendor") or get_vendor(d["mac"]),
+             "open_ports": known[mac]["open_ports"]}
+            for d, mac in zip(devices, macs) if mac not in probe
+        ]) if reuse else []
+        fresh, reused = iter(fresh), iter(reused)      # both come back in input order
+        results = [next(fresh) if mac in probe else next(reused) for mac in macs]
+
+        diff = diff_inventory(known, results)
+        scan_id = inventory_store.new_scan_id()
+        inventory_store.append_results(conn, scan_id, results)
+        inventory_store.upsert_devices(conn, scan_id, results, set(probe))
+    finally:
+        conn.close()
+    return Rescan(scan_id, results, diff, probe)
+
+def print_rescan(scan):
+    reasons = {}
+    for why in scan.probed.values():
+        reasons[why] = reasons.get(why, 0) + 1
+    detail = ", ".join(f"{n} {why}" for why, n in sorted(reasons.items()))
+    print(f"🔁 Scan {scan.scan_id}: {len(scan.results)} hosts, {len(scan.probed)} probed" + (f" ({detail})" if detail else ""))
+    for c in scan.diff:
+        print(f"   {c['change']:<13} {c['ip']:<16} {c['mac']}  {c['detail']}")
+    if not scan.diff:
+        print("   no changes")
+
+def watch(ip_range, interval=RESCAN_INTERVAL, ttl=STALE_AFTER, rounds=None, db_path=inventory_store.DB_FILE,
+          on_scan=print_rescan):
+    """Rescan every `interval` seconds (forever, or `rounds` times), handing each Rescan to `on_scan`."""
+    done = 0
+    while rounds is None or done < rounds:
+        start = time.time()
+        on_scan(rescan(ip_range, db_path=db_path, ttl=ttl))
+        done += 1
+        if rounds is None or done < rounds:
+            time.sleep(max(0.0, interval - (time.time() - start)))
 
 if __name__=="__main__":
+    parser = argparse.ArgumentParser(description="ARP sweep + port scan into the device inventory")
+    parser.add_argument("range", nargs="?", default="192.168.1.0/24")
+    parser.add_argument("--full", action="store_true", help="probe every host and stream results (no inventory reuse)")
+    parser.add_argument("--ttl", type=float, default=STALE_AFTER, help="seconds before a known host is probed again")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="keep rescanning at this interval")
+    parser.add_argument("--rounds", type=int, help="stop after this many sweeps when watching")
+    args = parser.parse_args()
+
     print("\nScanning...")
-    d=scan_network("192.168.1.0/24")
-    for dev in d:
-        print(analyze_device(dev['ip'],dev['mac']))
+    if args.full:
+        d=scan_network(args.range)
+        for result in stream_devices(d):
+            print(result)
+    elif args.watch:
+        watch(args.range, args.watch, args.ttl, args.rounds)
+    else:
+        print_rescan(rescan(args.range, ttl=args.ttl))
+    print(f"Saved to {inventory_store.DB_FILE}")
@@ -0,0 +1,66 @@
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+# ------------------ Sparse MDP Transition Matrix ------------------
+def transition_matrix(G, weight='trans_prob'):
+    """Row-normalised CSR transition matrix of G (same 1e-6 smoothing as the dense engine)."""
+    nodes = list(G.nodes())
+    adj = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight, format='csr')
+    row_sums = np.asarray(adj.sum(axis=1)).ravel()
+    P = sparse.diags(1.0 / (row_sums + 1e-6)) @ adj
+    return nodes, sparse.csr_matrix(P)
+
+def _start_block(sources, n):
+    """Turn node indices (one per start) or a (k, n) array of distributions into a dense block."""
+    sources = np.asarray(sources)
+    if sources.ndim == 2:
+        return sources.astype(float)
+    X = np.zeros((len(sources), n))
+    X[np.arange(len(sources)), sources] = 1.0
+    return X
+
+# ------------------ Multi-source Propagation ------------------
+def spread_probabilities(P, sources, steps=5, all_steps=True):
+    """Propagate a block of start distributions through P in one pass.
+    Returns shape (steps, k, n): [t, i, j] = P(at node j after t+1 steps | start i).
+    With all_steps=False only the final (k, n) block is returned."""
+    X = _start_block(sources, P.shape[0])
+    PT = sparse.csr_matrix(P.T)
+    history = []
+    for _ in range(steps):
+        X = (PT @ X.T).T
+        if all_steps:
+            history.append(X)
+    return np.stack(history) if all_steps else X
+
+# ------------------ Long-run Behaviour ------------------
+def stationary_distribution(P, tol=1e-10, max_iter=1000):
+    """Power iteration for the long-run share of time an attacker spends on each node."""
+    n = P.shape[0]
+    PT = sparse.csr_matrix(P.T)
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        nxt = PT @ x
+        total = nxt.sum()
+        nxt = nxt / total if total > 0 else np.full(n, 1.0 / n)   # re-add mass lost to dead ends
+        if np.abs(nxt - x).sum() < tol:
+            return nxt
+        x = nxt
+    return x
+
+def absorption_probabilities(P, absorbing):
+    """B[i, j] = probability a walk from node i is first captured by absorbing[j]
+    (e.g. crown-jewel assets or honeypots). Rows for absorbing nodes are one-hot."""
+    n = P.shape[0]
+    absorbing = np.asarray(absorbing)
+    transient = np.setdiff1d(np.arange(n), absorbing)
+    P = sparse.csr_matrix(P)
+    Q = P[transient][:, transient]
+    R = P[transient][:, absorbing]
+    lu = splu(sparse.csc_matrix(sparse.identity(len(transient)) - Q))
+    B = np.zeros((n, len(absorbing)))
+    B[transient] = lu.solve(R.toarray())
+    B[absorbing, np.arange(len(absorbing))] = 1.0
+    return B
@@ -0,0 +1,22 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # flat repo: engines live at the root
+
+@pytest.fixture
+def devices(tmp_path, monkeypatch):
+    """A small device inventory written as training_dataset.csv in a scratch working directory
+    (engines read it, and dataset_cache writes .eraksha_cache, relative to the cwd)."""
+    monkeypatch.chdir(tmp_path)
+    df = pd.DataFrame({
+        "ip": [f"192.168.1.{i}" for i in range(1, 9)],
+        "ports_count": [1, 3, 2, 5, 0, 4, 2, 1],
+        "risk_score": [10, 75, 40, 95, 0, 60, 35, 20],
+        "risk_label": ["Low", "High", "Medium", "High", "Low", "Medium", "Medium", "Low"],
+        "vendor": ["TP-Link", "HikVision", "Unknown", "ESP32", "Philips Hue", "Dahua", "Sonoff", "Amazon Echo"],
+        "attack_cat": ["Normal", "Exploits", "Recon", "DoS", "Normal", "Exploits", "Fuzzers", "Normal"],
+    })
+    df.to_csv("training_dataset.csv", index=False)
+    return df
@@ -0,0 +1,22 @@
+import time
+from datetime import datetime
+import anomaly_detection
+
+def _row(ip, ts):
+    return [ip, "28.6139", "77.2090", datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"), "GET", "/", ""]
+
+def test_hit_time_uses_row_timestamp():
+    now = time.time()
+    assert abs(anomaly_detection.hit_time(_row("1.2.3.4", now - 30), now) - (now - 30)) < 1e-3
+    assert anomaly_detection.hit_time(["1.2.3.4", "0", "0", "not a time"], now) == now
+    assert anomaly_detection.hit_time(["1.2.3.4"], now) == now
+
+def test_replayed_hits_outside_window_are_not_counted():
+    now = time.time()
+    detector = anomaly_detection.SlidingWindowDetector(window=60)
+    rows = [_row("9.9.9.9", now - 3600)] * 50 + [_row(f"10.0.0.{i}", now - 1) for i in range(3)]
+    rows.append(_row("9.9.9.9", now - 7200))       # late line from long ago
+    for row in rows:
+        detector.observe(row[0], anomaly_detection.hit_time(row, now))
+    assert detector.transitions(now) == []
+    assert "9.9.9.9" not in detector.counts
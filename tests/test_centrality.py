@@ -0,0 +1,25 @@
+import os
+import centrality
+import dataset_cache
+import dijkstra_engine
+
+NEW_DEVICE = {"ip": "10.255.255.254", "ports_count": 3, "risk_score": 95, "risk_label": "High",
+              "vendor": "Hikvision", "attack_cat": "Exploits"}
+
+def _entries():
+    directory = os.path.join(dataset_cache.CACHE_DIR, "centrality")
+    memory = sum(ns == "centrality" for ns, _ in dataset_cache._memory)
+    return memory, len(os.listdir(directory)) if os.path.isdir(directory) else 0
+
+def test_edited_graph_is_not_cached(devices):
+    centrality.clear_cache()
+    G, _ = dijkstra_engine.load_graph(use_cache=False)
+    dijkstra_engine.graph_pagerank(G)
+    before = _entries()
+    for i in range(5):
+        dijkstra_engine.add_device(G, dict(NEW_DEVICE, ip=f"10.255.255.{i}"))
+        ranks = dijkstra_engine.graph_pagerank(G)
+        centrality.betweenness(G)
+    assert _entries() == before
+    assert abs(sum(ranks.values()) - 1) < 1e-6
+    centrality.clear_cache()
@@ -0,0 +1,10 @@
+import pandas as pd
+import data_store
+
+def test_csv_chunk_writer_roundtrip(devices):
+    with data_store.ChunkWriter("chunks.csv") as writer:
+        for start in range(0, len(devices), 3):
+            writer.write(devices.iloc[start:start + 3])
+    assert writer.rows == len(devices)
+    back = data_store.load("chunks.csv")
+    pd.testing.assert_frame_equal(back, devices, check_dtype=False)
@@ -0,0 +1,18 @@
+import dijkstra_engine
+
+NEW_DEVICE = {"ip": "10.255.255.254", "ports_count": 3, "risk_score": 95, "risk_label": "High",
+              "vendor": "Hikvision", "attack_cat": "Exploits"}
+
+def test_add_device_links_to_last_device(devices):
+    G, _ = dijkstra_engine.load_graph(use_cache=False)
+    dijkstra_engine.add_device(G, NEW_DEVICE)
+    assert list(G[NEW_DEVICE["ip"]]) == [devices["ip"].iloc[-1]]
+
+def test_add_rescore_remove_restores_density(devices):
+    G, _ = dijkstra_engine.load_graph(use_cache=False)
+    density = G.graph["attack_density"]
+    dijkstra_engine.add_device(G, NEW_DEVICE)
+    dijkstra_engine.rescore_device(G, NEW_DEVICE["ip"], risk_score=10, risk_label="Low")
+    dijkstra_engine.remove_device(G, NEW_DEVICE["ip"])
+    assert abs(G.graph["attack_density"] - density) < 1e-12
+    assert G.graph["device_count"] == G.number_of_nodes() == len(devices)
@@ -1,34 +1,91 @@
+import os
 import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
+import joblib
 import pickle
+import dataset_cache
+import data_store
 
-# Load enhanced dataset
-df = pd.read_csv("training_dataset.csv")
+DATASET = "training_dataset.csv"
+MODEL_FILE = "risk_model.pkl"
+MODEL_JOBLIB = "risk_model.joblib"     # uncompressed: joblib.load(..., mmap_mode="r") maps the tree arrays
+ENCODER_FILE = "vendor_encoder.pkl"
 
-# Preprocess
-df['vendor'] = df['vendor'].fillna("Unknown Vendor")
-df['risk_label'] = df['risk_label'].fillna("Low")
-df['ports_count'] = df['ports_count'].fillna(0)
+# ---------------- Chunked, Columnar Ingestion ----------------
+def _read_chunks(path, chunksize, sample_frac, seed):
+    reader = data_store.iter_chunks(path, ["ports_count", "vendor", "risk_label"], chunksize, categorical=True)
+    for i, chunk in enumerate(reader):
+        if sample_frac:
+            chunk = chunk.sample(frac=sample_frac, random_state=seed + i)
+        # Preprocess
+        chunk["vendor"] = chunk["vendor"].astype(object).fillna("Unknown Vendor").astype(str).astype("category")
+        chunk["risk_label"] = chunk["risk_label"].astype(object).fillna("Low").astype(str).astype("category")
+        chunk["ports_count"] = pd.to_numeric(chunk["ports_count"].fillna(0), downcast="float")
+        yield chunk
 
-le = LabelEncoder()
-df['vendor_encoded'] = le.fit_transform(df['vendor'])
+def load_features(path=DATASET, chunksize=500_000, sample_frac=None, seed=42, use_cache=True):
+    """Feature matrix X (float32), labels y and the fitted vendor encoder.
+    Only the three needed columns are read (Parquet or CSV), chunk by chunk, with vendors kept as categoricals.
+    X and y are cached as .npy files per dataset fingerprint and come back memory-mapped."""
+    key = dataset_cache.fingerprint(data_store.resolve(path), sample_frac, seed)
+    x_path = dataset_cache.cache_path("features", f"{key}_X.npy")
+    y_path = dataset_cache.cache_path("features", f"{key}_y.npy")
+    meta = dataset_cache.get("features", key) if use_cache else None
+    if meta is not None and os.path.exists(x_path) and os.path.exists(y_path):
+        le, label_names = meta
+        return np.load(x_path, mmap_mode="r"), label_names[np.load(y_path)], le
 
-X = df[['ports_count', 'vendor_encoded']]  # Add more if UNSW has extras
-y = df['risk_label']
+    ports, vendors, labels = [], [], []
+    for chunk in _read_chunks(path, chunksize, sample_frac, seed):
+        ports.append(chunk["ports_count"].to_numpy(np.float32))
+        vendors.append(chunk["vendor"])
+        labels.append(chunk["risk_label"])
+    vendor = union_categoricals(vendors)
+    label = union_categoricals(labels)
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Same codes LabelEncoder.fit_transform would give, computed on the categories only
+    le = LabelEncoder().fit(np.asarray(vendor.categories, dtype=object))
+    vendor_encoded = le.transform(np.asarray(vendor.categories, dtype=object))[vendor.codes]
 
-# Train Random Forest (extraordinary for imbalanced IoT attacks)
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+    X = np.column_stack([np.concatenate(ports), vendor_encoded.astype(np.float32)])
+    label_names = np.asarray(label.categories, dtype=object)
+    y_codes = label.codes.astype(np.int8)
+    np.save(x_path, X)
+    np.save(y_path, y_codes)
+    dataset_cache.put("features", key, (le, label_names))
+    return X, label_names[y_codes], le
 
-# Cross-validation for robust accuracy
-scores = cross_val_score(model, X, y, cv=5)
-print(f"Cross-Validation Accuracy: {scores.mean():.2f} – Handles massive UNSW data for 90%+ threat detection.")
+# ---------------- Parallel Training ----------------
+def train(path=DATASET, sample_frac=None, n_jobs=-1, cv=5):
+    X, y, le = load_features(path, sample_frac=sample_frac)
+    X = pd.DataFrame(np.asarray(X), columns=['ports_count', 'vendor_encoded'])  # Add more if UNSW has extras
 
-# Save
-pickle.dump(model, open("risk_model.pkl", "wb"))
-pickle.dump(le, open("vendor_encoder.pkl", "wb"))
-print("Model trained and saved – Ready for intelligent predictions!")
\ No newline at end of file
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Train Random Forest (extraordinary for imbalanced IoT attacks) – trees built on all cores
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+
+    # Cross-validation for robust accuracy – folds run side by side, cores split between them
+    cores = os.cpu_count() or 1
+    fold_jobs = min(cv, cores)
+    fold_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=max(1, cores // fold_jobs))
+    scores = cross_val_score(fold_model, X, y, cv=cv, n_jobs=fold_jobs)
+    print(f"Cross-Validation Accuracy: {scores.mean():.2f} – Handles massive UNSW data for 90%+ threat detection.")
+
+    # Save – the joblib copy goes last: predict_service maps it only when it is at least as new as the pickle
+    with open(MODEL_FILE, "wb") as f:
+        pickle.dump(model, f)
+    with open(ENCODER_FILE, "wb") as f:
+        pickle.dump(le, f)
+    joblib.dump(model, MODEL_JOBLIB)
+    print("Model trained and saved – Ready for intelligent predictions!")
+    return model, le
+
+if __name__ == "__main__":
+    import sys
+    train(sample_frac=float(sys.argv[1]) if len(sys.argv) > 1 else None)
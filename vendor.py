@@ -0,0 +1,208 @@
+# vendor.py
+import csv
+import hashlib
+import os
+import re
+import sys
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import dataset_cache
+
+UNKNOWN = "Unknown Vendor"
+LRU_SIZE = 65536          # hot MACs resolved without touching the index
+
+# IEEE registry exports (MA-L = oui.csv/oui.txt, MA-M = mam.csv, MA-S = oui36.csv) or a Wireshark manuf file.
+# The first directory holding any of them is used; the Debian/Ubuntu ieee-data and wireshark packages ship them.
+REGISTRY_FILES = ("oui.csv", "mam.csv", "oui36.csv", "oui.txt", "manuf")
+REGISTRY_DIRS = (".", os.path.dirname(os.path.abspath(__file__)), "/usr/share/ieee-data", "/usr/share/wireshark")
+
+# Fallback when no registry file is around: the IoT vendors the synthetic data and risk rules know
+BUILTIN_OUIS = {
+    "44:19:B6": "HikVision",
+    "50:C7:BF": "TP-Link",
+    "F0:27:2D": "Amazon Echo",
+    "28:6C:07": "Mi Home",
+    "00:04:63": "Bosch Security",
+    "00:17:88": "Philips Hue",
+    "24:0A:C4": "Sonoff",
+    "D0:52:A8": "Samsung SmartThings",
+}
+
+_HEX = np.full(256, 255, dtype=np.uint8)
+_HEX[np.frombuffer(b"0123456789abcdef", dtype=np.uint8)] = np.arange(16, dtype=np.uint8)
+_HEX[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16, dtype=np.uint8)
+_NIBBLES = np.uint64(16) ** np.arange(11, -1, -1, dtype=np.uint64)
+
+# ------------------ Registry Parsing ------------------
+def _prefix(text, bits=None):
+    """"00-1B-C5" / "001BC5000" / "00:1B:C5:00:00:00" with bits=36 -> (prefix value, prefix bits)."""
+    digits = re.sub(r"[^0-9A-Fa-f]", "", text)[:12]
+    bits = bits or 4 * len(digits)
+    return (int(digits, 16) << 4 * (12 - len(digits))) >> (48 - bits), bits
+
+def _parse_csv(path):
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.DictReader(f):
+            assignment, name = row.get("Assignment"), (row.get("Organization Name") or "").strip()
+            if assignment and name:
+                yield (*_prefix(assignment), name)
+
+def _parse_txt(path):
+    """oui.txt: "00-00-0C   (hex)\t\tCisco Systems, Inc" lines."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if "(hex)" in line:
+                assignment, _, name = line.partition("(hex)")
+                if name.strip():
+                    yield (*_prefix(assignment), name.strip())
+
+def _parse_manuf(path):
+    """Wireshark manuf: "00:1B:C5:00:00:00/36<TAB>Short<TAB>Long name", the long name when present."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split("#", 1)[0].rstrip("\n").split("\t")
+            if len(fields) < 2 or not fields[0].strip():
+                continue
+            address, _, bits = fields[0].strip().partition("/")
+            name = (fields[2] if len(fields) > 2 and fields[2].strip() else fields[1]).strip()
+            yield (*_prefix(address, int(bits) if bits else None), name)
+
+def parse_registry(path):
+    name = os.path.basename(path).lower()
+    if name.endswith(".csv"):
+        return _parse_csv(path)
+    if name.endswith(".txt"):
+        return _parse_txt(path)
+    return _parse_manuf(path)
+
+def find_registry():
+    for directory in REGISTRY_DIRS:
+        found = [os.path.join(directory, f) for f in REGISTRY_FILES if os.path.exists(os.path.join(directory, f))]
+        if found:
+            return found
+    return []
+
+# ------------------ Compiled Index ------------------
+# keys: sorted uint64 (bits << 48 | prefix), one entry per assignment; name_idx: uint32 into names.
+# A MAC matches prefix length b when (b << 48 | mac >> (48 - b)) is in keys; the longest matching b wins.
+def compile_index(entries):
+    table = {}
+    for value, bits, name in entries:
+        table[(bits << 48) | value] = name           # later files (e.g. MA-S after MA-L) win on duplicates
+    keys = np.fromiter(table, dtype=np.uint64, count=len(table))
+    codes, names = pd.factorize(pd.Series(list(table.values()), dtype=object))
+    order = np.argsort(keys, kind="stable")
+    lengths = sorted(np.unique(keys >> np.uint64(48)).tolist(), reverse=True)
+    return keys[order], codes[order].astype(np.uint32), list(names), lengths
+
+def _registry_key(files):
+    raw = "|".join(dataset_cache.fingerprint(f) for f in files) or "builtin"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def build_index(files=None, rebuild=False):
+    """Compile the registry into .npy files (memory-mapped on load) and cache names/lengths.
+    Returns (keys, name_idx, names, lengths); recompiles only when a registry file changes."""
+    files = find_registry() if files is None else list(files)
+    key = _registry_key(files)
+    keys_path = dataset_cache.cache_path("vendor", f"{key}_keys.npy")
+    names_path = dataset_cache.cache_path("vendor", f"{key}_names.npy")
+    meta = None if rebuild else dataset_cache.get("vendor", key)
+    if meta is not None and os.path.exists(keys_path) and os.path.exists(names_path):
+        names, lengths = meta
+        return np.load(keys_path, mmap_mode="r"), np.load(names_path, mmap_mode="r"), names, lengths
+
+    if files:
+        entries = (entry for f in files for entry in parse_registry(f))
+    else:
+        entries = (_prefix(oui) + (name,) for oui, name in BUILTIN_OUIS.items())
+    keys, name_idx, names, lengths = compile_index(entries)
+    np.save(keys_path, keys)
+    np.save(names_path, name_idx)
+    dataset_cache.put("vendor", key, (names, lengths))
+    return keys, name_idx, names, lengths
+
+_index = None
+
+def load_index():
+    """The compiled index, built or mapped on first use."""
+    global _index
+    if _index is None:
+        _index = build_index()
+    return _index
+
+def reload(files=None, rebuild=False):
+    global _index
+    _index = build_index(files, rebuild)
+    _lookup.cache_clear()
+    return _index
+
+# ------------------ Lookups ------------------
+def mac_to_int(mac):
+    digits = re.sub(r"[:\-.\s]", "", str(mac))
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+def macs_to_ints(macs):
+    """Vectorized mac_to_int: (uint64 values, valid mask). Separators ":", "-", "." are ignored."""
+    text = pd.Series(macs, dtype=object).fillna("").astype(str).str.replace(r"[:\-.\s]", "", regex=True)
+    valid = np.array(text.str.len() == 12, dtype=bool)
+    raw = np.frombuffer("".join(text[valid]).encode("ascii", "replace"), dtype=np.uint8).reshape(-1, 12)
+    nibbles = _HEX[raw]
+    ok = (nibbles < 16).all(axis=1)
+    values = np.zeros(len(text), dtype=np.uint64)
+    values[np.flatnonzero(valid)[ok]] = nibbles[ok].astype(np.uint64) @ _NIBBLES
+    valid[np.flatnonzero(valid)[~ok]] = False
+    return values, valid
+
+def _match(values):
+    """Index into names for each uint64 MAC (-1 = no assignment covers it), longest prefix first."""
+    keys, name_idx, _, lengths = load_index()
+    found = np.full(len(values), -1, dtype=np.int64)
+    for bits in lengths:
+        todo = np.flatnonzero(found < 0)
+        if not len(todo) or not len(keys):
+            break
+        probe = np.uint64(bits << 48) | (values[todo] >> np.uint64(48 - bits))
+        pos = np.minimum(np.searchsorted(keys, probe), len(keys) - 1)
+        hit = keys[pos] == probe
+        found[todo[hit]] = name_idx[pos[hit]]
+    return found
+
+@lru_cache(maxsize=LRU_SIZE)
+def _lookup(value):
+    """One MAC: a binary search per prefix length over the mapped keys, longest first."""
+    keys, name_idx, names, lengths = load_index()
+    for bits in lengths:
+        probe = np.uint64((bits << 48) | (value >> (48 - bits)))
+        pos = int(keys.searchsorted(probe))
+        if pos < len(keys) and keys[pos] == probe:
+            return names[name_idx[pos]]
+    return UNKNOWN
+
+def get_vendor(mac):
+    """Vendor for one MAC from the offline registry, "Unknown Vendor" when nothing matches."""
+    value = mac_to_int(mac)
+    return UNKNOWN if value is None else _lookup(value)
+
+def get_vendors(macs):
+    """get_vendor for a whole ARP result set: each distinct MAC is parsed and matched once, in one pass."""
+    codes, uniques = pd.factorize(pd.Series(list(macs), dtype=object))
+    values, valid = macs_to_ints(uniques)
+    found = np.full(len(uniques) + 1, -1, dtype=np.int64)     # last slot: missing MACs (code -1)
+    found[:-1][valid] = _match(values[valid])
+    names = np.array(load_index()[2] + [UNKNOWN], dtype=object)
+    return names[found[codes]].tolist()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--build"]:
+        keys, _, names, lengths = reload(args[1:] or None, rebuild=True)
+        print(f"📇 Vendor index: {len(keys)} assignments, {len(names)} vendors, prefix lengths {lengths}")
+    else:
+        for mac, name in zip(args, get_vendors(args)):
+            print(f"{mac}  {name}")
@@ -1,11 +1,12 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import data_store
 
 # =============================
 # LOAD DATA
 # =============================
-df = pd.read_csv("clean_data.csv")
+df = data_store.load("clean_data.csv")
 
 # If dataset small → add dummy sample data for better visualization
 dummy = pd.DataFrame([